@@ -1,18 +1,40 @@
 import dash
 from dash import dcc, html, Input, Output, State
-import pandas as pd
-import numpy as np
-import joblib
-import plotly.express as px
 import os
+from flask import Response
+from src.metrics import CONTENT_TYPE, ServingMetrics, watch_service
+from src.prediction_cache import build_prediction_cache
+from src.model_registry import ModelRegistry
+from src.model_reloader import ReloadingPredictionService
+from src.eda_cache import EDAAggregates
+from config.paths_config import CONFIG_PATH, PREDICTION_CACHE_PATH
+from utils.common_functions import read_yaml
 
 # Paths
 MODEL_PATH = "artifacts/models/lgbm_model.pkl"
+PREPROCESSOR_PATH = "artifacts/models/preprocessor.json"
+COMPILED_MODEL_PATH = "artifacts/models/lgbm_model_compiled.npz"
+EVALUATION_PATH = "artifacts/models/evaluation.json"
+SERVING_ENGINE = os.environ.get("SERVING_ENGINE", "sklearn")
 DATA_PATH = "artifacts/raw/raw.csv"
+EDA_CACHE_PATH = "artifacts/eda/eda_aggregates.json"
+EDA_REFRESH_SECONDS = int(os.environ.get("EDA_REFRESH_SECONDS", 300))
+
+config = read_yaml(CONFIG_PATH)
 
 # Load model and data
-model = joblib.load(MODEL_PATH)
-df = pd.read_csv(DATA_PATH)
+# New registry versions are swapped in while the app keeps running
+prediction_service = ReloadingPredictionService(ModelRegistry.from_config(config), MODEL_PATH, PREPROCESSOR_PATH,
+                                                engine=SERVING_ENGINE, fallback_compiled_path=COMPILED_MODEL_PATH,
+                                                cache=build_prediction_cache(config["serving"]["cache"], MODEL_PATH,
+                                                                             PREDICTION_CACHE_PATH),
+                                                poll_seconds=config["model_registry"]["poll_seconds"],
+                                                fallback_evaluation_path=EVALUATION_PATH)
+metrics = ServingMetrics()
+watch_service(metrics, prediction_service)
+# EDA counts are loaded (or computed from raw.csv) by the first EDA callback,
+# not at startup
+eda_aggregates = EDAAggregates(DATA_PATH, EDA_CACHE_PATH)
 
 # Create Dash app
 app = dash.Dash(__name__, suppress_callback_exceptions=True)
@@ -51,13 +73,13 @@ app.layout = html.Div([
             dcc.Dropdown(
                 id="market_segment_type",
                 options=[
-                    {'label': 'Aviation', 'value': 0},
-                    {'label': 'Complementary', 'value': 1},
-                    {'label': 'Corporate', 'value': 2},
-                    {'label': 'Offline', 'value': 3},
-                    {'label': 'Online', 'value': 4}
+                    {'label': 'Aviation', 'value': 'Aviation'},
+                    {'label': 'Complementary', 'value': 'Complementary'},
+                    {'label': 'Corporate', 'value': 'Corporate'},
+                    {'label': 'Offline', 'value': 'Offline'},
+                    {'label': 'Online', 'value': 'Online'}
                 ],
-                value=4,
+                value='Online',
                 className="dropdown"
             ),
 
@@ -70,8 +92,8 @@ app.layout = html.Div([
             html.Label("Room Type Reserved"),
             dcc.Dropdown(
                 id="room_type_reserved",
-                options=[{'label': f"Room Type {i+1}", 'value': i} for i in range(7)],
-                value=0,
+                options=[{'label': f"Room Type {i+1}", 'value': f"Room_Type {i+1}"} for i in range(7)],
+                value='Room_Type 1',
                 className="dropdown"
             ),
 
@@ -79,12 +101,12 @@ app.layout = html.Div([
             dcc.Dropdown(
                 id="type_of_meal_plan",
                 options=[
-                    {'label': 'Meal Plan 1', 'value': 0},
-                    {'label': 'Meal Plan 2', 'value': 1},
-                    {'label': 'Meal Plan 3', 'value': 2},
-                    {'label': 'No Meal Plan', 'value': 3}
+                    {'label': 'Meal Plan 1', 'value': 'Meal Plan 1'},
+                    {'label': 'Meal Plan 2', 'value': 'Meal Plan 2'},
+                    {'label': 'Meal Plan 3', 'value': 'Meal Plan 3'},
+                    {'label': 'No Meal Plan', 'value': 'Not Selected'}
                 ],
-                value=0,
+                value='Meal Plan 1',
                 className="dropdown"
             ),
 
@@ -108,6 +130,8 @@ app.layout = html.Div([
         html.Div([dcc.Graph(id="eda_price_histogram")], className="graph-card"),
     ], className="graph-row"),
 
+    dcc.Interval(id="eda_refresh", interval=EDA_REFRESH_SECONDS * 1000),
+
     html.Div([
         html.Button("Download EDA Report (PDF)", id="download_button", className="button", n_clicks=0),
         dcc.Download(id="download_pdf")
@@ -136,51 +160,90 @@ def predict_reservation(n_clicks, lead_time, special_requests, price,
                         arrival_month, arrival_date, market_segment_type,
                         week_nights, weekend_nights, room_type_reserved, type_of_meal_plan):
     if n_clicks > 0:
-        features = np.array([[lead_time, special_requests, price,
-                              arrival_month, arrival_date, market_segment_type,
-                              week_nights, weekend_nights,
-                              room_type_reserved, type_of_meal_plan]])
-        prediction = model.predict(features)
-
-        if prediction[0] == 1:
-            return html.Div("✅ Customer is not likely to cancel!", className="result-success")
+        timer = metrics.timer("predict_reservation")
+        reservation = {
+            "lead_time": lead_time,
+            "no_of_special_requests": special_requests,
+            "avg_price_per_room": price,
+            "arrival_month": arrival_month,
+            "arrival_date": arrival_date,
+            "market_segment_type": market_segment_type,
+            "no_of_week_nights": week_nights,
+            "no_of_weekend_nights": weekend_nights,
+            "room_type_reserved": room_type_reserved,
+            "type_of_meal_plan": type_of_meal_plan
+        }
+        timer.stage("parse")
+        # Encode and score with the same model version, even mid-reload
+        active = prediction_service.current()
+        features = active[1].matrix_from_records([reservation])
+        timer.stage("features")
+        prediction, _ = prediction_service.predict_one(features, active)
+        timer.stage("predict")
+
+        if prediction == 1:
+            result = html.Div("✅ Customer is not likely to cancel!", className="result-success")
         else:
-            return html.Div("🚫 Customer is likely to cancel!", className="result-fail")
+            result = html.Div("🚫 Customer is likely to cancel!", className="result-fail")
+        timer.stage("render")
+        timer.finish(rows=1)
+        return result
     return ""
 
-# Callback for EDA Graphs
-@app.callback(
-    Output('eda_price_histogram', 'figure'),
-    Output('eda_market_segment_bar', 'figure'),
-    Output('eda_arrival_month_bar', 'figure'),
-    Output('eda_booking_status_bar', 'figure'),
-    Input('predict_btn', 'n_clicks')  # Optional, to refresh graphs
-)
-def update_eda_graphs(n_clicks):
+# EDA figures are built from the cached aggregates and only rebuilt when the
+# underlying data file changes
+_eda_figures = {"version": None, "figures": None}
+
+def build_eda_figures():
+    # plotly.express pulls in pandas; only the EDA tab needs it
+    import plotly.express as px
+
     # 1. Distribution of Average Room Price
-    fig1 = px.histogram(df, x="avg_price_per_room", nbins=50, title="Distribution of Average Room Prices",
+    price_counts = eda_aggregates.value_counts("avg_price_per_room", sort_index=True)
+    fig1 = px.histogram(price_counts, x="avg_price_per_room", y="count", histfunc="sum", nbins=50,
+                        title="Distribution of Average Room Prices",
                         color_discrete_sequence=["#3498db"])
+    fig1.update_layout(yaxis_title="count")
 
     # 2. Market Segment Type (Grouped)
-    market_segment_counts = df['market_segment_type'].value_counts().reset_index()
-    market_segment_counts.columns = ['market_segment_type', 'count']
+    market_segment_counts = eda_aggregates.value_counts("market_segment_type")
     fig2 = px.bar(market_segment_counts, x='market_segment_type', y='count', title="Market Segment Distribution",
                   color_discrete_sequence=["#2ecc71"])
 
     # 3. Arrival Month (Grouped)
-    arrival_month_counts = df['arrival_month'].value_counts().sort_index().reset_index()
-    arrival_month_counts.columns = ['arrival_month', 'count']
+    arrival_month_counts = eda_aggregates.value_counts("arrival_month", sort_index=True)
     fig3 = px.bar(arrival_month_counts, x='arrival_month', y='count', title="Arrival Month Distribution",
                   color_discrete_sequence=["#9b59b6"])
 
     # 4. Booking Status (Grouped)
-    booking_status_counts = df['booking_status'].value_counts().reset_index()
-    booking_status_counts.columns = ['booking_status', 'count']
+    booking_status_counts = eda_aggregates.value_counts("booking_status")
     fig4 = px.bar(booking_status_counts, x='booking_status', y='count', title="Booking Status Distribution",
                   color_discrete_sequence=["#e74c3c"])
 
     return fig1, fig2, fig3, fig4
 
+# Callback for EDA Graphs
+@app.callback(
+    Output('eda_price_histogram', 'figure'),
+    Output('eda_market_segment_bar', 'figure'),
+    Output('eda_arrival_month_bar', 'figure'),
+    Output('eda_booking_status_bar', 'figure'),
+    Input('eda_refresh', 'n_intervals')
+)
+def update_eda_graphs(n_intervals):
+    changed = eda_aggregates.refresh()
+    if _eda_figures["version"] != eda_aggregates.version:
+        _eda_figures["figures"] = build_eda_figures()
+        _eda_figures["version"] = eda_aggregates.version
+    elif n_intervals and not changed:
+        return dash.no_update, dash.no_update, dash.no_update, dash.no_update
+
+    return _eda_figures["figures"]
+
+@server.route("/metrics")
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
 if __name__ == '__main__':
     port = int(os.environ.get("PORT", 8080))
     app.run(host="0.0.0.0", port = port)
\ No newline at end of file
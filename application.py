@@ -1,41 +1,216 @@
-import joblib
-import numpy as np
-from config.paths_config import MODEL_OUTPUT
-from flask import Flask, render_template, request
+import os
+from config.paths_config import MODEL_OUTPUT, PREPROCESSOR_OUTPUT, COMPILED_MODEL_OUTPUT, EVALUATION_OUTPUT, PREDICTION_CACHE_PATH, CONFIG_PATH
+from flask import Flask, Response, jsonify, render_template, request, stream_with_context
+from src.prediction_service import iter_predictions_json
+from src.prediction_cache import build_prediction_cache
+from src.model_registry import ModelRegistry
+from src.model_reloader import ReloadingPredictionService
+from src.metrics import CONTENT_TYPE, ServingMetrics, watch_service
+from src.profiler import SamplingProfiler
+from src.logger import get_logger
+from src.custom_exception import InvalidRowsError
+from utils.common_functions import read_yaml
+
+logger = get_logger(__name__)
+
+config = read_yaml(CONFIG_PATH)
+serving_config = config["serving"]
+BATCH_MAX_ROWS = serving_config["batch_max_rows"]
+STREAM_THRESHOLD_ROWS = serving_config["stream_threshold_rows"]
+instrumentation_config = serving_config["instrumentation"]
+PROFILER_ENDPOINT = os.environ.get("PROFILER_ENDPOINT", str(instrumentation_config["profiler_endpoint"])).lower() in ("1", "true")
+MODEL_ADMIN_ENDPOINTS = os.environ.get("MODEL_ADMIN_ENDPOINTS",
+                                       str(config["model_registry"]["admin_endpoints"])).lower() in ("1", "true")
 
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = serving_config["batch_max_upload_mb"] * 1024 * 1024
 
-loaded_model = joblib.load(MODEL_OUTPUT)
-print(loaded_model.booster_.feature_name())
+# Serves the active registry version and swaps in new ones without a restart
+prediction_service = ReloadingPredictionService(ModelRegistry.from_config(config), MODEL_OUTPUT, PREPROCESSOR_OUTPUT,
+                                                engine=os.environ.get("SERVING_ENGINE", serving_config["engine"]),
+                                                fallback_compiled_path=COMPILED_MODEL_OUTPUT,
+                                                fallback_evaluation_path=EVALUATION_OUTPUT,
+                                                cache=build_prediction_cache(serving_config["cache"], MODEL_OUTPUT,
+                                                                             PREDICTION_CACHE_PATH),
+                                                poll_seconds=config["model_registry"]["poll_seconds"])
+logger.info(f"Serving features {prediction_service.feature_names}")
+
+metrics = ServingMetrics()
+watch_service(metrics, prediction_service)
 
 @app.route('/', methods=['GET','POST'])
 def index():
     if request.method== 'POST':
+        timer = metrics.timer("index")
+
+        reservation = {
+            "lead_time": int(request.form["lead_time"]),
+            "no_of_special_requests": int(request.form["no_of_special_request"]),
+            "avg_price_per_room": float(request.form["avg_price_per_room"]),
+            "arrival_month": int(request.form["arrival_month"]),
+            "arrival_date": int(request.form["arrival_date"]),
+            "market_segment_type": request.form["market_segment_type"],
+            "no_of_week_nights": int(request.form["no_of_week_nights"]),
+            "no_of_weekend_nights": int(request.form["no_of_weekend_nights"]),
+            "type_of_meal_plan": request.form["type_of_meal_plan"],
+            "room_type_reserved": request.form["room_type_reserved"]
+        }
+
+        timer.stage("parse")
+
+        # Encode and score with the same model version, even mid-reload
+        active = prediction_service.current()
+        features = active[1].matrix_from_records([reservation])
+        timer.stage("features")
+
+        prediction, _ = prediction_service.predict_one(features, active)
+        timer.stage("predict")
+
+        page = render_template('index.html', prediction=prediction)
+        timer.stage("render")
+        timer.finish(rows=1)
+        return page
 
-        lead_time = int(request.form["lead_time"])
-        no_special_request = int(request.form["no_of_special_request"])
-        avg_price_room = float(request.form["avg_price_per_room"])
-        arrival_month = int(request.form["arrival_month"])
-        arrival_date = int(request.form["arrival_date"])
-        market_segment_type = int(request.form["market_segment_type"])
-        no_of_week_nights = int(request.form["no_of_week_nights"])
-        no_of_weekend_nights = int(request.form["no_of_weekend_nights"])
-        type_of_meal_plan = int(request.form["type_of_meal_plan"])
-        room_type_reserved = int(request.form["room_type_reserved"])
-
-        features = np.array([[lead_time, no_special_request, avg_price_room,
-                      arrival_month, arrival_date, market_segment_type,
-                      no_of_week_nights, no_of_weekend_nights,
-                      type_of_meal_plan, room_type_reserved]])
-        
-        print(features.shape)
-        prediction = loaded_model.predict(features)
-
-
-        return render_template('index.html', prediction=prediction[0])
-    
     return render_template("index.html", prediction=None)
 
 
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Scores many reservations in a single booster call.
+
+    Accepts either a JSON array of reservations (objects keyed by feature
+    name) or a CSV upload in the `file` form field.
+    """
+    timer = metrics.timer("predict_batch")
+    # One model version encodes and scores the whole request, even mid-reload
+    version, service = prediction_service.current()
+    try:
+        if "file" in request.files:
+            upload = request.files["file"].stream
+            timer.stage("parse")
+            matrix = service.matrix_from_csv(upload)
+        else:
+            records = request.get_json(force=True)
+            timer.stage("parse")
+            matrix = service.matrix_from_records(records)
+        timer.stage("features")
+    except InvalidRowsError as e:
+        # Every invalid row of the batch is reported in one response
+        timer.finish(400)
+        return jsonify(dict(e.errors.summary(), error=str(e))), 400
+    except (ValueError, TypeError, KeyError) as e:
+        timer.finish(400)
+        return jsonify({"error": str(e)}), 400
+
+    if matrix.shape[0] > BATCH_MAX_ROWS:
+        timer.finish(413)
+        return jsonify({"error": f"Batch has {matrix.shape[0]} rows, limit is {BATCH_MAX_ROWS}"}), 413
+
+    predict_started = timer.last
+    try:
+        labels, probabilities = service.predict(matrix)
+    except Exception:
+        timer.stage("predict")
+        prediction_service.record(version, matrix.shape[0], timer.last - predict_started, error=True)
+        timer.finish(500)
+        raise
+    timer.stage("predict")
+    prediction_service.record(version, matrix.shape[0], timer.last - predict_started)
+    headers = {"X-Model-Version": version}
+
+    try:
+        if matrix.shape[0] > STREAM_THRESHOLD_ROWS:
+            # Rendering happens while the body streams, after this handler returns
+            response = Response(stream_with_context(iter_predictions_json(labels, probabilities)),
+                                mimetype="application/json", headers=headers)
+        else:
+            response = jsonify({
+                "count": int(matrix.shape[0]),
+                "predictions": [
+                    {"prediction": int(label), "probability": round(float(probability), 6)}
+                    for label, probability in zip(labels, probabilities)
+                ]
+            })
+            response.headers.update(headers)
+    except Exception:
+        timer.finish(500)
+        raise
+    timer.stage("render")
+    timer.finish(rows=matrix.shape[0])
+    return response
+
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    if prediction_service.cache is None:
+        return jsonify({"enabled": False})
+    return jsonify(dict(prediction_service.cache.stats(), enabled=True))
+
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
+
+
+if PROFILER_ENDPOINT:
+    profiler = SamplingProfiler(instrumentation_config["profiler_interval_ms"])
+
+    @app.route('/debug/profiler', methods=['GET', 'POST'])
+    def sampling_profiler():
+        """
+        POST {"action": "start", "interval_ms": 5, "seconds": 60} or
+        {"action": "stop"}; GET returns the samples as collapsed stacks for
+        flamegraph.pl or speedscope.
+        """
+        if request.method == 'POST':
+            payload = request.get_json(silent=True) or {}
+            action = payload.get("action", "start")
+            if action == "start":
+                profiler.reset()
+                profiler.start(payload.get("interval_ms"), payload.get("seconds"))
+            elif action == "stop":
+                profiler.stop()
+            else:
+                return jsonify({"error": f"Unknown action {action}"}), 400
+            return jsonify(profiler.stats())
+        return Response(profiler.collapsed(), mimetype="text/plain")
+
+
+@app.route('/models', methods=['GET'])
+def models():
+    return jsonify(prediction_service.stats())
+
+
+# Unauthenticated and state-changing, so only served when enabled
+if MODEL_ADMIN_ENDPOINTS:
+    @app.route('/models/rollback', methods=['POST'])
+    def rollback_model():
+        """
+        Reactivates the previous model version, or the one named in
+        {"version": "v0003"}. Every worker follows within poll_seconds.
+        """
+        try:
+            version = prediction_service.rollback((request.get_json(silent=True) or {}).get("version"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 409
+        return jsonify({"serving": version})
+
+    @app.route('/models/feedback', methods=['POST'])
+    def model_feedback():
+        """
+        Records actual booking outcomes for earlier predictions, which feeds the
+        per-version accuracy in /models. Body:
+        {"version": "v0003", "predictions": [1, 0], "actuals": [1, 1]}
+        """
+        payload = request.get_json(force=True)
+        try:
+            prediction_service.record_outcomes(payload["version"], payload["predictions"], payload["actuals"])
+        except (ValueError, TypeError, KeyError) as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify({"recorded": len(payload["actuals"])})
+
+
 if __name__ == "__main__":
-    app.run(host='0.0.0.0', port=8080)
\ No newline at end of file
+    # Development server; use gunicorn.conf.py in production
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 8080)))
@@ -0,0 +1,73 @@
+"""
+Compares the class balancing strategies on the encoded training split.
+
+    python -m benchmarks.balancing_benchmark [--scale K] [--chunk-size N]
+
+For each strategy it reports the balancing time, the peak memory allocated
+while balancing, the rows handed to training, the LightGBM fit time and
+accuracy / F1 on the unbalanced test split. --scale K stacks the training
+data K times to see how each strategy grows.
+"""
+import argparse
+import os
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+import lightgbm as lgb
+from sklearn.metrics import accuracy_score, f1_score
+from imblearn.over_sampling import SMOTE  # noqa: F401 (imported up front so it is not timed)
+
+from src.data_preprocessing import DataProcessor
+from src.class_balancing import ClassBalancer, BALANCING_STRATEGIES, lightgbm_balance_params
+from utils.common_functions import load_data, schema_from_config
+from config.paths_config import *
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Stack the training data this many times")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per chunk for chunked_smote")
+    parser.add_argument("--strategies", nargs="*", default=list(BALANCING_STRATEGIES))
+    return parser.parse_args()
+
+
+def encoded_splits():
+    if os.path.exists(ENCODED_TRAIN_DATA_PATH) and os.path.exists(ENCODED_TEST_DATA_PATH):
+        return load_data(ENCODED_TRAIN_DATA_PATH), load_data(ENCODED_TEST_DATA_PATH)
+    processor = DataProcessor(TRAIN_FILE_PATH, TEST_FILE_PATH, PROCESSED_DIR, CONFIG_PATH)
+    return processor.encode_splits(schema_from_config(processor.config))
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    train_df, test_df = encoded_splits()
+    train_df = train_df.drop_duplicates()
+    if args.scale > 1:
+        train_df = pd.concat([train_df] * args.scale, ignore_index=True)
+    X_test = test_df[train_df.columns.drop("booking_status")]
+    y_test = test_df["booking_status"]
+    print(f"{len(train_df)} training rows, class counts {np.bincount(train_df['booking_status']).tolist()}")
+
+    print(f"{'strategy':<18}{'balance s':>10}{'peak MB':>10}{'rows':>10}{'fit s':>8}{'accuracy':>10}{'f1':>8}")
+    for strategy in args.strategies:
+        balancer = ClassBalancer(strategy, chunk_size=args.chunk_size)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        balanced = balancer.balance(train_df)
+        balance_seconds = time.perf_counter() - start
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+
+        X = balanced.drop(columns="booking_status")
+        y = balanced["booking_status"]
+        model = lgb.LGBMClassifier(n_estimators=200, random_state=42, verbose=-1,
+                                   **lightgbm_balance_params(strategy, y))
+        start = time.perf_counter()
+        model.fit(X, y)
+        fit_seconds = time.perf_counter() - start
+
+        y_pred = model.predict(X_test[X.columns])
+        print(f"{strategy:<18}{balance_seconds:>10.2f}{peak_mb:>10.1f}{len(balanced):>10}{fit_seconds:>8.2f}"
+              f"{accuracy_score(y_test, y_pred):>10.4f}{f1_score(y_test, y_pred):>8.4f}")
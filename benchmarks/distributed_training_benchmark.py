@@ -0,0 +1,90 @@
+"""
+Scaling of data-parallel training from 1 to N local workers.
+
+    python -m benchmarks.distributed_training_benchmark [--rows 1000000] [--workers 1 2 4] [--trees 100]
+
+Training data is synthetic: reservations sampled from the profile in
+artifacts/benchmarks (see benchmarks.suite) and encoded like the
+processed split. 10% of the rows are held out to check that the distributed
+models are as accurate as the single-process one.
+
+The baseline is the current single-process fit: one LGBMClassifier with
+DISTRIBUTED_LIGHTGBM_PARAMS and every core. For each worker count the
+distributed run is timed end to end (sharding, spawning the workers,
+loading shards and the networked fit) and as the slowest worker's fit
+alone. Speedup is baseline time / distributed time. Efficiency divides the
+speedup by how many times more cores the run used than the baseline, so
+1.0 is perfect scaling: on one machine the workers share its cores and
+ideal efficiency means distributing costs nothing, on N nodes it means N
+times faster.
+"""
+import argparse
+import os
+import tempfile
+import time
+from config.model_params import DISTRIBUTED_LIGHTGBM_PARAMS
+from config.paths_config import BENCHMARK_DATA_DIR
+from benchmarks.suite import synthetic_data, _processor, _encoded
+from src.distributed_training import DistributedTrainer
+from src.hyperparameter_search import thread_budget
+from utils.common_functions import save_data
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--workers", nargs="*", type=int, default=[1, 2, 4])
+    parser.add_argument("--trees", type=int, default=100, help="n_estimators for every fit")
+    parser.add_argument("--tree-learner", default="data", choices=["data", "voting", "feature"])
+    return parser.parse_args()
+
+
+def training_data(rows):
+    data_path = synthetic_data(rows)
+    processor = _processor(data_path)
+    df = processor.feature_selection(_encoded(processor, data_path, rows))
+    holdout = df.sample(frac=0.1, random_state=42)
+    train = df.drop(index=holdout.index)
+    train_path = BENCHMARK_DATA_DIR / f"distributed_train_{rows}.parquet"
+    save_data(train, train_path)
+    return train_path, train, holdout
+
+
+def accuracy(model, holdout):
+    X = holdout.drop(columns=["booking_status"])
+    return float((model.predict(X) == holdout["booking_status"].to_numpy()).mean())
+
+
+if __name__ == "__main__":
+    import lightgbm as lgb
+
+    args = parse_args()
+    cpu_count = os.cpu_count() or 1
+    params = dict(DISTRIBUTED_LIGHTGBM_PARAMS, n_estimators=args.trees)
+    train_path, train, holdout = training_data(args.rows)
+
+    started = time.perf_counter()
+    model = lgb.LGBMClassifier(**params, n_jobs=cpu_count).fit(train.drop(columns=["booking_status"]),
+                                                              train["booking_status"])
+    baseline_s = time.perf_counter() - started
+    training_rows = len(train)
+    del train
+
+    print(f"{training_rows:,} training rows, {args.trees} trees, {cpu_count} cores, "
+          f"tree_learner={args.tree_learner}\n")
+    print(f"{'fit':<22}{'cores':>6}{'wall s':>9}{'fit s':>8}{'speedup':>9}{'efficiency':>12}{'accuracy':>10}")
+    print(f"{'single process':<22}{cpu_count:>6}{baseline_s:>9.2f}{baseline_s:>8.2f}{1:>9.2f}{1:>12.2f}"
+          f"{accuracy(model, holdout):>10.4f}")
+
+    for workers in args.workers:
+        trainer = DistributedTrainer(params, workers=workers, shard_dir=tempfile.mkdtemp(),
+                                     tree_learner=args.tree_learner)
+        started = time.perf_counter()
+        model = trainer.train(train_path)
+        wall_s = time.perf_counter() - started
+        fit_s = max(stats["fit_seconds"] for stats in trainer.worker_stats_)
+
+        cores = min(cpu_count, workers * thread_budget(workers)[1])
+        speedup = baseline_s / wall_s
+        print(f"{f'{workers} worker(s)':<22}{cores:>6}{wall_s:>9.2f}{fit_s:>8.2f}{speedup:>9.2f}"
+              f"{speedup * cpu_count / cores:>12.2f}{accuracy(model, holdout):>10.4f}")
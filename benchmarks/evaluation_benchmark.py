@@ -0,0 +1,86 @@
+"""
+Cost of evaluating a classifier on large test sets.
+
+    python -m benchmarks.evaluation_benchmark [--rows 1000000 10000000] [--bootstrap 1000] [--workers 1]
+
+Scores are synthetic (labels with a realistic 2:1 class balance and
+overlapping score distributions), so only the evaluation itself is timed.
+For each size it compares:
+
+  sklearn @0.5        the four sklearn metrics evaluate_model computed before,
+                      at the default threshold only
+  sklearn grid        the same metrics at every threshold of the grid, one
+                      sklearn call per metric and threshold (extrapolated
+                      from a few thresholds)
+  sklearn bootstrap   row-resampling bootstrap of ROC AUC and F1 with sklearn
+                      (extrapolated from a few replicates)
+  evaluator           ThresholdEvaluator: binning, every threshold, curves,
+                      calibration and the bootstrap intervals
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from src.model_evaluation import ThresholdEvaluator
+
+SAMPLED_THRESHOLDS = 5
+SAMPLED_REPLICATES = 3
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", nargs="*", type=int, default=[1000000, 10000000])
+    parser.add_argument("--thresholds", type=int, default=1001)
+    parser.add_argument("--bootstrap", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1)
+    return parser.parse_args()
+
+
+def make_scores(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    y_true = rng.random(rows) < 0.67
+    probabilities = np.clip(rng.beta(2, 3, rows) + 0.3 * y_true, 0.0, 1.0)
+    return y_true, probabilities
+
+
+def sklearn_metrics(y_true, probabilities, threshold):
+    y_pred = probabilities >= threshold
+    return (accuracy_score(y_true, y_pred), precision_score(y_true, y_pred), recall_score(y_true, y_pred),
+            f1_score(y_true, y_pred))
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    print(f"{'rows':>11}{'sklearn @0.5':>14}{'sklearn grid':>14}{'sklearn bootstrap':>19}"
+          f"{'evaluator':>11}{'(of which bootstrap)':>22}   seconds")
+    for rows in args.rows:
+        y_true, probabilities = make_scores(rows)
+
+        single = timed(sklearn_metrics, y_true, probabilities, 0.5)
+
+        grid = np.linspace(0.0, 1.0, args.thresholds)
+        sampled = grid[::max(1, args.thresholds // SAMPLED_THRESHOLDS)][:SAMPLED_THRESHOLDS]
+        grid_s = sum(timed(sklearn_metrics, y_true, probabilities, threshold) for threshold in sampled)
+        grid_s *= args.thresholds / len(sampled)
+
+        rng = np.random.default_rng(0)
+
+        def replicate():
+            rows_drawn = rng.integers(0, rows, rows)
+            roc_auc_score(y_true[rows_drawn], probabilities[rows_drawn])
+            f1_score(y_true[rows_drawn], probabilities[rows_drawn] >= 0.5)
+
+        bootstrap_s = sum(timed(replicate) for _ in range(SAMPLED_REPLICATES)) * args.bootstrap / SAMPLED_REPLICATES
+
+        evaluator = ThresholdEvaluator(args.thresholds, bootstrap_samples=args.bootstrap, workers=args.workers)
+        evaluator_s = timed(evaluator.evaluate, y_true, probabilities)
+        intervals_s = timed(evaluator.bootstrap, evaluator._index(0.5))
+
+        print(f"{rows:>11,}{single:>14.2f}{grid_s:>14.1f}{bootstrap_s:>19.1f}{evaluator_s:>11.2f}{intervals_s:>22.2f}")
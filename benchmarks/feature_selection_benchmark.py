@@ -0,0 +1,69 @@
+"""
+Compares the feature selection methods against the original random forest
+ranking on the balanced training data.
+
+    python -m benchmarks.feature_selection_benchmark [--repeat N] [--scale K]
+
+--scale K stacks the training set K times (with jittered prices) to see how
+each method grows with the number of rows.
+"""
+import argparse
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from src.data_preprocessing import DataProcessor
+from src.feature_selection import FeatureSelector, SELECTION_METHODS
+from utils.common_functions import read_yaml, load_data, schema_from_config
+from config.paths_config import *
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per method (best is reported)")
+    parser.add_argument("--scale", type=int, default=1, help="Stack the training data this many times")
+    parser.add_argument("--methods", nargs="*", default=list(SELECTION_METHODS))
+    return parser.parse_args()
+
+
+def balanced_training_frame(scale):
+    processor = DataProcessor(TRAIN_FILE_PATH, TEST_FILE_PATH, PROCESSED_DIR, CONFIG_PATH)
+    df = load_data(ENCODED_TRAIN_DATA_PATH) if os.path.exists(ENCODED_TRAIN_DATA_PATH) else None
+    if df is None:
+        df, _ = processor.encode_splits(schema_from_config(processor.config))
+    df = processor.balance_data(df)
+    if scale > 1:
+        rng = np.random.default_rng(0)
+        frames = [df]
+        for _ in range(scale - 1):
+            copy = df.copy()
+            copy["avg_price_per_room"] = copy["avg_price_per_room"] * rng.uniform(0.98, 1.02, len(copy))
+            frames.append(copy)
+        df = pd.concat(frames, ignore_index=True)
+    return df
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = read_yaml(CONFIG_PATH)
+    df = balanced_training_frame(args.scale)
+    print(f"{len(df)} rows x {df.shape[1] - 1} features")
+
+    baseline = None
+    print(f"{'method':<16}{'seconds':>10}{'overlap':>10}  selected")
+    for method in args.methods:
+        selector = FeatureSelector.from_config(config)
+        selector.method = method
+        selector.cache_dir = None
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            selected = selector.select(df)
+            timings.append(time.perf_counter() - start)
+
+        if baseline is None and method == "random_forest":
+            baseline = set(selected)
+        overlap = f"{len(baseline & set(selected))}/{len(selected)}" if baseline else "-"
+        print(f"{method:<16}{min(timings):>10.2f}{overlap:>10}  {selected}")
@@ -0,0 +1,124 @@
+"""
+Per-call cost of logging and request instrumentation.
+
+    python -m benchmarks.instrumentation_benchmark [--calls 100000] [--requests 2000]
+
+Logging: the time the calling thread spends in one logger.info call with the
+previous synchronous FileHandler setup, and with the queue handler from
+src/logger.py writing text or JSON, plus the cost of a call below the log
+level. "drain s" is how long the writer thread needed afterwards to get
+everything to disk. Each case logs once per loop iteration, the way a
+DataProcessor step logs once per processed column.
+
+Instrumentation: the cost of one RequestTimer with four stages, and the
+throughput of POST /predict/batch through the Flask test client, so the
+timer cost can be read as a share of a request.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from src.logger import DailyFileHandler, JsonFormatter, TEXT_FORMAT, _LogWriter
+from src.metrics import ServingMetrics
+
+RESERVATION = {
+    "lead_time": 45, "no_of_special_requests": 1, "avg_price_per_room": 110.5, "arrival_month": 7,
+    "arrival_date": 14, "market_segment_type": "Online", "no_of_week_nights": 2,
+    "no_of_weekend_nights": 1, "type_of_meal_plan": "Meal Plan 1", "room_type_reserved": "Room_Type 1"
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100000, help="Log calls per case")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests through the Flask test client")
+    return parser.parse_args()
+
+
+def isolated_logger(name, handler):
+    logger = logging.getLogger(f"benchmark.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+def time_calls(logger, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        logger.info(f"Processed column {i} with {calls} rows")
+    return time.perf_counter() - started
+
+
+def logging_cases(calls, logs_dir):
+    rows = []
+
+    sync_handler = logging.FileHandler(os.path.join(logs_dir, "sync.log"))
+    sync_handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+    seconds = time_calls(isolated_logger("sync", sync_handler), calls)
+    sync_handler.close()
+    rows.append(("sync FileHandler (before)", seconds, 0.0))
+
+    for name, formatter in (("queue, text", logging.Formatter(TEXT_FORMAT)), ("queue, json", JsonFormatter())):
+        file_handler = DailyFileHandler(os.path.join(logs_dir, name.replace(", ", "_")))
+        file_handler.setFormatter(formatter)
+        writer = _LogWriter(file_handler, calls + 1)
+        writer.start()
+        seconds = time_calls(isolated_logger(name, writer.queue_handler), calls)
+        drain_started = time.perf_counter()
+        writer.stop()
+        file_handler.close()
+        rows.append((name, seconds, time.perf_counter() - drain_started))
+
+    quiet = isolated_logger("quiet", logging.NullHandler())
+    started = time.perf_counter()
+    for i in range(calls):
+        quiet.debug(f"Processed column {i} with {calls} rows")
+    rows.append(("below level, f-string", time.perf_counter() - started, 0.0))
+
+    started = time.perf_counter()
+    for i in range(calls):
+        quiet.debug("Processed column %s with %s rows", i, calls)
+    rows.append(("below level, %-args", time.perf_counter() - started, 0.0))
+    return rows
+
+
+def timer_cost(calls):
+    metrics = ServingMetrics()
+    started = time.perf_counter()
+    for _ in range(calls):
+        timer = metrics.timer("benchmark")
+        timer.stage("parse")
+        timer.stage("features")
+        timer.stage("predict")
+        timer.stage("render")
+        timer.finish(rows=1)
+    return (time.perf_counter() - started) / calls
+
+
+def flask_request_cost(requests):
+    import application
+
+    client = application.app.test_client()
+    client.post("/predict/batch", json=[RESERVATION])
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.post("/predict/batch", json=[RESERVATION])
+    return (time.perf_counter() - started) / requests
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as logs_dir:
+        rows = logging_cases(args.calls, logs_dir)
+
+    print(f"{'logging case':<28}{'us/call':>10}{'drain s':>10}")
+    for name, seconds, drain in rows:
+        print(f"{name:<28}{1e6 * seconds / args.calls:>10.2f}{drain:>10.2f}")
+
+    timer_s = timer_cost(args.calls)
+    request_s = flask_request_cost(args.requests)
+    print(f"\nRequestTimer, 4 stages:     {1e6 * timer_s:.2f} us/request")
+    print(f"POST /predict/batch (1 row): {1e6 * request_s:.0f} us/request "
+          f"({1 / request_s:.0f} req/s), timer share {100 * timer_s / request_s:.2f}%")
@@ -0,0 +1,127 @@
+"""
+Scoring throughput when part of the input is invalid.
+
+    python -m benchmarks.invalid_rows_benchmark [--rows 200000] [--batch 64]
+
+For each share of invalid rows it compares:
+
+  per-row raise   validate each reservation on its own and raise (and
+                  catch) one CustomException per bad row, the only way to
+                  find every bad row before RowErrors
+  collected       one pass over the batch collecting RowErrors, then one
+                  InvalidRowsError for the whole batch
+  frame           the chunked DataFrame path BatchScorer uses, with invalid
+                  values recorded by FeatureTransformer.transform
+
+and the cost of raising a CustomException with the message formatted
+eagerly (as before) or lazily (only when read).
+"""
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+from src.custom_exception import CustomException, RowErrors
+from src.feature_transformer import FeatureTransformer
+from config.paths_config import PREPROCESSOR_OUTPUT
+
+RESERVATION = {
+    "lead_time": 45, "no_of_special_requests": 1, "avg_price_per_room": 110.5, "arrival_month": 7,
+    "arrival_date": 14, "market_segment_type": "Online", "no_of_week_nights": 2,
+    "no_of_weekend_nights": 1, "type_of_meal_plan": "Meal Plan 1", "room_type_reserved": "Room_Type 1"
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=64, help="Records per request for the records paths")
+    parser.add_argument("--invalid", nargs="*", type=float, default=[0.0, 0.01, 0.1, 0.5])
+    return parser.parse_args()
+
+
+def make_records(rows, invalid_share, seed=42):
+    rng = np.random.default_rng(seed)
+    records = [dict(RESERVATION, lead_time=int(lead_time)) for lead_time in rng.integers(0, 400, rows)]
+    for row in np.flatnonzero(rng.random(rows) < invalid_share):
+        records[row]["avg_price_per_room"] = "unknown"
+    return records
+
+
+def per_row_raise(transformer, records, feature_names):
+    bad_rows = []
+    for row, record in enumerate(records):
+        try:
+            try:
+                transformer.transform_records([record], feature_names)
+            except (KeyError, TypeError, ValueError):
+                raise CustomException("Invalid reservation", sys, row=row)
+        except CustomException as e:
+            bad_rows.append(str(e))
+    return bad_rows
+
+
+def collected(transformer, records, feature_names):
+    errors = RowErrors()
+    transformer.transform_records(records, feature_names, errors)
+    return errors
+
+
+def eager_raise():
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        try:
+            raise CustomException("Stage failed", sys)
+        except CustomException as e:
+            return str(e)
+
+
+def lazy_raise():
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        try:
+            raise CustomException("Stage failed", sys)
+        except CustomException as e:
+            return e
+
+
+def rate(function, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return repeats / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    transformer = FeatureTransformer.load(PREPROCESSOR_OUTPUT)
+    feature_names = list(RESERVATION)
+
+    print(f"{'invalid':>8}{'per-row raise':>16}{'collected':>14}{'frame':>14}   rows/s")
+    for share in args.invalid:
+        records = make_records(args.rows, share)
+        batches = [records[start:start + args.batch] for start in range(0, len(records), args.batch)]
+
+        started = time.perf_counter()
+        for batch in batches:
+            per_row_raise(transformer, batch, feature_names)
+        per_row = args.rows / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for batch in batches:
+            collected(transformer, batch, feature_names)
+        batched = args.rows / (time.perf_counter() - started)
+
+        frame = pd.DataFrame.from_records(records, columns=feature_names)
+        started = time.perf_counter()
+        errors = RowErrors()
+        transformer.transform(frame, feature_names, errors)
+        frame_rate = args.rows / (time.perf_counter() - started)
+
+        print(f"{share:>8.0%}{per_row:>16,.0f}{batched:>14,.0f}{frame_rate:>14,.0f}   "
+              f"({len(errors.rows())} invalid rows found)")
+
+    print(f"\nCustomException raised and formatted: {rate(eager_raise, 100000):,.0f}/s")
+    print(f"CustomException raised, not formatted: {rate(lazy_raise, 100000):,.0f}/s")
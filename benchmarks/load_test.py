@@ -0,0 +1,181 @@
+"""
+Load test for the prediction API.
+
+    python -m benchmarks.load_test --targets dev gunicorn async --concurrency 16 --duration 20
+
+Each target is started as a subprocess on a free port (or pass --url to hit
+a running server). Client threads keep one HTTP/1.1 connection each and post
+single-reservation requests back to back; the report gives requests/second,
+p50/p99 latency, errors and the server's memory (summed PSS, which counts
+copy-on-write shared pages once).
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from urllib.parse import urlparse
+import numpy as np
+
+RESERVATION = {
+    "lead_time": 45, "no_of_special_requests": 1, "avg_price_per_room": 110.5, "arrival_month": 7,
+    "arrival_date": 14, "market_segment_type": "Online", "no_of_week_nights": 2,
+    "no_of_weekend_nights": 1, "type_of_meal_plan": "Meal Plan 1", "room_type_reserved": "Room_Type 1"
+}
+
+TARGETS = {
+    "dev": lambda port: [sys.executable, "application.py"],
+    "gunicorn": lambda port: [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+                              "--bind", f"127.0.0.1:{port}", "--access-logfile", "/dev/null", "application:app"],
+    "async": lambda port: [sys.executable, "inference_server.py"],
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="*", default=["dev", "gunicorn"], choices=list(TARGETS))
+    parser.add_argument("--url", help="Benchmark an already running server instead")
+    parser.add_argument("--path", default="/predict/batch", help="Endpoint receiving a JSON array")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per target")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--workers", type=int, default=None, help="WEB_CONCURRENCY for gunicorn")
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, process=None, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(f"{url}/cache/stats", timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready")
+
+
+def process_tree(pid):
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat_file:
+                    children.setdefault(int(stat_file.read().rsplit(")", 1)[1].split()[1]), []).append(int(entry))
+            except OSError:
+                continue
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        pending.extend(children.get(current, []))
+    return pids
+
+
+def pss_mb(pid):
+    total = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/smaps_rollup") as smaps:
+                for line in smaps:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        except OSError:
+            continue
+    return total / 1024
+
+
+def run_load(url, path, concurrency, duration, warmup):
+    parsed = urlparse(url)
+    body = json.dumps([RESERVATION])
+    headers = {"Content-Type": "application/json"}
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    start_at = time.monotonic() + warmup
+    stop_at = start_at + duration
+
+    def client():
+        connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+        local = []
+        while True:
+            sent = time.monotonic()
+            if sent >= stop_at:
+                break
+            try:
+                connection.request("POST", path, body, headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except OSError:
+                connection.close()
+                connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+                ok = False
+            if sent >= start_at:
+                if ok:
+                    local.append(time.monotonic() - sent)
+                else:
+                    with lock:
+                        errors[0] += 1
+        connection.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / duration,
+        "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else float("nan"),
+        "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else float("nan"),
+        "errors": errors[0],
+    }
+
+
+def print_row(name, result):
+    print(f"{name:<12}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+          f"{result['errors']:>8}{result.get('pss_mb', float('nan')):>10.1f}")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per target, POST {args.path}")
+    print(f"{'target':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'PSS MB':>10}")
+
+    if args.url:
+        wait_until_ready(args.url)
+        print_row("url", run_load(args.url, args.path, args.concurrency, args.duration, args.warmup))
+        sys.exit(0)
+
+    for target in args.targets:
+        port = free_port()
+        env = dict(os.environ, PORT=str(port))
+        if args.workers:
+            env["WEB_CONCURRENCY"] = str(args.workers)
+        process = subprocess.Popen(TARGETS[target](port), env=env, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL)
+        try:
+            url = f"http://127.0.0.1:{port}"
+            wait_until_ready(url, process)
+            result = run_load(url, args.path, args.concurrency, args.duration, args.warmup)
+            result["pss_mb"] = pss_mb(process.pid)
+            print_row(target, result)
+        finally:
+            process.terminate()
+            process.wait(timeout=60)
@@ -0,0 +1,90 @@
+"""
+In-process benchmark of request micro-batching.
+
+    python -m benchmarks.micro_batching_benchmark [--concurrency 256] [--requests 20000]
+
+Simulates `--concurrency` clients that each send single-row requests back
+to back on one event loop, and scores them either one call per request on
+a worker thread (what a thread-per-request server does) or through
+MicroBatcher. Reports rows/second, p50/p99 latency and the mean batch size,
+without any HTTP overhead in the way.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from src.micro_batching import MicroBatcher
+from src.prediction_service import PredictionService
+from config.paths_config import *
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--requests", type=int, default=20000, help="Requests per mode")
+    parser.add_argument("--engine", default="sklearn", choices=["sklearn", "compiled"])
+    parser.add_argument("--max-batch-rows", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    return parser.parse_args()
+
+
+async def drive(score, rows, concurrency, n_requests):
+    latencies = []
+    remaining = [n_requests]
+
+    async def client(offset):
+        index = offset
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            matrix = rows[index % len(rows)][None, :]
+            sent = time.perf_counter()
+            await score(matrix)
+            latencies.append(time.perf_counter() - sent)
+            index += concurrency
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(offset) for offset in range(concurrency)))
+    seconds = time.perf_counter() - start
+    latencies = np.asarray(latencies) * 1000
+    return {"rows_per_s": len(latencies) / seconds,
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p99_ms": float(np.percentile(latencies, 99))}
+
+
+async def per_request(service, rows, args):
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    async def score(matrix):
+        return await loop.run_in_executor(executor, service.predict, matrix)
+
+    result = await drive(score, rows, args.concurrency, args.requests)
+    executor.shutdown()
+    result["mean_batch_rows"] = 1.0
+    return result
+
+
+async def micro_batched(service, rows, args):
+    batcher = MicroBatcher(service.predict, max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms,
+                           max_queue_rows=args.concurrency * 2)
+    await batcher.start()
+    result = await drive(batcher.submit, rows, args.concurrency, args.requests)
+    result["mean_batch_rows"] = batcher.stats()["mean_batch_rows"]
+    await batcher.stop()
+    return result
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    service = PredictionService(MODEL_OUTPUT, PREPROCESSOR_OUTPUT, engine=args.engine,
+                                compiled_path=COMPILED_MODEL_OUTPUT)
+    rows = np.random.default_rng(42).normal(size=(1000, len(service.feature_names))).clip(0) * 10
+
+    print(f"{args.requests} single-row requests, {args.concurrency} concurrent clients, engine {args.engine}")
+    print(f"{'mode':<16}{'rows/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'batch':>8}")
+    for name, mode in (("per_request", per_request), ("micro_batched", micro_batched)):
+        result = asyncio.run(mode(service, rows, args))
+        print(f"{name:<16}{result['rows_per_s']:>10.0f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              f"{result['mean_batch_rows']:>8.1f}")
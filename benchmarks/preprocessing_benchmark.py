@@ -0,0 +1,94 @@
+"""
+Micro-benchmark of the preprocessing engine against the original
+per-column LabelEncoder implementation of DataProcessor.preprocess_data.
+
+    python -m benchmarks.preprocessing_benchmark [--scale K] [--repeat N]
+
+Reports the best of N runs for fitting + encoding the training split
+(legacy vs FeatureTransformer.fit_encode) and for transforming a single
+row (DataFrame and dict record) and a 1000-row batch the way the serving
+path does.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder
+
+from src.feature_transformer import FeatureTransformer
+from utils.common_functions import read_yaml, load_data, schema_from_config
+from config.paths_config import *
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="Stack the training data this many times")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (best is reported)")
+    return parser.parse_args()
+
+
+def legacy_preprocess(df, config):
+    """
+    The preprocessing code DataProcessor used before FeatureTransformer.
+    """
+    df.drop(columns=['Unnamed: 0', 'Booking_ID'], inplace=True, errors='ignore')
+    df.drop_duplicates(inplace=True)
+
+    cat_cols = config["data_processing"]["categorical_columns"]
+    num_cols = config["data_processing"]["numerical_columns"]
+
+    label_encoder = LabelEncoder()
+    mappings = {}
+    for column in cat_cols:
+        df[column] = label_encoder.fit_transform(df[column])
+        mappings[column] = {label: code for label, code in
+                            zip(label_encoder.classes_, label_encoder.transform(label_encoder.classes_))}
+
+    skew_threshold = config["data_processing"]["skewness_threshold"]
+    skewness = df[num_cols].apply(lambda x: x.skew())
+    for column in skewness[skewness > skew_threshold].index:
+        df[column] = np.log1p(df[column])
+    return df
+
+
+def engine_preprocess(df, config):
+    transformer = FeatureTransformer.from_config(config)
+    return transformer.fit_encode(df), transformer
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    config = read_yaml(CONFIG_PATH)
+    df = load_data(TRAIN_FILE_PATH, schema_from_config(config))
+    if args.scale > 1:
+        # Shift prices per copy so the stacked rows are not just duplicates
+        copies = [df.assign(avg_price_per_room=df["avg_price_per_room"] + copy * 0.01) for copy in range(args.scale)]
+        df = pd.concat(copies, ignore_index=True)
+    raw_rows = pd.read_csv(RAW_FILE_PATH, nrows=1000)
+    print(f"{len(df)} training rows")
+
+    legacy = best_time(lambda: legacy_preprocess(df.copy(), config), args.repeat)
+    engine = best_time(lambda: engine_preprocess(df, config), args.repeat)
+    print(f"{'fit + encode, legacy':<32}{legacy * 1000:>10.1f} ms")
+    print(f"{'fit + encode, engine':<32}{engine * 1000:>10.1f} ms  ({legacy / engine:.1f}x)")
+
+    _, transformer = engine_preprocess(df, config)
+    features = [column for column in transformer.categorical_columns + transformer.numerical_columns
+                if column != "booking_status"]
+    one_row = raw_rows.iloc[:1]
+    one_record = one_row[features].to_dict("records")
+    single = best_time(lambda: transformer.transform(one_row, features), args.repeat * 100)
+    record = best_time(lambda: transformer.transform_records(one_record, features), args.repeat * 100)
+    batch = best_time(lambda: transformer.transform(raw_rows, features), args.repeat)
+    print(f"{'transform 1 row (DataFrame)':<32}{single * 1e6:>10.1f} us")
+    print(f"{'transform 1 row (record)':<32}{record * 1e6:>10.1f} us")
+    print(f"{'transform 1000 rows':<32}{batch * 1000:>10.2f} ms")
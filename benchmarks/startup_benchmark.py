@@ -0,0 +1,89 @@
+"""
+Cold start benchmark for the serving entry points.
+
+    python -m benchmarks.startup_benchmark [--targets application app inference_server]
+                                           [--engines sklearn compiled] [--repeat 3] [--importtime]
+
+Every run is a fresh interpreter, so nothing is shared between runs except
+the OS page cache. For each target module and serving engine it reports the
+time to import the module (which loads the model) and the time until the
+first prediction has been returned, both measured inside the process, plus
+the wall time of the whole process start. --importtime lists the slowest
+imports of each target, from `python -X importtime`.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+RESERVATION = {
+    "lead_time": 45, "no_of_special_requests": 1, "avg_price_per_room": 110.5, "arrival_month": 7,
+    "arrival_date": 14, "market_segment_type": "Online", "no_of_week_nights": 2,
+    "no_of_weekend_nights": 1, "type_of_meal_plan": "Meal Plan 1", "room_type_reserved": "Room_Type 1"
+}
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+import {target} as target
+imported = time.perf_counter()
+service = target.prediction_service
+service.predict_one(service.matrix_from_records([{reservation}]))
+predicted = time.perf_counter()
+print("STARTUP " + json.dumps({{"import_s": imported - started, "first_prediction_s": predicted - started}}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", nargs="*", default=["application", "app", "inference_server"])
+    parser.add_argument("--engines", nargs="*", default=["sklearn", "compiled"], choices=["sklearn", "compiled"])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case (median is reported)")
+    parser.add_argument("--importtime", action="store_true", help="Show the slowest imports of each target")
+    return parser.parse_args()
+
+
+def run_once(target, engine):
+    env = dict(os.environ, SERVING_ENGINE=engine, PYTHONPATH=os.getcwd())
+    code = PROBE.format(target=target, reservation=repr(RESERVATION))
+    started = os.times().elapsed
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    wall = os.times().elapsed - started
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return dict(json.loads(line[len("STARTUP "):]), wall_s=wall)
+    raise RuntimeError(f"{target} failed to start:\n{result.stderr[-2000:]}")
+
+
+def slowest_imports(target, engine, top=12):
+    env = dict(os.environ, SERVING_ENGINE=engine, PYTHONPATH=os.getcwd())
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"], env=env,
+                            capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Only top-level packages, so the list is not flooded by submodules
+            if "." not in name.strip():
+                rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"{'target':<18}{'engine':<10}{'import s':>10}{'first pred s':>14}{'process s':>11}")
+    for target in args.targets:
+        for engine in args.engines:
+            runs = [run_once(target, engine) for _ in range(args.repeat)]
+            median = {key: float(np.median([run[key] for run in runs])) for key in runs[0]}
+            print(f"{target:<18}{engine:<10}{median['import_s']:>10.2f}{median['first_prediction_s']:>14.2f}"
+                  f"{median['wall_s']:>11.2f}")
+
+    if args.importtime:
+        for target in args.targets:
+            for engine in args.engines:
+                print(f"\nSlowest imports for {target} ({engine}):")
+                for seconds, name in slowest_imports(target, engine):
+                    print(f"  {seconds:>6.2f}s  {name}")
@@ -0,0 +1,382 @@
+"""
+Offline benchmark suite for the pipeline stages and the serving paths.
+
+    python -m benchmarks.suite [--sizes 10k 100k 1m 10m] [--cases ...] [--repeat 3]
+                               [--baseline benchmarks/baselines/baseline.json] [--save-baseline]
+                               [--threshold 0.15] [--memory-threshold 0.15]
+
+Input is synthetic: a SyntheticReservations profile is fitted once on
+artifacts/raw/raw.csv and rows are generated with a fixed seed for every
+requested size, so runs are comparable across machines and commits and
+nothing is downloaded. Generated files are kept in artifacts/benchmarks.
+
+Every case runs in a fresh interpreter: data loading and model loading are
+done first and not timed, then the case runs --repeat times. For each case
+and size the suite reports the median wall time, rows per second and the
+peak RSS of the process (plus how much of it the timed runs added).
+Serving cases use the trained model in artifacts/models.
+
+Results are written as JSON. With --save-baseline they become the baseline;
+otherwise they are compared with it and any case that got slower or bigger
+than the thresholds is flagged, and the exit status is 1.
+
+No baseline is committed, since timings only compare on the same machine.
+Record one on the reference machine from the commit to compare against,
+then rerun the suite on the change:
+
+    git checkout main && python -m benchmarks.suite --save-baseline
+    git checkout my-branch && python -m benchmarks.suite
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from config.paths_config import *
+
+SIZES = {"k": 1000, "m": 1000000}
+GENERATION_CHUNK_ROWS = 1000000
+SEED = 42
+
+# name: (rows processed at most, so per-request cases stay short at 10M;
+#        None means the full size)
+CASES = {
+    "load_data": None,
+    "preprocess": None,
+    "balance": None,
+    "feature_selection": None,
+    "train": 1000000,
+    "predict_one_sklearn": 20000,
+    "predict_one_compiled": 20000,
+    "predict_batch_sklearn": 200000,
+    "predict_batch_compiled": 200000,
+    "flask_predict_batch": 100000,
+    "flask_index": 5000,
+    "dash_predict": 5000,
+    "batch_scoring": None
+}
+
+
+def parse_size(text):
+    text = text.lower()
+    if text[-1] in SIZES:
+        return int(float(text[:-1]) * SIZES[text[-1]])
+    return int(text)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", default=["10k", "100k"], help="Rows, e.g. 10k 100k 1m 10m")
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case (median is reported)")
+    parser.add_argument("--output", default=None, help="Results JSON (default artifacts/benchmarks/results_<time>.json)")
+    parser.add_argument("--baseline", default=str(BENCHMARK_BASELINE_PATH))
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed wall time increase (0.15 = 15%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.15, help="Allowed peak RSS increase")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Ignore wall time changes of cases faster than this in the baseline")
+    parser.add_argument("--child", nargs=3, metavar=("CASE", "DATA", "ROWS"), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+######################## Synthetic data ########################
+
+def synthetic_data(rows):
+    """
+    Path of a CSV with `rows` synthetic reservations, generated on first use.
+    """
+    from src.synthetic_data import SyntheticReservations, PROFILE_VERSION
+
+    # Files from an older profile layout are generated again
+    path = BENCHMARK_DATA_DIR / f"synthetic_{rows}_seed{SEED}_v{PROFILE_VERSION}.csv"
+    if not path.exists():
+        print(f"Generating {rows} synthetic rows into {path}")
+        generator = SyntheticReservations.from_raw(_config(), profile_path=BENCHMARK_DATA_DIR / "synthetic_profile.json")
+        temp_path = path.with_suffix(".tmp.csv")
+        generator.write(temp_path, rows, GENERATION_CHUNK_ROWS, seed=SEED)
+        os.replace(temp_path, path)
+    return path
+
+
+######################## Cases ########################
+# Each setup function does the untimed work and returns the timed function,
+# which returns the number of rows it processed.
+
+def _config():
+    from utils.common_functions import read_yaml
+    return read_yaml(CONFIG_PATH)
+
+
+def _load(data_path, rows):
+    from utils.common_functions import load_data, schema_from_config
+    return load_data(data_path, schema_from_config(_config())).iloc[:rows]
+
+
+def _processor(data_path):
+    from src.data_preprocessing import DataProcessor
+    processor = DataProcessor(data_path, data_path, tempfile.mkdtemp(), CONFIG_PATH)
+    # Rankings are cached by data hash; a benchmark has to compute them
+    processor.selector.cache_dir = None
+    return processor
+
+
+def _encoded(processor, data_path, rows):
+    return processor.transformer.fit_encode(_load(data_path, rows))
+
+
+def setup_load_data(data_path, rows):
+    from utils.common_functions import load_data, schema_from_config
+    schema = schema_from_config(_config())
+    return lambda: len(load_data(data_path, schema))
+
+
+def setup_preprocess(data_path, rows):
+    processor = _processor(data_path)
+    df = _load(data_path, rows)
+
+    def run():
+        processor.transformer.fit_encode(df)
+        return len(df)
+    return run
+
+
+def setup_balance(data_path, rows):
+    processor = _processor(data_path)
+    df = _encoded(processor, data_path, rows)
+
+    def run():
+        processor.balance_data(df)
+        return len(df)
+    return run
+
+
+def setup_feature_selection(data_path, rows):
+    processor = _processor(data_path)
+    df = _encoded(processor, data_path, rows)
+    return lambda: len(processor.feature_selection(df))
+
+
+def setup_train(data_path, rows):
+    from src.model_training import ModelTraining
+    processor = _processor(data_path)
+    df = processor.feature_selection(_encoded(processor, data_path, rows))
+    X, y = df.drop(columns=["booking_status"]), df["booking_status"]
+    trainer = ModelTraining(data_path, data_path, os.path.join(tempfile.mkdtemp(), "model.pkl"))
+
+    def run():
+        trainer.train_lgbm(X, y)
+        return len(X)
+    return run
+
+
+def _records(service, data_path, rows):
+    import pandas as pd
+    frame = pd.read_csv(data_path, nrows=rows, usecols=service.feature_names)
+    return frame.to_dict("records")
+
+
+def _setup_predict_one(engine):
+    def setup(data_path, rows):
+        from src.prediction_service import PredictionService
+        service = PredictionService(MODEL_OUTPUT, PREPROCESSOR_OUTPUT, engine=engine)
+        records = _records(service, data_path, rows)
+        # JIT kernels are compiled on first use; that belongs to startup
+        service.predict(service.matrix_from_records(records[:2]))
+
+        def run():
+            for record in records:
+                service.predict_one(service.matrix_from_records([record]))
+            return len(records)
+        return run
+    return setup
+
+
+def _setup_predict_batch(engine, batch_rows=1000):
+    def setup(data_path, rows):
+        from src.prediction_service import PredictionService
+        service = PredictionService(MODEL_OUTPUT, PREPROCESSOR_OUTPUT, engine=engine)
+        records = _records(service, data_path, rows)
+        batches = [records[start:start + batch_rows] for start in range(0, len(records), batch_rows)]
+        service.predict(service.matrix_from_records(batches[0]))
+
+        def run():
+            for batch in batches:
+                service.predict(service.matrix_from_records(batch))
+            return len(records)
+        return run
+    return setup
+
+
+def setup_flask_predict_batch(data_path, rows, batch_rows=100):
+    import application
+    client = application.app.test_client()
+    records = _records(application.prediction_service, data_path, rows)
+    bodies = [json.dumps(records[start:start + batch_rows]) for start in range(0, len(records), batch_rows)]
+
+    def run():
+        for body in bodies:
+            response = client.post("/predict/batch", data=body, content_type="application/json")
+            assert response.status_code == 200, response.data[:200]
+        return len(records)
+    return run
+
+
+def setup_flask_index(data_path, rows):
+    import application
+    client = application.app.test_client()
+    forms = [dict(record, no_of_special_request=record["no_of_special_requests"])
+             for record in _records(application.prediction_service, data_path, rows)]
+
+    def run():
+        for form in forms:
+            response = client.post("/", data=form)
+            assert response.status_code == 200, response.data[:200]
+        return len(forms)
+    return run
+
+
+def setup_dash_predict(data_path, rows):
+    import app
+    records = _records(app.prediction_service, data_path, rows)
+    order = ["lead_time", "no_of_special_requests", "avg_price_per_room", "arrival_month", "arrival_date",
+             "market_segment_type", "no_of_week_nights", "no_of_weekend_nights", "room_type_reserved",
+             "type_of_meal_plan"]
+
+    def run():
+        for record in records:
+            app.predict_reservation(1, *(record[name] for name in order))
+        return len(records)
+    return run
+
+
+def setup_batch_scoring(data_path, rows):
+    from src.batch_scoring import BatchScorer
+    scorer = BatchScorer(MODEL_OUTPUT, PREPROCESSOR_OUTPUT, TRAIN_FILE_PATH, _config())
+    scorer.prepare_transformer()
+    output_path = os.path.join(tempfile.mkdtemp(), "scored.csv")
+    return lambda: scorer.score_file(data_path, output_path)
+
+
+SETUPS = {
+    "load_data": setup_load_data,
+    "preprocess": setup_preprocess,
+    "balance": setup_balance,
+    "feature_selection": setup_feature_selection,
+    "train": setup_train,
+    "predict_one_sklearn": _setup_predict_one("sklearn"),
+    "predict_one_compiled": _setup_predict_one("compiled"),
+    "predict_batch_sklearn": _setup_predict_batch("sklearn"),
+    "predict_batch_compiled": _setup_predict_batch("compiled"),
+    "flask_predict_batch": setup_flask_predict_batch,
+    "flask_index": setup_flask_index,
+    "dash_predict": setup_dash_predict,
+    "batch_scoring": setup_batch_scoring
+}
+
+
+def run_child(case, data_path, rows, repeat):
+    from utils.common_functions import _peak_rss_mb
+
+    run = SETUPS[case](data_path, rows)
+    setup_peak = _peak_rss_mb()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        processed = run()
+        timings.append(time.perf_counter() - started)
+    peak = _peak_rss_mb()
+    wall = float(np.median(timings))
+    print("RESULT " + json.dumps({"rows": int(processed), "wall_s": wall, "min_wall_s": min(timings),
+                                  "throughput_rows_s": processed / wall, "peak_rss_mb": peak,
+                                  "run_rss_mb": peak - setup_peak}))
+
+
+######################## Runner ########################
+
+def run_case(case, data_path, rows, repeat):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(PROJECT_ROOT), os.environ.get("PYTHONPATH")])))
+    command = [sys.executable, "-m", "benchmarks.suite", "--repeat", str(repeat),
+               "--child", case, str(data_path), str(rows)]
+    result = subprocess.run(command, env=env, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    for line in result.stdout.splitlines():
+        if line.startswith("RESULT "):
+            return json.loads(line[len("RESULT "):])
+    raise RuntimeError(f"Case {case} failed at {rows} rows:\n{result.stderr[-3000:]}")
+
+
+def environment():
+    import lightgbm
+    import pandas as pd
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+            "numpy": np.__version__, "pandas": pd.__version__, "lightgbm": lightgbm.__version__,
+            "serving_engine": os.environ.get("SERVING_ENGINE", "config")}
+
+
+def compare(results, baseline, threshold, memory_threshold, min_seconds):
+    """
+    Returns the cases that regressed against the baseline, with the reason.
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if base["wall_s"] >= min_seconds and result["wall_s"] > base["wall_s"] * (1 + threshold):
+            regressions.append((key, f"wall {base['wall_s']:.3f}s -> {result['wall_s']:.3f}s "
+                                     f"({result['wall_s'] / base['wall_s'] - 1:+.0%})"))
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_threshold):
+            regressions.append((key, f"peak RSS {base['peak_rss_mb']:.0f} MB -> {result['peak_rss_mb']:.0f} MB "
+                                     f"({result['peak_rss_mb'] / base['peak_rss_mb'] - 1:+.0%})"))
+    return regressions
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.child:
+        case, data_path, rows = args.child
+        run_child(case, data_path, int(rows), args.repeat)
+        sys.exit(0)
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    sizes = sorted(parse_size(size) for size in args.sizes)
+    data_paths = {size: synthetic_data(size) for size in sizes}
+
+    results = {}
+    print(f"{'case':<24}{'rows':>10}{'wall s':>10}{'rows/s':>14}{'peak MB':>10}{'run MB':>9}{'vs base':>9}")
+    for size, data_path in data_paths.items():
+        for case in args.cases:
+            rows = min(size, CASES[case] or size)
+            key = f"{case}@{size}"
+            result = results[key] = dict(run_case(case, data_path, rows, args.repeat), case=case, size=size)
+            change = f"{result['wall_s'] / baseline[key]['wall_s'] - 1:+.0%}" if key in baseline else "-"
+            print(f"{case:<24}{result['rows']:>10}{result['wall_s']:>10.3f}{result['throughput_rows_s']:>14,.0f}"
+                  f"{result['peak_rss_mb']:>10.0f}{result['run_rss_mb']:>9.0f}{change:>9}")
+
+    report = {"created": time.time(), "seed": SEED, "repeat": args.repeat, "environment": environment(),
+              "results": results}
+    from utils.common_functions import write_json
+    output = args.output or BENCHMARK_DATA_DIR / f"results_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    write_json(output, report)
+    print(f"\nResults written to {output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"Baseline saved to {args.baseline}")
+    elif not baseline:
+        print(f"No baseline at {args.baseline}, record one with --save-baseline")
+    else:
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold, args.min_seconds)
+        for key, reason in regressions:
+            print(f"REGRESSION {key}: {reason}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} wall time / {args.memory_threshold:.0%} memory")
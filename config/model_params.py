@@ -1,4 +1,4 @@
-from scipy.stats import randint, uniform
+from scipy.stats import randint, uniform, loguniform
 
 LIGHTGBM_PARAMS = {
     'n_estimators': randint(100,500),
@@ -16,4 +16,50 @@ RANDOM_SEARCH_PARAMS = {
     'verbose': 1,
     'random_state' : 42,
     'scoring' : 'accuracy'
-}
\ No newline at end of file
+}
+
+# random: RandomizedSearchCV over LIGHTGBM_PARAMS
+# halving: successive halving with early stopping over LIGHTGBM_HALVING_PARAMS
+SEARCH_MODE = 'halving'
+
+# n_estimators is the resource being halved, so it is not sampled here
+LIGHTGBM_HALVING_PARAMS = {
+    'max_depth' : randint(3,50),
+    'learning_rate' : loguniform(0.01,0.3),
+    'num_leaves': randint(15,128),
+    'min_child_samples': randint(5,100),
+    'subsample': uniform(0.5,0.5),
+    'subsample_freq': [0, 1],
+    'colsample_bytree': uniform(0.5,0.5),
+    'reg_alpha': loguniform(1e-3,10),
+    'reg_lambda': loguniform(1e-3,10),
+    'boosting_type' : ['gbdt','dart']
+}
+
+HALVING_SEARCH_PARAMS = {
+    'n_candidates' : 16,
+    'factor': 3,
+    'min_resources': 30,
+    'max_resources': 500,
+    'early_stopping_rounds': 30,
+    'validation_fraction': 0.2,
+    'n_jobs': -1,
+    'random_state' : 42,
+    'scoring' : 'accuracy'
+}
+
+# distributed_training.enabled: the search modes do not run across a cluster,
+# so the workers fit this one configuration
+DISTRIBUTED_LIGHTGBM_PARAMS = {
+    'n_estimators': 300,
+    'learning_rate': 0.05,
+    'num_leaves': 63,
+    'max_depth': -1,
+    'min_child_samples': 20,
+    'subsample': 0.8,
+    'subsample_freq': 1,
+    'colsample_bytree': 0.8,
+    'random_state': 42,
+    'deterministic': True,
+    'verbose': -1
+}
@@ -3,12 +3,26 @@ from pathlib import Path
 
 
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+########################## Storage ##########################
+
+# Format of the artifacts handed between pipeline stages: parquet | feather | csv
+ARTIFACT_FORMAT = os.environ.get("ARTIFACT_FORMAT", "parquet")
+ARTIFACT_SUFFIX = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}[ARTIFACT_FORMAT]
+
 ########################## Data Ingestion ##########################
 
 RAW_DIR = PROJECT_ROOT / "artifacts" / "raw"
 RAW_FILE_PATH = RAW_DIR / "raw.csv"
-TRAIN_FILE_PATH = RAW_DIR / "train.csv"
-TEST_FILE_PATH = RAW_DIR / "test.csv"
+TRAIN_FILE_PATH = RAW_DIR / f"train{ARTIFACT_SUFFIX}"
+TEST_FILE_PATH = RAW_DIR / f"test{ARTIFACT_SUFFIX}"
+EDA_CACHE_PATH = PROJECT_ROOT / "artifacts" / "eda" / "eda_aggregates.json"
+
+# Incremental ingestion: watermark of the source bytes already split, and the
+# rows added since the last processing run
+INGESTION_STATE_PATH = RAW_DIR / "ingestion_state.json"
+TRAIN_DELTA_PATH = RAW_DIR / f"train_delta{ARTIFACT_SUFFIX}"
+TEST_DELTA_PATH = RAW_DIR / f"test_delta{ARTIFACT_SUFFIX}"
 
 
 
@@ -19,9 +33,50 @@ CONFIG_PATH = PROJECT_ROOT / "config" / "config.yaml"
 ############################## DATA PROCESSING ######################
 
 PROCESSED_DIR = PROJECT_ROOT / "artifacts" / "processed"
-PROCESSED_TRAIN_DATA_PATH = PROCESSED_DIR / "processed_train.csv"
-PROCESSED_TEST_DATA_PATH = PROCESSED_DIR / "processed_test.csv"
+PROCESSED_TRAIN_DATA_PATH = PROCESSED_DIR / f"processed_train{ARTIFACT_SUFFIX}"
+PROCESSED_TEST_DATA_PATH = PROCESSED_DIR / f"processed_test{ARTIFACT_SUFFIX}"
+
+# Encoded (pre-balancing) splits kept so incremental runs only encode new rows
+ENCODED_TRAIN_DATA_PATH = PROCESSED_DIR / f"encoded_train{ARTIFACT_SUFFIX}"
+ENCODED_TEST_DATA_PATH = PROCESSED_DIR / f"encoded_test{ARTIFACT_SUFFIX}"
+PROCESSING_STATE_PATH = PROCESSED_DIR / "processing_state.json"
+# One training shard per distributed training worker, plus cluster.json
+SHARD_DIR = PROCESSED_DIR / "shards"
+FEATURE_SELECTION_CACHE_DIR = PROJECT_ROOT / "artifacts" / "cache" / "feature_selection"
 
 ############################# Model training #################################
 
-MODEL_OUTPUT = PROJECT_ROOT / "artifacts" / "models" / "lgbm_model.pkl"
\ No newline at end of file
+MODEL_OUTPUT = PROJECT_ROOT / "artifacts" / "models" / "lgbm_model.pkl"
+PREPROCESSOR_OUTPUT = PROJECT_ROOT / "artifacts" / "models" / "preprocessor.json"
+COMPILED_MODEL_OUTPUT = PROJECT_ROOT / "artifacts" / "models" / "lgbm_model_compiled.npz"
+# Test-set evaluation report; serving reads its operating threshold
+EVALUATION_OUTPUT = PROJECT_ROOT / "artifacts" / "models" / "evaluation.json"
+
+# Versioned model store: one directory per trained model plus index.json
+MODEL_REGISTRY_DIR = PROJECT_ROOT / "artifacts" / "models" / "registry"
+
+############################# Batch scoring #################################
+
+PREDICTIONS_DIR = PROJECT_ROOT / "artifacts" / "predictions"
+SCORED_OUTPUT_PATH = PREDICTIONS_DIR / "scored.csv"
+
+############################# Serving #################################
+
+PREDICTION_CACHE_PATH = PROJECT_ROOT / "artifacts" / "cache" / "predictions.sqlite"
+
+############################# Training pipeline #################################
+
+STAGE_CACHE_DIR = PROJECT_ROOT / "artifacts" / "cache" / "stages"
+
+############################# Synthetic data #################################
+
+# Profile fitted on raw.csv and default output of python -m src.synthetic_data
+SYNTHETIC_DIR = PROJECT_ROOT / "artifacts" / "synthetic"
+SYNTHETIC_PROFILE_PATH = SYNTHETIC_DIR / "profile.json"
+SYNTHETIC_DATA_PATH = SYNTHETIC_DIR / "reservations.csv"
+
+############################# Benchmarks #################################
+
+# Synthetic input data and results of benchmarks/suite.py
+BENCHMARK_DATA_DIR = PROJECT_ROOT / "artifacts" / "benchmarks"
+BENCHMARK_BASELINE_PATH = PROJECT_ROOT / "benchmarks" / "baselines" / "baseline.json"
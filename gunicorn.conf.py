@@ -0,0 +1,49 @@
+"""
+Production server settings for both web apps:
+
+    gunicorn -c gunicorn.conf.py application:app    # Flask API
+    gunicorn -c gunicorn.conf.py app:server         # Dash dashboard
+
+The app (and with it the model) is imported once in the master before the
+workers are forked, so the booster and the preprocessing artifact are
+shared copy-on-write instead of being loaded by every worker.
+
+Reloads: `kill -HUP <master>` starts fresh workers with the current config
+and lets the old ones finish their requests (graceful_timeout). New model
+versions do not need either: every worker watches the model registry and
+swaps the model in place (see src/model_reloader.py).
+"""
+import gc
+import multiprocessing
+import os
+
+from config.paths_config import CONFIG_PATH
+from utils.common_functions import read_yaml
+
+wsgi_config = read_yaml(CONFIG_PATH)["serving"]["wsgi"]
+
+bind = f"0.0.0.0:{os.environ['PORT']}" if "PORT" in os.environ else wsgi_config["bind"]
+workers = int(os.environ.get("WEB_CONCURRENCY", wsgi_config["workers"])) or multiprocessing.cpu_count()
+threads = int(os.environ.get("GUNICORN_THREADS", wsgi_config["threads"]))
+worker_class = "gthread"
+timeout = wsgi_config["timeout"]
+graceful_timeout = wsgi_config["graceful_timeout"]
+keepalive = wsgi_config["keepalive"]
+max_requests = wsgi_config["max_requests"]
+max_requests_jitter = wsgi_config["max_requests_jitter"]
+
+preload_app = True
+accesslog = "-"
+
+# Each worker already runs `threads` requests at once; letting every
+# prediction also spawn one OpenMP thread per core would oversubscribe
+os.environ.setdefault("OMP_NUM_THREADS", str(wsgi_config["lightgbm_threads"]))
+
+
+def when_ready(server):
+    # Objects created while preloading are moved out of the collector's
+    # reach, so collections in the workers do not write to (and copy) the
+    # pages they share with the master
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Model preloaded, forking {workers} workers x {threads} threads")
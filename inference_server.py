@@ -0,0 +1,194 @@
+"""
+Async prediction API with request micro-batching:
+
+    python inference_server.py
+
+Serves the same POST /predict/batch contract as application.py, but requests
+that arrive together are stacked and scored in one booster call by
+MicroBatcher. Single reservations still go through the prediction cache
+first. When the queue is full the server answers 503 with Retry-After
+instead of queueing more work. GET /metrics serves request, stage and
+batcher metrics in the Prometheus text format; GET /stats has the batcher
+and per-model-version counters as JSON.
+"""
+import asyncio
+import os
+from aiohttp import web
+from config.paths_config import MODEL_OUTPUT, PREPROCESSOR_OUTPUT, COMPILED_MODEL_OUTPUT, EVALUATION_OUTPUT, PREDICTION_CACHE_PATH, CONFIG_PATH
+from src.logger import get_logger
+from src.custom_exception import InvalidRowsError
+from src.metrics import CONTENT_TYPE, ServingMetrics, watch_service
+from src.profiler import SamplingProfiler
+from src.micro_batching import MicroBatcher, Overloaded
+from src.model_registry import ModelRegistry
+from src.model_reloader import ReloadingPredictionService
+from src.prediction_cache import build_prediction_cache, normalize_key
+from utils.common_functions import read_yaml
+
+logger = get_logger(__name__)
+
+config = read_yaml(CONFIG_PATH)
+serving_config = config["serving"]
+batching_config = serving_config["micro_batching"]
+BATCH_MAX_ROWS = serving_config["batch_max_rows"]
+instrumentation_config = serving_config["instrumentation"]
+PROFILER_ENDPOINT = os.environ.get("PROFILER_ENDPOINT", str(instrumentation_config["profiler_endpoint"])).lower() in ("1", "true")
+BATCHER = web.AppKey("batcher", MicroBatcher)
+
+prediction_service = ReloadingPredictionService(ModelRegistry.from_config(config), MODEL_OUTPUT, PREPROCESSOR_OUTPUT,
+                                                engine=os.environ.get("SERVING_ENGINE", serving_config["engine"]),
+                                                fallback_compiled_path=COMPILED_MODEL_OUTPUT,
+                                                fallback_evaluation_path=EVALUATION_OUTPUT,
+                                                cache=build_prediction_cache(serving_config["cache"], MODEL_OUTPUT,
+                                                                             PREDICTION_CACHE_PATH),
+                                                poll_seconds=config["model_registry"]["poll_seconds"])
+
+metrics = ServingMetrics()
+watch_service(metrics, prediction_service)
+profiler = SamplingProfiler(instrumentation_config["profiler_interval_ms"])
+
+
+def predictions_response(labels, probabilities):
+    return web.json_response({
+        "count": len(labels),
+        "predictions": [
+            {"prediction": int(label), "probability": round(float(probability), 6)}
+            for label, probability in zip(labels, probabilities)
+        ]
+    })
+
+
+async def predict_batch(request):
+    batcher = request.app[BATCHER]
+    timer = metrics.timer("predict_batch")
+    # One model version encodes and scores the whole request, even mid-reload
+    active = prediction_service.current()
+    service = active[1]
+    try:
+        records = await request.json()
+        if isinstance(records, dict):
+            records = [records]
+        timer.stage("parse")
+        if isinstance(records, list) and len(records) > service.RECORDS_FAST_PATH_ROWS:
+            # Encoding a large batch goes through pandas; keep it off the event loop
+            matrix = await asyncio.get_running_loop().run_in_executor(None, service.matrix_from_records, records)
+        else:
+            matrix = service.matrix_from_records(records)
+        timer.stage("features")
+    except InvalidRowsError as e:
+        timer.finish(400)
+        return web.json_response(dict(e.errors.summary(), error=str(e)), status=400)
+    except (ValueError, TypeError, KeyError) as e:
+        timer.finish(400)
+        return web.json_response({"error": str(e)}, status=400)
+
+    if matrix.shape[0] > BATCH_MAX_ROWS:
+        timer.finish(413)
+        return web.json_response({"error": f"Batch has {matrix.shape[0]} rows, limit is {BATCH_MAX_ROWS}"},
+                                 status=413)
+
+    cache = prediction_service.cache
+    key = normalize_key(matrix[0]) if cache is not None and matrix.shape[0] == 1 else None
+    if key is not None:
+        cached = cache.get(key, service.fingerprint)
+        if cached is not None:
+            timer.stage("predict")
+            response = predictions_response([cached[0]], [cached[1]])
+            timer.stage("render")
+            timer.finish(rows=1)
+            return response
+
+    try:
+        labels, probabilities = await batcher.submit(matrix, active)
+    except Overloaded as e:
+        timer.finish(503)
+        return web.json_response({"error": f"Server overloaded, {e}"}, status=503, headers={"Retry-After": "1"})
+    except Exception:
+        timer.finish(500)
+        raise
+    # Includes the time spent waiting in the batcher queue
+    timer.stage("predict")
+
+    if key is not None:
+        cache.put(key, (int(labels[0]), float(probabilities[0])), service.fingerprint)
+    response = predictions_response(labels, probabilities)
+    timer.stage("render")
+    timer.finish(rows=matrix.shape[0])
+    return response
+
+
+async def prometheus_metrics(request):
+    return web.Response(body=metrics.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def stats(request):
+    return web.json_response(dict(request.app[BATCHER].stats(), model=prediction_service.stats()))
+
+
+async def sampling_profiler(request):
+    """
+    POST {"action": "start", "interval_ms": 5, "seconds": 60} or
+    {"action": "stop"}; GET returns the samples as collapsed stacks.
+    """
+    if request.method == "POST":
+        payload = await request.json() if request.can_read_body else {}
+        action = payload.get("action", "start")
+        if action == "start":
+            profiler.reset()
+            profiler.start(payload.get("interval_ms"), payload.get("seconds"))
+        elif action == "stop":
+            # join() waits up to one sampling interval; keep it off the event loop
+            await request.loop.run_in_executor(None, profiler.stop)
+        else:
+            return web.json_response({"error": f"Unknown action {action}"}, status=400)
+        return web.json_response(profiler.stats())
+    return web.Response(text=profiler.collapsed())
+
+
+async def cache_stats(request):
+    if prediction_service.cache is None:
+        return web.json_response({"enabled": False})
+    return web.json_response(dict(prediction_service.cache.stats(), enabled=True))
+
+
+async def start_batcher(app):
+    app[BATCHER] = MicroBatcher(prediction_service.predict,
+                                max_batch_rows=batching_config["max_batch_rows"],
+                                max_wait_ms=batching_config["max_wait_ms"],
+                                max_queue_rows=batching_config["max_queue_rows"],
+                                predict_threads=batching_config["predict_threads"])
+    await app[BATCHER].start()
+
+    batcher = app[BATCHER]
+    metrics.add_gauge("batcher_queue_rows", "Rows waiting in the micro-batching queue.",
+                      lambda: batcher.stats()["queue_rows"])
+    metrics.add_gauge("batcher_rejected", "Requests rejected with 503 because the queue was full.",
+                      lambda: batcher.stats()["rejected"])
+    metrics.add_gauge("batcher_batches", "Batches scored by the micro-batcher.",
+                      lambda: batcher.stats()["batches"])
+    metrics.add_gauge("batcher_mean_batch_rows", "Mean rows per scored batch.",
+                      lambda: batcher.stats()["mean_batch_rows"])
+    logger.info(f"Micro-batching up to {batching_config['max_batch_rows']} rows "
+                f"or {batching_config['max_wait_ms']} ms")
+
+
+async def stop_batcher(app):
+    await app[BATCHER].stop()
+
+
+def create_app():
+    app = web.Application(client_max_size=serving_config["batch_max_upload_mb"] * 1024 * 1024)
+    app.router.add_post("/predict/batch", predict_batch)
+    app.router.add_get("/metrics", prometheus_metrics)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/cache/stats", cache_stats)
+    if PROFILER_ENDPOINT:
+        app.router.add_route("*", "/debug/profiler", sampling_profiler)
+    app.on_startup.append(start_batcher)
+    app.on_cleanup.append(stop_batcher)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host=batching_config["host"],
+                port=int(os.environ.get("PORT", batching_config["port"])), access_log=None)
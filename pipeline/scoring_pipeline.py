@@ -0,0 +1,23 @@
+import argparse
+
+from src.batch_scoring import BatchScorer
+from utils.common_functions import read_yaml
+from config.paths_config import *
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Score a reservation file with the trained model")
+    parser.add_argument("input", help="CSV file with raw reservation rows")
+    parser.add_argument("--output", default=str(SCORED_OUTPUT_PATH), help="Where to write the predictions")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Rows per chunk")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (1 scores in-process)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    scorer = BatchScorer(MODEL_OUTPUT, PREPROCESSOR_OUTPUT, TRAIN_FILE_PATH, read_yaml(CONFIG_PATH),
+                         workers=args.workers, chunk_size=args.chunk_size, evaluation_path=EVALUATION_OUTPUT)
+    scorer.prepare_transformer()
+    scorer.score_file(args.input, args.output)
@@ -1,22 +1,85 @@
+import argparse
+import inspect
 
 from src.data_ingestion import DataIngestion
 from src.data_preprocessing import DataProcessor
+from src.feature_transformer import FeatureTransformer
 from src.model_training import ModelTraining
+from src.stage_cache import StageCache
+from src import (tree_predictor, model_evaluation, distributed_training, feature_selection, class_balancing,
+                 hyperparameter_search)
 from utils.common_functions import read_yaml
+from config import model_params
 from config.paths_config import *
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the training pipeline, skipping stages whose inputs are unchanged")
+    parser.add_argument("--force", nargs="*", default=None, choices=["ingestion", "processing", "training"],
+                        help="Stages to rerun even on a cache hit (no names: all of them)")
+    parser.add_argument("--no-cache", action="store_true", help="Run every stage without the stage cache")
+    return parser.parse_args()
+
+
+def code_files(*objects):
+    return [inspect.getsourcefile(obj) for obj in objects]
+
 
 if __name__ == "__main__":
+    args = parse_args()
+    config = read_yaml(CONFIG_PATH)
+
+    cache = StageCache.from_config(config, STAGE_CACHE_DIR)
+    if args.no_cache:
+        cache.enabled = False
+
+    def forced(stage):
+        return args.force is not None and (not args.force or stage in args.force)
+
     ### 1. Data Ingestion
-    data_ingestion = DataIngestion(read_yaml(CONFIG_PATH))
-    data_ingestion.run()
+    data_ingestion = DataIngestion(config)
+    ingestion_inputs = [config["data_ingestion"]["local_path"]] if data_ingestion.source == "local" else []
+    cache.run(
+        "ingestion", data_ingestion.run,
+        inputs=ingestion_inputs,
+        outputs=[RAW_FILE_PATH, TRAIN_FILE_PATH, TEST_FILE_PATH, INGESTION_STATE_PATH,
+                 TRAIN_DELTA_PATH, TEST_DELTA_PATH],
+        config={"data_ingestion": config["data_ingestion"], "storage": config["storage"],
+                "source": data_ingestion.source_fingerprint() if cache.enabled else None,
+                "format": ARTIFACT_FORMAT},
+        code_files=code_files(DataIngestion, read_yaml),
+        force=forced("ingestion")
+    )
 
     ### 2. Data Processing
     processor = DataProcessor(TRAIN_FILE_PATH,TEST_FILE_PATH,PROCESSED_DIR,CONFIG_PATH)
-    processor.process()
+    cache.run(
+        "processing", processor.process,
+        inputs=[TRAIN_FILE_PATH, TEST_FILE_PATH, TRAIN_DELTA_PATH, TEST_DELTA_PATH],
+        outputs=[PROCESSED_TRAIN_DATA_PATH, PROCESSED_TEST_DATA_PATH, PREPROCESSOR_OUTPUT,
+                 ENCODED_TRAIN_DATA_PATH, ENCODED_TEST_DATA_PATH, PROCESSING_STATE_PATH],
+        config={"data_processing": config["data_processing"], "storage": config["storage"],
+                "format": ARTIFACT_FORMAT},
+        code_files=code_files(DataProcessor, FeatureTransformer, feature_selection, class_balancing, read_yaml),
+        force=forced("processing")
+    )
 
     ### 3. Model Training
     trainer = ModelTraining(PROCESSED_TRAIN_DATA_PATH,PROCESSED_TEST_DATA_PATH,MODEL_OUTPUT)
-    trainer.run()
-    
\ No newline at end of file
+    # model_params.py is hashed as code, so editing a search space invalidates training only
+    cache.run(
+        "training", lambda: trainer.run(register=False),
+        inputs=[PROCESSED_TRAIN_DATA_PATH, PROCESSED_TEST_DATA_PATH],
+        outputs=[MODEL_OUTPUT, COMPILED_MODEL_OUTPUT, EVALUATION_OUTPUT],
+        config={"balancing": config["data_processing"].get("balancing"), "evaluation": config.get("evaluation"),
+                "distributed_training": config.get("distributed_training")},
+        code_files=code_files(ModelTraining, model_params, tree_predictor, model_evaluation,
+                              distributed_training, hyperparameter_search, class_balancing),
+        force=forced("training")
+    )
+
+    ### 4. Model Registration
+    # Outside the cache so a hit still activates the model; identical artifacts reuse their version
+    trainer.register_model()
+
+    print(cache.report())
@@ -0,0 +1,168 @@
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException, InvalidRowsError, RowErrors
+from src.feature_transformer import FeatureTransformer
+from src.prediction_service import PredictionService
+from utils.common_functions import load_data, schema_from_config, write_json
+
+logger = get_logger(__name__)
+
+# Per-process state for pool workers, populated by _init_worker
+_worker_service = None
+_worker_transformer = None
+
+
+def _init_worker(model_path, transformer, threads_per_worker, evaluation_path=None):
+    global _worker_service, _worker_transformer
+    _worker_service = PredictionService(model_path, evaluation_path=evaluation_path)
+    _worker_service.model.set_params(n_jobs=threads_per_worker)
+    _worker_transformer = transformer
+
+
+def _score_chunk(chunk, id_column):
+    """
+    Scores the valid rows of a chunk. Rows with invalid values are left out
+    of the result and returned as a RowErrors with chunk-relative positions.
+    """
+    errors = RowErrors()
+    matrix = _worker_transformer.transform(chunk, _worker_service.feature_names, errors)
+    valid = None
+    if errors.count:
+        valid = np.ones(len(chunk), dtype=bool)
+        valid[errors.rows()] = False
+        matrix = matrix[valid]
+
+    if len(matrix):
+        labels, probabilities = _worker_service.predict(matrix)
+    else:
+        labels, probabilities = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    result = pd.DataFrame({"prediction": labels, "probability": probabilities})
+    if id_column in chunk.columns:
+        ids = chunk[id_column].to_numpy()
+        result.insert(0, id_column, ids if valid is None else ids[valid])
+    return result, errors, len(chunk)
+
+
+class BatchScorer:
+    """
+    Scores reservation files of any size by streaming them in fixed-size
+    chunks. Only `max_in_flight` chunks are held in memory at once, so the
+    footprint does not grow with the input file.
+
+    Rows with values that cannot be scored are skipped and reported together
+    in <output>_errors.json; with `on_invalid_rows: fail` the whole file is
+    rejected instead, after every invalid row has been found.
+    """
+
+    def __init__(self, model_path, preprocessor_path, train_path, config, workers=None, chunk_size=None,
+                 evaluation_path=None):
+        self.model_path = model_path
+        self.evaluation_path = evaluation_path
+        self.preprocessor_path = preprocessor_path
+        self.train_path = train_path
+        self.config = config["batch_scoring"]
+
+        self.chunk_size = chunk_size or self.config["chunk_size"]
+        self.workers = workers or self.config["workers"]
+        self.id_column = self.config["id_column"]
+        self.on_invalid_rows = self.config["on_invalid_rows"]
+        self.max_error_examples = self.config["max_error_examples"]
+        self.max_in_flight = 2 * self.workers
+
+        self.transformer = FeatureTransformer.from_config(config)
+        self.schema = schema_from_config(config)
+
+    def prepare_transformer(self):
+        """
+        Loads the preprocessing artifact saved by DataProcessor. Older model
+        directories without one fall back to refitting on the training split.
+        """
+        try:
+            if os.path.exists(self.preprocessor_path):
+                self.transformer = FeatureTransformer.load(self.preprocessor_path)
+                return
+
+            logger.warning(f"No preprocessing artifact at {self.preprocessor_path}, fitting on {self.train_path}")
+            self.transformer.fit(load_data(self.train_path, self.schema))
+        except Exception as e:
+            logger.error(f"Error while preparing feature transformer {e}")
+            raise CustomException("Failed to prepare feature transformer", sys)
+
+    def _read_chunks(self, input_path, feature_names):
+        wanted = set(feature_names) | {self.id_column}
+        if str(input_path).endswith(".parquet"):
+            from pyarrow import parquet
+            parquet_file = parquet.ParquetFile(input_path)
+            columns = [column for column in parquet_file.schema_arrow.names if column in wanted]
+            return (batch.to_pandas() for batch in parquet_file.iter_batches(self.chunk_size, columns=columns))
+        return pd.read_csv(input_path, chunksize=self.chunk_size, usecols=lambda column: column in wanted)
+
+    def score_file(self, input_path, output_path):
+        try:
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            threads_per_worker = max(1, (os.cpu_count() or 1) // self.workers)
+
+            logger.info(f"Scoring {input_path} in chunks of {self.chunk_size} rows with {self.workers} worker(s)")
+            _init_worker(self.model_path, self.transformer, threads_per_worker, self.evaluation_path)
+            feature_names = _worker_service.feature_names
+
+            total_rows = 0
+            input_rows = 0
+            errors = RowErrors(self.max_error_examples)
+            with open(output_path, "w", newline="") as output_file:
+                header = True
+                for result, chunk_errors, chunk_rows in self._iter_results(input_path, feature_names,
+                                                                           threads_per_worker):
+                    result.to_csv(output_file, header=header, index=False, float_format="%.6f")
+                    header = False
+                    total_rows += len(result)
+                    if chunk_errors.count:
+                        errors.extend(chunk_errors, offset=input_rows)
+                    input_rows += chunk_rows
+
+            if errors.count:
+                self._report_invalid_rows(errors, output_path)
+            logger.info(f"Scored {total_rows} rows into {output_path}")
+            return total_rows
+
+        except CustomException:
+            raise
+        except Exception as e:
+            logger.error(f"Error while scoring {input_path} {e}")
+            raise CustomException("Failed to score reservation file", sys)
+
+    def _report_invalid_rows(self, errors, output_path):
+        report_path = os.path.splitext(output_path)[0] + "_errors.json"
+        write_json(report_path, errors.summary())
+        logger.warning(f"{len(errors.rows())} rows with {errors.count} invalid values {dict(errors.reasons)}, "
+                       f"see {report_path}")
+        if self.on_invalid_rows == "fail":
+            os.remove(output_path)
+            raise InvalidRowsError(f"Rejected {output_path}", errors)
+
+    def _iter_results(self, input_path, feature_names, threads_per_worker):
+        chunks = self._read_chunks(input_path, feature_names)
+
+        if self.workers <= 1:
+            for chunk in chunks:
+                yield _score_chunk(chunk, self.id_column)
+            return
+
+        # Results are written in input order; the bounded queue keeps at most
+        # max_in_flight chunks alive while the pool works ahead.
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.model_path, self.transformer, threads_per_worker,
+                                           self.evaluation_path)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_score_chunk, chunk, self.id_column))
+                if len(pending) >= self.max_in_flight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
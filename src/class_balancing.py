@@ -0,0 +1,104 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# smote / chunked_smote add synthetic rows; class_weight / scale_pos_weight
+# leave the data alone and weight the loss in LightGBM instead
+BALANCING_STRATEGIES = ("smote", "chunked_smote", "class_weight", "scale_pos_weight", "none")
+WEIGHTING_STRATEGIES = ("class_weight", "scale_pos_weight")
+
+
+def lightgbm_balance_params(strategy, y):
+    """
+    Extra LGBMClassifier parameters that stand in for resampling.
+    """
+    if strategy == "class_weight":
+        return {"class_weight": "balanced"}
+    if strategy == "scale_pos_weight":
+        counts = np.bincount(np.asarray(y, dtype=np.int64), minlength=2)
+        return {"scale_pos_weight": counts[0] / counts[1]}
+    return {}
+
+
+class ClassBalancer:
+    """
+    Balances the training split with the strategy set under
+    `data_processing.balancing`.
+
+    `chunked_smote` runs SMOTE inside shuffled chunks of `chunk_size` rows, so
+    the neighbour search stays bounded instead of growing with the whole
+    training set; neighbours are only looked up within a chunk, which makes it
+    an approximation of plain SMOTE. The weighting strategies return the data
+    unchanged and ModelTraining adds the matching LightGBM parameter.
+    """
+
+    def __init__(self, strategy="smote", k_neighbors=5, chunk_size=100000, balance_test=False, random_state=42):
+        if strategy not in BALANCING_STRATEGIES:
+            raise ValueError(f"Unknown balancing strategy {strategy}, expected one of {BALANCING_STRATEGIES}")
+        self.strategy = strategy
+        self.k_neighbors = k_neighbors
+        self.chunk_size = chunk_size
+        self.balance_test = balance_test
+        self.random_state = random_state
+
+        self.report_ = {}
+
+    @classmethod
+    def from_config(cls, config):
+        balancing_config = config["data_processing"].get("balancing", {})
+        return cls(balancing_config.get("strategy", "smote"),
+                   balancing_config.get("k_neighbors", 5),
+                   balancing_config.get("chunk_size", 100000),
+                   balancing_config.get("balance_test", False),
+                   balancing_config.get("random_state", 42))
+
+    def _smote(self, X, y):
+        from imblearn.over_sampling import SMOTE
+        smote = SMOTE(random_state=self.random_state, k_neighbors=self.k_neighbors)
+        return smote.fit_resample(X, y)
+
+    def _chunked_smote(self, X, y):
+        rows = np.random.default_rng(self.random_state).permutation(len(X))
+        n_chunks = max(1, int(np.ceil(len(X) / self.chunk_size)))
+
+        X_parts, y_parts = [], []
+        for chunk_rows in np.array_split(rows, n_chunks):
+            chunk_rows.sort()
+            X_chunk, y_chunk = self._smote(X.iloc[chunk_rows], y.iloc[chunk_rows])
+            X_parts.append(X_chunk)
+            y_parts.append(y_chunk)
+        return pd.concat(X_parts, ignore_index=True), pd.concat(y_parts, ignore_index=True)
+
+    def balance(self, df, target="booking_status"):
+        try:
+            if self.strategy not in ("smote", "chunked_smote"):
+                logger.info(f"Balancing strategy {self.strategy}: keeping {len(df)} rows as they are")
+                self.report_ = {"strategy": self.strategy, "rows_in": len(df), "rows_out": len(df),
+                                "seconds": 0.0, "output_mb": df.memory_usage(deep=True).sum() / 1024 ** 2}
+                return df
+
+            start = time.perf_counter()
+
+            X = df.drop(columns=target)
+            y = df[target]
+            X_resampled, y_resampled = getattr(self, f"_{self.strategy}")(X, y)
+            balanced_df = pd.DataFrame(X_resampled, columns=X.columns)
+            balanced_df[target] = np.asarray(y_resampled)
+
+            seconds = time.perf_counter() - start
+            output_mb = balanced_df.memory_usage(deep=True).sum() / 1024 ** 2
+
+            self.report_ = {"strategy": self.strategy, "rows_in": len(df), "rows_out": len(balanced_df),
+                            "seconds": seconds, "output_mb": output_mb}
+            logger.info(f"Balanced {len(df)} -> {len(balanced_df)} rows with {self.strategy} "
+                        f"in {seconds:.2f}s, {output_mb:.1f} MB")
+            return balanced_df
+
+        except Exception as e:
+            logger.error(f"Error while balancing with {self.strategy} {e}")
+            raise CustomException("Failed to balance data", sys)
@@ -1,22 +1,48 @@
 import sys
-import traceback
+from collections import Counter
 
 class CustomException(Exception):
     """
     A custom exception that provides detailed error information,
     including the file name and line number where the error occurred.
+
+    Raising one is cheap: it keeps a reference to the exception being
+    handled (as `cause` and `__cause__`) and its traceback, and only builds
+    the detailed message when it is first read. Keyword arguments are kept
+    as `context` (e.g. row=12, column="lead_time") and shown in the message.
     """
 
-    def __init__(self, error_message: str, error_detail: sys):
+    def __init__(self, error_message: str, error_detail: sys = sys, **context):
         """
-        Initializes the CustomException with a detailed error message.
+        Initializes the CustomException with the error being handled.
 
         Parameters:
         - error_message: A short description of the error.
         - error_detail: Should be the 'sys' module to extract traceback info.
+        - context: Optional fields describing where the error happened.
         """
         super().__init__(error_message)
-        self.error_message = self.get_detailed_error_message(error_message, error_detail)
+        self.message = error_message
+        self.context = context
+        _, self.cause, self._traceback = error_detail.exc_info() if error_detail is not None else (None, None, None)
+        if self.cause is not None:
+            self.__cause__ = self.cause
+        self._error_message = None
+
+    @property
+    def error_message(self) -> str:
+        if self._error_message is None:
+            self._error_message = self._format()
+        return self._error_message
+
+    def _format(self) -> str:
+        message = self.message
+        if self.context:
+            message += " [" + ", ".join(f"{key}={value!r}" for key, value in self.context.items()) + "]"
+        if self._traceback is not None:
+            file_name = self._traceback.tb_frame.f_code.co_filename
+            return f"Error in {file_name}, line {self._traceback.tb_lineno}: {message}"
+        return f"Error (no traceback available): {message}"
 
     @staticmethod
     def get_detailed_error_message(error_message: str, error_detail: sys) -> str:
@@ -38,4 +64,88 @@ class CustomException(Exception):
         """
         Returns the detailed error message when the exception is printed.
         """
-        return self.error_message
\ No newline at end of file
+        return self.error_message
+
+
+class RowErrors:
+    """
+    Collects invalid values row by row instead of raising on the first one,
+    so a batch with thousands of bad rows is reported once. Keeps a count per
+    reason, the positions of the invalid rows and the first `max_examples`
+    offending values.
+    """
+
+    def __init__(self, max_examples=20):
+        self.max_examples = max_examples
+        self.count = 0
+        self.reasons = Counter()
+        self.examples = []
+        self._rows = []
+
+    def add(self, row, column, reason, value=None):
+        self.count += 1
+        self.reasons[reason] += 1
+        self._rows.append(row)
+        if len(self.examples) < self.max_examples:
+            self.examples.append({"row": int(row), "column": column, "reason": reason, "value": repr(value)})
+
+    def add_rows(self, rows, column, reason, values=None):
+        """
+        Records the same problem for an array of row positions at once.
+        """
+        if len(rows) == 0:
+            return
+        self.count += len(rows)
+        self.reasons[reason] += len(rows)
+        self._rows.append(rows)
+        for position in range(min(len(rows), self.max_examples - len(self.examples))):
+            value = values[position] if values is not None else None
+            self.examples.append({"row": int(rows[position]), "column": column, "reason": reason,
+                                  "value": repr(value)})
+
+    def extend(self, other, offset=0):
+        """
+        Merges errors collected for a chunk that starts at row `offset`.
+        """
+        self.count += other.count
+        self.reasons.update(other.reasons)
+        self._rows.append(other.rows() + offset)
+        for example in other.examples[:max(0, self.max_examples - len(self.examples))]:
+            self.examples.append(dict(example, row=example["row"] + offset))
+
+    def rows(self):
+        """
+        Sorted positions of the rows with at least one invalid value.
+        """
+        import numpy as np
+        if not self._rows:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([np.atleast_1d(np.asarray(rows, dtype=np.int64)) for rows in self._rows]))
+
+    def __len__(self):
+        return self.count
+
+    def summary(self):
+        return {"invalid_values": self.count, "invalid_rows": int(len(self.rows())),
+                "reasons": dict(self.reasons), "examples": self.examples}
+
+    def raise_if_any(self, message):
+        if self.count:
+            raise InvalidRowsError(message, self)
+
+
+class InvalidRowsError(CustomException, ValueError):
+    """
+    Raised once for a whole batch with the RowErrors collected while reading
+    it. It is a ValueError, so request handlers answer it with a 400.
+    """
+
+    def __init__(self, error_message: str, errors: RowErrors):
+        super().__init__(error_message, None)
+        self.errors = errors
+
+    def _format(self) -> str:
+        shown = "; ".join(f"row {example['row']} {example['column']}={example['value']} ({example['reason']})"
+                          for example in self.errors.examples[:5])
+        return (f"{self.message}: {self.errors.count} invalid values in {len(self.errors.rows())} rows "
+                f"{dict(self.errors.reasons)}, e.g. {shown}")
@@ -1,29 +1,83 @@
 import os
+import hashlib
+import shutil
+import numpy as np
 import pandas as pd
+from google.auth.credentials import AnonymousCredentials
 from google.cloud import storage
 from sklearn.model_selection import train_test_split
 from src.logger import get_logger
 from src.custom_exception import CustomException
+from src.eda_cache import EDAAggregates
 from config.paths_config import *
-from utils.common_functions import read_yaml
+from utils.common_functions import read_yaml, save_data, ChunkWriter, read_json, write_json, append_data, iter_data
 import sys
 
 
 logger= get_logger(__name__)
 
+# Bytes just before the watermark that must be unchanged for an append-only
+# update to be trusted
+TAIL_BYTES = 4096
+
 class DataIngestion:
     def __init__(self, config):
         self.config = config["data_ingestion"]
         self.bucket_name = self.config["bucket_name"]
         self.file_name = self.config["bucket_filename"]
         self.train_test_ratio = self.config["train_ratio"]
+        self.source = self.config.get("source", "gcs")
+        self.split_mode = self.config.get("split_mode", "random")
+        self.chunk_size = self.config.get("chunk_size", 100000)
+        self.id_column = self.config.get("id_column", "Booking_ID")
+        self.incremental = self.config.get("incremental", False)
+        self.dtypes = config["storage"]["dtypes"]
 
         os.makedirs(RAW_DIR, exist_ok=True)
         logger.info(f"Data ingestion started with {self.bucket_name} and file is {self.file_name}")
 
+    def _storage_client(self):
+        if self.source == "emulator":
+            # Local GCS emulator (e.g. fake-gcs-server) for offline runs
+            return storage.Client(project="local", credentials=AnonymousCredentials(),
+                                  client_options={"api_endpoint": self.config["emulator_host"]})
+        return storage.Client.from_service_account_json(self.config["credentials_path"])
+
+    def source_fingerprint(self):
+        """
+        Identifies the current version of the source without downloading it.
+        Local sources are hashed by the caller instead.
+        """
+        if self.source == "local":
+            return {"path": os.path.abspath(self.config["local_path"])}
+        blob = self._storage_client().bucket(self.bucket_name).get_blob(self.file_name)
+        return {"md5": blob.md5_hash, "generation": blob.generation, "size": blob.size}
+
+    def fetch_source(self):
+        """
+        Puts the source CSV at RAW_FILE_PATH. `source` selects a GCS bucket
+        (gcs), a GCS emulator (emulator) or a file on disk (local).
+        """
+        if self.source == "local":
+            self.copy_local_source()
+        else:
+            self.download_csv_from_gcp()
+
+    def copy_local_source(self):
+        try:
+            local_path = self.config["local_path"]
+            if os.path.abspath(local_path) != os.path.abspath(RAW_FILE_PATH):
+                shutil.copyfile(local_path, RAW_FILE_PATH)
+
+            logger.info(f"CSV file was successfully copied from {local_path} to {RAW_FILE_PATH}")
+
+        except Exception:
+            logger.error("Error while copying local csv file")
+            raise CustomException("Failed to copy local csv file", sys)
+
     def download_csv_from_gcp(self):
         try:
-            client = storage.Client.from_service_account_json("C:/Users/dgarc/Downloads/unique-rarity-456314-h2-21be068f3129.json")
+            client = self._storage_client()
             bucket = client.bucket(self.bucket_name)
             blob = bucket.blob(self.file_name)
 
@@ -41,8 +95,8 @@ class DataIngestion:
             data = pd.read_csv(RAW_FILE_PATH)
             train_data, test_data = train_test_split(data, test_size=1-self.train_test_ratio, random_state=42)
 
-            train_data.to_csv(TRAIN_FILE_PATH)
-            test_data.to_csv(TEST_FILE_PATH)
+            save_data(train_data, TRAIN_FILE_PATH, self.dtypes)
+            save_data(test_data, TEST_FILE_PATH, self.dtypes)
 
             logger.info(f"Train data saved to {TRAIN_FILE_PATH}")
             logger.info(f"Test data saved to {TEST_FILE_PATH}")
@@ -51,18 +105,197 @@ class DataIngestion:
         except Exception:
             logger.error("Error while splitting data")
             raise CustomException("Failed to spliot data into training and test datasets", sys)
+
+    def is_train_row(self, ids):
+        """
+        Assigns rows to the training split from a stable hash of their id, so
+        a booking always lands on the same side however the data is chunked
+        and whatever rows are appended later.
+        """
+        hashes = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+        return (hashes % np.uint64(10000)) < np.uint64(round(self.train_test_ratio * 10000))
+
+    def split_data_streaming(self):
+        try:
+            logger.info(f"Starting the streaming split in chunks of {self.chunk_size} rows")
+
+            with ChunkWriter(TRAIN_FILE_PATH, self.dtypes) as train_writer, \
+                    ChunkWriter(TEST_FILE_PATH, self.dtypes) as test_writer:
+                for chunk in pd.read_csv(RAW_FILE_PATH, chunksize=self.chunk_size):
+                    train_mask = self.is_train_row(chunk[self.id_column])
+                    train_writer.write(chunk[train_mask])
+                    test_writer.write(chunk[~train_mask])
+
+            logger.info(f"Train data saved to {TRAIN_FILE_PATH} ({train_writer.rows} rows)")
+            logger.info(f"Test data saved to {TEST_FILE_PATH} ({test_writer.rows} rows)")
+
+        except Exception:
+            logger.error("Error while splitting data")
+            raise CustomException("Failed to split data into training and test datasets", sys)
         
+    def _source_size(self):
+        if self.source == "local":
+            return os.path.getsize(self.config["local_path"])
+        return self._storage_client().bucket(self.bucket_name).get_blob(self.file_name).size
+
+    def _read_source_range(self, start, end):
+        if self.source == "local":
+            with open(self.config["local_path"], "rb") as source_file:
+                source_file.seek(start)
+                return source_file.read(end - start)
+        blob = self._storage_client().bucket(self.bucket_name).blob(self.file_name)
+        return blob.download_as_bytes(start=start, end=end - 1)
+
+    def _copy_source_from(self, offset):
+        """
+        Transfers only the source bytes after `offset` onto the end of the
+        local raw file.
+        """
+        # The source is the raw file itself: the new rows are already in place
+        if self.source == "local" and os.path.abspath(self.config["local_path"]) == os.path.abspath(RAW_FILE_PATH):
+            return
+        with open(RAW_FILE_PATH, "r+b") as raw_file:
+            raw_file.seek(offset)
+            raw_file.truncate()
+            if self.source == "local":
+                with open(self.config["local_path"], "rb") as source_file:
+                    source_file.seek(offset)
+                    shutil.copyfileobj(source_file, raw_file)
+            else:
+                blob = self._storage_client().bucket(self.bucket_name).blob(self.file_name)
+                blob.download_to_file(raw_file, start=offset)
+
+    def _source_unchanged(self, state):
+        """
+        Checks that the bytes already ingested still look the same: same header
+        and same last TAIL_BYTES before the watermark.
+        """
+        offset = state["offset"]
+        if self._source_size() < offset:
+            return False
+        header = self._read_source_range(0, state["header_length"])
+        tail = self._read_source_range(max(0, offset - TAIL_BYTES), offset)
+        return (hashlib.sha1(header).hexdigest() == state["header"]
+                and hashlib.sha1(tail).hexdigest() == state["tail"])
+
+    def _save_state(self, generation, train_rows, test_rows):
+        with open(RAW_FILE_PATH, "rb") as raw_file:
+            header = raw_file.readline()
+            offset = raw_file.seek(0, os.SEEK_END)
+            raw_file.seek(max(0, offset - TAIL_BYTES))
+            tail = raw_file.read()
+
+        state = {
+            "generation": generation,
+            "offset": offset,
+            "header_length": len(header),
+            "header": hashlib.sha1(header).hexdigest(),
+            "tail": hashlib.sha1(tail).hexdigest(),
+            "train_rows": train_rows,
+            "test_rows": test_rows
+        }
+        write_json(INGESTION_STATE_PATH, state)
+        return state
+
+    def ingest_full(self, generation):
+        logger.info("Running a full ingestion and resetting the watermark")
+        self.fetch_source()
+        self.split_data_streaming()
+
+        for delta_path in (TRAIN_DELTA_PATH, TEST_DELTA_PATH):
+            if os.path.exists(delta_path):
+                os.remove(delta_path)
+
+        train_rows = sum(len(chunk) for chunk in iter_data(TRAIN_FILE_PATH))
+        test_rows = sum(len(chunk) for chunk in iter_data(TEST_FILE_PATH))
+        self._save_state(generation, train_rows, test_rows)
+
+    def ingest_incremental(self):
+        """
+        Splits only the rows appended to the source since the watermark.
+
+        New rows are appended to the train/test outputs and to the delta files
+        that DataProcessor consumes on its next incremental run. If anything
+        before the watermark changed, the whole source is ingested again under
+        a new generation number.
+        """
+        try:
+            state = read_json(INGESTION_STATE_PATH)
+            outputs_exist = os.path.exists(TRAIN_FILE_PATH) and os.path.exists(TEST_FILE_PATH)
+
+            if state is None or not outputs_exist or not os.path.exists(RAW_FILE_PATH):
+                self.ingest_full(generation=(state or {}).get("generation", 0) + 1)
+                return
+            if not self._source_unchanged(state):
+                logger.warning("Source changed before the watermark, falling back to a full ingestion")
+                self.ingest_full(generation=state["generation"] + 1)
+                return
+
+            offset = state["offset"]
+            size = self._source_size()
+            if size == offset:
+                logger.info("No new rows since the last ingestion")
+                return
+            if self._read_source_range(size - 1, size) != b"\n":
+                logger.warning("Source does not end with a complete row yet, skipping this run")
+                return
+
+            self._copy_source_from(offset)
+            logger.info(f"Splitting {os.path.getsize(RAW_FILE_PATH) - offset} new bytes after offset {offset}")
+
+            temp_train = RAW_DIR / f"train_new{TRAIN_FILE_PATH.suffix}"
+            temp_test = RAW_DIR / f"test_new{TEST_FILE_PATH.suffix}"
+            with open(RAW_FILE_PATH, "rb") as raw_file:
+                columns = raw_file.readline().decode().strip().split(",")
+                raw_file.seek(offset)
+                with ChunkWriter(temp_train, self.dtypes) as train_writer, \
+                        ChunkWriter(temp_test, self.dtypes) as test_writer:
+                    for chunk in pd.read_csv(raw_file, header=None, names=columns, chunksize=self.chunk_size):
+                        train_mask = self.is_train_row(chunk[self.id_column])
+                        train_writer.write(chunk[train_mask])
+                        test_writer.write(chunk[~train_mask])
+
+            for new_path, output_path, delta_path, writer in (
+                    (temp_train, TRAIN_FILE_PATH, TRAIN_DELTA_PATH, train_writer),
+                    (temp_test, TEST_FILE_PATH, TEST_DELTA_PATH, test_writer)):
+                # All of the new rows can hash to one side; the other has nothing to append
+                if writer.rows:
+                    append_data(iter_data(new_path), output_path, self.dtypes)
+                    append_data(iter_data(new_path), delta_path, self.dtypes)
+                if os.path.exists(new_path):
+                    os.remove(new_path)
+
+            self._save_state(state["generation"],
+                             state["train_rows"] + train_writer.rows,
+                             state["test_rows"] + test_writer.rows)
+            logger.info(f"Ingested {train_writer.rows} new train rows and {test_writer.rows} new test rows")
+
+        except Exception as e:
+            logger.error(f"Error during incremental ingestion {e}")
+            raise CustomException("Failed to ingest new rows", sys)
+
     def run(self):
         try:
             logger.info("Starting data ingestion process")
 
-            self.download_csv_from_gcp()
-            self.split_data()
+            if self.incremental:
+                self.ingest_incremental()
+            else:
+                self.fetch_source()
+                if self.split_mode == "streaming":
+                    self.split_data_streaming()
+                else:
+                    self.split_data()
+
+            logger.info("Refreshing dashboard EDA aggregates")
+            EDAAggregates(RAW_FILE_PATH, EDA_CACHE_PATH).refresh()
 
             logger.info("Data ingestion completed successfully")
 
+        # Failures must propagate, or StageCache.run would cache half-written outputs
         except CustomException as ce:
             logger.error(f"CustomException: {str(ce)}")
+            raise
 
         except Exception as e:
             logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
@@ -3,11 +3,11 @@ import pandas as pd
 import numpy as np
 from src.logger import get_logger
 from src.custom_exception import CustomException
+from src.feature_transformer import FeatureTransformer, duplicated_rows
+from src.feature_selection import FeatureSelector
+from src.class_balancing import ClassBalancer
 from config.paths_config import *
-from utils.common_functions import read_yaml, load_data
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from imblearn.over_sampling import SMOTE
+from utils.common_functions import read_yaml, load_data, save_data, schema_from_config, read_json, write_json, append_data
 import sys
 
 logger = get_logger(__name__)
@@ -20,6 +20,9 @@ class DataProcessor:
         self.processed_dir = processed_dir
 
         self.config = read_yaml(config_path)
+        self.transformer = FeatureTransformer.from_config(self.config)
+        self.balancer = ClassBalancer.from_config(self.config)
+        self.selector = FeatureSelector.from_config(self.config, FEATURE_SELECTION_CACHE_DIR)
 
         if not os.path.exists(self.processed_dir):
             os.makedirs(self.processed_dir)
@@ -31,30 +34,20 @@ class DataProcessor:
             logger.info("Dropping the columns")
 
 
-            df.drop(columns=['Unnamed: 0','Booking_ID'], inplace=True)
-            df.drop_duplicates(inplace=True)
-
-            cat_cols = self.config["data_processing"]["categorical_columns"]
-            num_cols = self.config["data_processing"]["numerical_columns"]
+            df = df[[column for column in df.columns if column not in ('Unnamed: 0','Booking_ID')]]
 
             logger.info("Applying Label Encoding")
-            label_encoder = LabelEncoder()
-            mappings = {}
-            for column in cat_cols:
-                df[column] = label_encoder.fit_transform(df[column])
-                mappings[column] = {label:code for label,code in zip(label_encoder.classes_,label_encoder.transform(label_encoder.classes_))}
-            
+            df = self.transformer.encode(df)
+
+            # Deduplicating the numeric encoded block is cheaper than the raw strings
+            df = df[~duplicated_rows(df.to_numpy(dtype=np.float64))]
+
             logger.info("Label Mappings are:")
-            for col, mapping in mappings.items():
+            for col, mapping in self.transformer.mappings.items():
                 logger.info(f"{col} : {mapping}")
-            
-            logger.info("Skewness Handling")
-            skew_threshold = self.config["data_processing"]["skewness_threshold"]
-            skewness = df[num_cols].apply(lambda x:x.skew())
-
-            for column in skewness[skewness>skew_threshold].index:
-                df[column] = np.log1p(df[column])
-            
+
+            logger.info(f"Skewness Handling, log1p applied to {self.transformer.log_columns}")
+
             return df
         except Exception as e:
             logger.error(f"Error during preprocessing step {e}")
@@ -63,12 +56,7 @@ class DataProcessor:
     def balance_data(self, df):
         try:
             logger.info("Handling imbalanced data")
-            X = df.drop(columns = "booking_status")
-            y = df["booking_status"]
-            smote = SMOTE(random_state=42)
-            X_resampled, y_resampled = smote.fit_resample(X,y)
-            balanced_df = pd.DataFrame(X_resampled, columns = X.columns)
-            balanced_df["booking_status"] = y_resampled
+            balanced_df = self.balancer.balance(df)
 
             logger.info("Data balanced succesfully")
 
@@ -81,29 +69,13 @@ class DataProcessor:
 
     def feature_selection(self, df):
         try:
-            logger.info("Starting Feature Selection")
-            
-            
-            X = df.drop(columns = "booking_status")
-            y = df["booking_status"]
-
-            model =RandomForestClassifier(random_state=42)
-            model.fit(X,y)
-            feature_importance = model.feature_importances_
-
-            feature_importance_df = pd.DataFrame(
-                {
-                    'feature': X.columns,
-                    'importance' : feature_importance
-                }
-            )
-            top_feature_importance =feature_importance_df.sort_values(by="importance", ascending=False)
-            num_features_to_select = self.config["data_processing"]["no_of_features"]
-            top_10_features = top_feature_importance["feature"].head(num_features_to_select).values
-
-            logger.info(f"Features selected: {top_10_features}")
-
-            top_10_df = df[top_10_features.tolist() + ["booking_status"]]
+            logger.info(f"Starting Feature Selection with {self.selector.method}")
+
+            top_features = self.selector.select(df)
+            logger.info(f"Feature importances:\n{self.selector.importances_.to_string(index=False)}")
+            logger.info(f"Features selected: {top_features}")
+
+            top_10_df = df[top_features + ["booking_status"]]
 
             logger.info("Feature selection completed sucessfully")
 
@@ -114,10 +86,21 @@ class DataProcessor:
             raise CustomException("Error while trying to select important features", sys)
     
 
+    def check_required_features(self, selected):
+        """
+        Fails before any artifact is written when the selection would not
+        match the fields the serving forms post.
+        """
+        required = self.config["data_processing"].get("feature_selection", {}).get("required_features") or []
+        missing = sorted(set(required) - set(selected))
+        if missing:
+            logger.error(f"Selected features {list(selected)} do not include the form fields {missing}")
+            raise CustomException(f"Feature selection dropped form fields {missing}", sys)
+
     def save_data(self,df, file_path):
         try:
             logger.info("Saving processed data")
-            df.to_csv(file_path, index = False)
+            save_data(df, file_path, self.config["storage"]["dtypes"])
 
             logger.info(f"Data saved sucessfully to {file_path}")
         
@@ -125,29 +108,94 @@ class DataProcessor:
             logger.error(f"Error saving the data {e}")
             raise CustomException("Error while trying to save the processed data", sys)
 
+    def _ingestion_generation(self):
+        return read_json(INGESTION_STATE_PATH, {}).get("generation")
+
+    def _can_process_incrementally(self):
+        if not self.config["data_processing"].get("incremental", False):
+            return False
+        required = (PREPROCESSOR_OUTPUT, ENCODED_TRAIN_DATA_PATH, ENCODED_TEST_DATA_PATH)
+        if not all(os.path.exists(path) for path in required):
+            return False
+        state = read_json(PROCESSING_STATE_PATH, {})
+        # A new ingestion generation means the raw splits were rebuilt
+        return state.get("generation") == self._ingestion_generation()
+
+    def encode_splits(self, schema):
+        """
+        Fits the transformer on the full training split and encodes both
+        splits, keeping the encoded frames for later incremental runs.
+        """
+        train_df = load_data(self.train_path, schema)
+        test_df = load_data(self.test_path, schema)
+
+        logger.info("Fitting encoders and skewness transforms on the training split")
+        train_df = self.transformer.fit_encode(train_df)
+        test_df = self.preprocess_data(test_df)
+
+        self.save_data(train_df, ENCODED_TRAIN_DATA_PATH)
+        self.save_data(test_df, ENCODED_TEST_DATA_PATH)
+        return train_df, test_df
+
+    def encode_deltas(self, schema):
+        """
+        Encodes only the rows ingested since the last run with the saved
+        transformer and appends them to the encoded splits.
+        """
+        self.transformer = FeatureTransformer.load(PREPROCESSOR_OUTPUT)
+
+        for delta_path, encoded_path in ((TRAIN_DELTA_PATH, ENCODED_TRAIN_DATA_PATH),
+                                         (TEST_DELTA_PATH, ENCODED_TEST_DATA_PATH)):
+            if not os.path.exists(delta_path):
+                continue
+            delta_df = self.preprocess_data(load_data(delta_path, schema))
+            logger.info(f"Encoded {len(delta_df)} new rows from {delta_path}")
+            append_data([delta_df], encoded_path, self.config["storage"]["dtypes"])
+
+        # Rows that repeat across batches are dropped like in a full run
+        train_df = load_data(ENCODED_TRAIN_DATA_PATH).drop_duplicates()
+        test_df = load_data(ENCODED_TEST_DATA_PATH).drop_duplicates()
+        return train_df, test_df
+
     def process(self):
         try:
             logger.info("Loading data from RAW directory")
 
-            train_df = load_data(self.train_path)
-            test_df = load_data(self.test_path)
+            schema = schema_from_config(self.config)
+            if self._can_process_incrementally():
+                logger.info("Processing only newly ingested rows")
+                train_df, test_df = self.encode_deltas(schema)
+            else:
+                train_df, test_df = self.encode_splits(schema)
 
-            train_df = self.preprocess_data(train_df)
-            test_df = self.preprocess_data(test_df)
+            # Deltas are folded into the encoded splits either way
+            for delta_path in (TRAIN_DELTA_PATH, TEST_DELTA_PATH):
+                if os.path.exists(delta_path):
+                    os.remove(delta_path)
+            write_json(PROCESSING_STATE_PATH, {"generation": self._ingestion_generation()})
 
             train_df = self.balance_data(train_df)
-            test_df = self.balance_data(test_df)
+            # Metrics should reflect the real class mix, so test stays as is by default
+            if self.balancer.balance_test:
+                test_df = self.balance_data(test_df)
 
             train_df = self.feature_selection(train_df)
+            self.check_required_features(train_df.columns.drop("booking_status"))
             test_df = test_df[train_df.columns]
 
             self.save_data(train_df, PROCESSED_TRAIN_DATA_PATH)
             self.save_data(test_df, PROCESSED_TEST_DATA_PATH)
 
+            self.transformer.feature_order = train_df.columns.drop("booking_status").tolist()
+            self.transformer.save(PREPROCESSOR_OUTPUT)
+
             logger.info("Data processing completed sucessfully ")
 
 
 
+        # Stage failures were logged where they happened
+        except CustomException:
+            raise
         except Exception as e:
             logger.error(f"Error during pre-processing pipeline  {e}")
             raise CustomException("Error while pre-processing pipeline", sys)
@@ -0,0 +1,258 @@
+"""
+Data-parallel LightGBM training on worker processes.
+
+    python -m src.distributed_training train [--workers 4] [--train artifacts/processed/processed_train.parquet]
+    python -m src.distributed_training prepare --machines host0:12400,host1:12400
+    python -m src.distributed_training worker --rank 0 [--output artifacts/models/lgbm_model.pkl]
+
+`train` shards the processed training split and trains on local worker
+processes, which is how ModelTraining uses it with
+distributed_training.enabled. To train across nodes instead, `prepare` the
+shards for a list of machines, copy artifacts/processed/shards to every
+node and start `worker` with its rank on each; rank 0 saves the model.
+"""
+import argparse
+import os
+import shutil
+import socket
+import sys
+import time
+from pathlib import Path
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from config.paths_config import *
+from utils.common_functions import read_json, write_json, read_yaml, load_data, iter_data, ChunkWriter
+
+logger = get_logger(__name__)
+
+CLUSTER_FILE = "cluster.json"
+VALIDATION_NAME = "validation"
+
+
+def _free_ports(count):
+    """
+    Ports the local workers can listen on, picked by the OS.
+    """
+    sockets = []
+    try:
+        for _ in range(count):
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.bind(("127.0.0.1", 0))
+            sockets.append(listener)
+        return [listener.getsockname()[1] for listener in sockets]
+    finally:
+        for listener in sockets:
+            listener.close()
+
+
+def train_shard(shard_dir, rank):
+    """
+    Trains worker `rank` of the cluster described in shard_dir/cluster.json
+    on its own shard. LightGBM blocks until every worker has connected, then
+    all of them grow the same trees from histograms summed over the network.
+    Returns the fitted model, with the network parameters reset to their
+    single-process defaults, and the worker's timings.
+    """
+    import lightgbm as lgb
+
+    started = time.perf_counter()
+    shard_dir = Path(shard_dir)
+    cluster = read_json(shard_dir / CLUSTER_FILE)
+    if cluster is None:
+        raise FileNotFoundError(f"No {CLUSTER_FILE} in {shard_dir}, run prepare first")
+    machines = cluster["machines"]
+    shard = load_data(shard_dir / cluster["shards"][rank])
+    X, y = shard.drop(columns=[cluster["target"]]), shard[cluster["target"]]
+    loaded = time.perf_counter()
+
+    model = lgb.LGBMClassifier(**cluster["params"], tree_learner=cluster["tree_learner"], machines=machines,
+                               local_listen_port=int(machines.split(",")[rank].rsplit(":", 1)[1]),
+                               num_machines=len(cluster["shards"]), time_out=cluster["time_out"],
+                               pre_partition=True)
+    try:
+        model.fit(X, y)
+    finally:
+        if getattr(model, "fitted_", False):
+            model.booster_.free_network()
+    # The trees are complete; a saved model must not try to rejoin the cluster if refitted
+    model.set_params(tree_learner="serial", machines=None, local_listen_port=12400, num_machines=1,
+                     time_out=120, pre_partition=False)
+    return model, {"rank": rank, "rows": len(X), "load_seconds": loaded - started,
+                   "fit_seconds": time.perf_counter() - loaded}
+
+
+def _run_worker(shard_dir, rank):
+    model, stats = train_shard(shard_dir, rank)
+    # Every worker ends up with the same trees; only one copy goes back
+    return (model if rank == 0 else None), stats
+
+
+class DistributedTrainer:
+    """
+    Trains one LGBMClassifier on `workers` processes with LightGBM's
+    data-parallel tree learner over sockets.
+
+    `prepare` streams the processed training file in chunks and stripes it
+    row by row into one shard per worker, so neither the parent nor any
+    worker ever holds the whole training set, and writes cluster.json with
+    the machine list and the parameters every worker must share. `train`
+    starts the local workers on free ports; each loads only its shard.
+    Workers are spawned rather than forked, since OpenMP does not survive a
+    fork in a process that already ran LightGBM.
+
+    Hyperparameter search does not run across the cluster, so the model is
+    fitted with one fixed configuration (DISTRIBUTED_LIGHTGBM_PARAMS).
+
+    With a `validation_fraction`, every 1/fraction-th row goes to a
+    validation file next to the shards instead of to a worker, for picking
+    the operating threshold on rows the model never saw.
+    """
+
+    def __init__(self, params, workers=2, shard_dir=SHARD_DIR, tree_learner="data", time_out=120,
+                 target="booking_status", chunk_size=100000, balancing_strategy=None, validation_fraction=0.0):
+        self.params = dict(params)
+        self.workers = workers
+        self.shard_dir = Path(shard_dir)
+        self.tree_learner = tree_learner
+        self.time_out = time_out
+        self.target = target
+        self.chunk_size = chunk_size
+        self.balancing_strategy = balancing_strategy
+        self.validation_fraction = validation_fraction
+        self.validation_path = None
+        self.worker_stats_ = []
+
+    @classmethod
+    def from_config(cls, config, params, shard_dir=SHARD_DIR, workers=None):
+        distributed_config = config["distributed_training"]
+        return cls(params, workers=workers or distributed_config["workers"], shard_dir=shard_dir,
+                   tree_learner=distributed_config["tree_learner"],
+                   time_out=distributed_config["time_out_minutes"], chunk_size=distributed_config["chunk_size"],
+                   balancing_strategy=config["data_processing"].get("balancing", {}).get("strategy"),
+                   validation_fraction=config.get("evaluation", {}).get("validation_fraction", 0.0))
+
+    def _shard(self, train_path, count, suffix):
+        """
+        Writes every `count`-th training row (offset by rank) to each shard
+        and the validation rows to their own file. Returns the shard names and
+        the training labels.
+        """
+        shutil.rmtree(self.shard_dir, ignore_errors=True)
+        names = [f"part-{rank:05d}{suffix}" for rank in range(count)]
+        writers = [ChunkWriter(self.shard_dir / name) for name in names]
+        stride = round(1 / self.validation_fraction) if self.validation_fraction else 0
+        self.validation_path = self.shard_dir / f"{VALIDATION_NAME}{suffix}" if stride else None
+        validation = ChunkWriter(self.validation_path) if stride else None
+        labels = []
+        start = 0
+        try:
+            for chunk in iter_data(train_path, self.chunk_size):
+                chunk.columns = chunk.columns.str.replace('[^A-Za-z0-9_]+', '_', regex=True)
+                rows = np.arange(start, start + len(chunk))
+                held = rows % stride == stride - 1 if stride else np.zeros(len(chunk), dtype=bool)
+                # Training rows are striped by their position among training rows
+                ranks = (rows - (rows // stride if stride else 0)) % count
+                for rank, writer in enumerate(writers):
+                    writer.write(chunk[(ranks == rank) & ~held])
+                if validation is not None:
+                    validation.write(chunk[held])
+                labels.append(chunk[self.target].to_numpy()[~held])
+                start += len(chunk)
+        finally:
+            for writer in writers + ([validation] if validation is not None else []):
+                writer.close()
+        return names, np.concatenate(labels)
+
+    def prepare(self, train_path, machines=None):
+        """
+        Shards `train_path` and writes cluster.json. Without `machines`
+        ("host:port,..." with one entry per worker) the cluster is local.
+        """
+        try:
+            from src.class_balancing import lightgbm_balance_params
+            from src.hyperparameter_search import thread_budget
+
+            count = len(machines.split(",")) if machines else self.workers
+            started = time.perf_counter()
+            names, labels = self._shard(train_path, count, Path(train_path).suffix or ".csv")
+
+            params = dict(self.params, **lightgbm_balance_params(self.balancing_strategy, labels))
+            if not machines:
+                # Local workers share the machine's cores
+                params["n_jobs"] = thread_budget(count)[1]
+                machines = ",".join(f"127.0.0.1:{port}" for port in _free_ports(count))
+            write_json(self.shard_dir / CLUSTER_FILE, {
+                "machines": machines, "shards": names, "target": self.target, "rows": int(len(labels)),
+                "tree_learner": self.tree_learner, "time_out": self.time_out, "params": params
+            }, default=float)
+            logger.info(f"Sharded {len(labels)} rows of {train_path} into {count} shards in "
+                        f"{time.perf_counter() - started:.1f}s")
+            return machines
+
+        except Exception as e:
+            logger.error(f"Error while sharding training data {e}")
+            raise CustomException("Failed to prepare distributed training", sys)
+
+    def train(self, train_path):
+        try:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            machines = self.prepare(train_path)
+            logger.info(f"Training on {self.workers} local workers ({self.tree_learner} parallel) at {machines}")
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=self.workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                futures = [pool.submit(_run_worker, str(self.shard_dir), rank) for rank in range(self.workers)]
+                results = [future.result() for future in futures]
+
+            model = results[0][0]
+            self.worker_stats_ = [stats for _, stats in results]
+            for stats in self.worker_stats_:
+                logger.info(f"Worker {stats['rank']}: {stats['rows']} rows, loaded in {stats['load_seconds']:.1f}s, "
+                            f"fitted in {stats['fit_seconds']:.1f}s")
+            logger.info(f"Distributed training finished in {time.perf_counter() - started:.1f}s")
+            return model
+
+        except CustomException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in distributed training {e}")
+            raise CustomException("Failed during distributed training", sys)
+
+
+if __name__ == "__main__":
+    import joblib
+    from config.model_params import DISTRIBUTED_LIGHTGBM_PARAMS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name in ("train", "prepare"):
+        command = commands.add_parser(name)
+        command.add_argument("--train", default=str(PROCESSED_TRAIN_DATA_PATH))
+        command.add_argument("--workers", type=int, default=None)
+    commands.choices["train"].add_argument("--output", default=str(MODEL_OUTPUT))
+    commands.choices["prepare"].add_argument("--machines", required=True, help="host:port of every worker")
+    worker = commands.add_parser("worker")
+    worker.add_argument("--rank", type=int, required=True)
+    worker.add_argument("--shards", default=str(SHARD_DIR))
+    worker.add_argument("--output", default=str(MODEL_OUTPUT))
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        model, stats = train_shard(args.shards, args.rank)
+        if args.rank == 0:
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+            joblib.dump(model, args.output)
+        print(stats)
+    else:
+        trainer = DistributedTrainer.from_config(read_yaml(CONFIG_PATH), DISTRIBUTED_LIGHTGBM_PARAMS,
+                                                 workers=args.workers)
+        if args.command == "prepare":
+            trainer.prepare(args.train, args.machines)
+        else:
+            model = trainer.train(args.train)
+            os.makedirs(os.path.dirname(args.output), exist_ok=True)
+            joblib.dump(model, args.output)
+            print(trainer.worker_stats_)
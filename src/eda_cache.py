@@ -0,0 +1,148 @@
+import hashlib
+import json
+import os
+import sys
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+EDA_COLUMNS = ["avg_price_per_room", "market_segment_type", "arrival_month", "booking_status"]
+CACHE_VERSION = 1
+TAIL_BYTES = 4096
+
+
+class EDAAggregates:
+    """
+    Keeps the value counts behind the dashboard's EDA figures in a small JSON
+    cache next to the raw data.
+
+    `refresh()` is cheap when the data file has not changed. When rows were
+    appended, only the new bytes are parsed and merged into the counts; any
+    other change triggers a full recount in chunks.
+    """
+
+    def __init__(self, data_path, cache_path, chunk_size=200000):
+        self.data_path = data_path
+        self.cache_path = cache_path
+        self.chunk_size = chunk_size
+
+        self.counts = {}
+        self.signature = {}
+        self.version = 0
+
+        # The cache is read on the first refresh, so constructing this at
+        # import time costs nothing until the EDA figures are requested
+        self._cache_loaded = False
+
+    def _load_cache(self):
+        import pandas as pd
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r") as cache_file:
+                cached = json.load(cache_file)
+            if cached.get("version") != CACHE_VERSION:
+                return
+            self.signature = cached["signature"]
+            self.counts = {column: pd.Series(values["counts"], index=values["values"], dtype="int64")
+                           for column, values in cached["counts"].items()}
+            self.version += 1
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable EDA cache {self.cache_path}: {e}")
+
+    def _save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        payload = {
+            "version": CACHE_VERSION,
+            "signature": self.signature,
+            "counts": {column: {"values": series.index.tolist(), "counts": series.tolist()}
+                       for column, series in self.counts.items()}
+        }
+        temp_path = f"{self.cache_path}.tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump(payload, cache_file)
+        os.replace(temp_path, self.cache_path)
+
+    @staticmethod
+    def _tail_hash(data_file, offset):
+        start = max(0, offset - TAIL_BYTES)
+        data_file.seek(start)
+        return hashlib.sha1(data_file.read(offset - start)).hexdigest()
+
+    def _count_chunks(self, chunks, counts):
+        for chunk in chunks:
+            for column in EDA_COLUMNS:
+                chunk_counts = chunk[column].value_counts()
+                counts[column] = chunk_counts if column not in counts else counts[column].add(chunk_counts, fill_value=0)
+        return {column: series.astype("int64") for column, series in counts.items()}
+
+    def refresh(self):
+        """
+        Brings the aggregates up to date with the data file.
+        Returns True when the counts changed.
+        """
+        import pandas as pd
+        if not self._cache_loaded:
+            self._load_cache()
+            self._cache_loaded = True
+        try:
+            stat = os.stat(self.data_path)
+            if self.signature.get("size") == stat.st_size and self.signature.get("mtime_ns") == stat.st_mtime_ns:
+                return False
+
+            with open(self.data_path, "rb") as data_file:
+                header = data_file.readline()
+                offset = self.signature.get("offset", 0)
+
+                appended = (
+                    self.counts
+                    and self.signature.get("header") == hashlib.sha1(header).hexdigest()
+                    and 0 < offset <= stat.st_size
+                    and self._tail_hash(data_file, offset) == self.signature.get("tail")
+                )
+
+                if appended:
+                    logger.info(f"Updating EDA aggregates with rows appended to {self.data_path}")
+                    data_file.seek(offset)
+                    columns = header.decode().strip().split(",")
+                    chunks = pd.read_csv(data_file, header=None, names=columns, usecols=EDA_COLUMNS,
+                                         chunksize=self.chunk_size)
+                    counts = self._count_chunks(chunks, dict(self.counts))
+                else:
+                    logger.info(f"Computing EDA aggregates from {self.data_path}")
+                    data_file.seek(0)
+                    chunks = pd.read_csv(data_file, usecols=EDA_COLUMNS, chunksize=self.chunk_size)
+                    counts = self._count_chunks(chunks, {})
+
+                # A file that does not end in a newline may have a partially
+                # written last row, so the next change forces a full recount
+                end = data_file.seek(0, os.SEEK_END)
+                data_file.seek(max(0, end - 1))
+                processed = end if data_file.read(1) == b"\n" else 0
+
+                self.counts = counts
+                self.signature = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "offset": processed,
+                    "header": hashlib.sha1(header).hexdigest(),
+                    "tail": self._tail_hash(data_file, processed)
+                }
+
+            self.version += 1
+            self._save_cache()
+            return True
+
+        except Exception as e:
+            logger.error(f"Error while computing EDA aggregates {e}")
+            raise CustomException("Failed to compute EDA aggregates", sys)
+
+    def value_counts(self, column, sort_index=False):
+        """
+        Returns a two-column DataFrame shaped like `value_counts().reset_index()`.
+        """
+        import pandas as pd
+        series = self.counts[column]
+        series = series.sort_index() if sort_index else series.sort_values(ascending=False, kind="stable")
+        return pd.DataFrame({column: series.index, "count": series.to_numpy()})
@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+SELECTION_METHODS = ("random_forest", "lightgbm_gain", "mutual_info", "permutation")
+
+
+def data_hash(df):
+    """
+    Hashes the values, columns and dtypes of a frame; row order matters.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(json.dumps([[str(column), str(dtype)] for column, dtype in df.dtypes.items()]).encode())
+    return digest.hexdigest()
+
+
+def _subsample(X, y, sample_size, random_state):
+    if not sample_size or len(X) <= sample_size:
+        return X, y
+    rows = np.random.default_rng(random_state).choice(len(X), sample_size, replace=False)
+    rows.sort()
+    return X.iloc[rows], y.iloc[rows]
+
+
+def _bin_codes(values, n_bins):
+    """
+    Maps one column to small integer bins: low-cardinality columns keep one
+    bin per value, continuous ones are cut at quantiles.
+    """
+    uniques, codes = np.unique(values, return_inverse=True)
+    if len(uniques) <= n_bins:
+        return codes, len(uniques)
+    edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    return np.searchsorted(edges, values, side="right"), len(edges) + 1
+
+
+def mutual_info_histogram(X, y, n_bins=32):
+    """
+    Mutual information between each column and the label from joint
+    histograms. All columns are counted with a single bincount over
+    offset bin ids, so the cost is one pass over the data.
+    """
+    labels, y_codes = np.unique(np.asarray(y), return_inverse=True)
+    n_classes = len(labels)
+    n_rows = len(y_codes)
+
+    offsets, bins, all_codes = [], [], []
+    offset = 0
+    for column in X.columns:
+        codes, n_column_bins = _bin_codes(X[column].to_numpy(), n_bins)
+        all_codes.append(codes + offset)
+        offsets.append(offset)
+        bins.append(n_column_bins)
+        offset += n_column_bins
+
+    joint_ids = (np.stack(all_codes, axis=1) * n_classes + y_codes[:, None]).ravel()
+    joint = np.bincount(joint_ids, minlength=offset * n_classes).reshape(offset, n_classes) / n_rows
+    p_y = np.bincount(y_codes, minlength=n_classes) / n_rows
+
+    scores = []
+    for start, n_column_bins in zip(offsets, bins):
+        p_xy = joint[start:start + n_column_bins]
+        p_x = p_xy.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = p_xy * np.log(p_xy / (p_x * p_y))
+        scores.append(np.nansum(terms))
+    return np.asarray(scores)
+
+
+class FeatureSelector:
+    """
+    Ranks features by importance and keeps the top `n_features`.
+
+    `method` picks the scorer: the original random forest on all rows,
+    LightGBM gain on a subsample, histogram mutual information, or
+    permutation importance of a LightGBM model on a held-out sample.
+    Rankings are cached on disk by the hash of the data and the selector
+    settings, so rerunning preprocessing on unchanged data skips the fit.
+    """
+
+    def __init__(self, n_features, method="random_forest", sample_size=200000, n_jobs=-1,
+                 random_state=42, n_bins=32, cache_dir=None):
+        if method not in SELECTION_METHODS:
+            raise ValueError(f"Unknown feature selection method {method}, expected one of {SELECTION_METHODS}")
+        self.n_features = n_features
+        self.method = method
+        self.sample_size = sample_size
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.n_bins = n_bins
+        self.cache_dir = cache_dir
+
+        self.importances_ = None
+
+    @classmethod
+    def from_config(cls, config, cache_dir=None):
+        processing_config = config["data_processing"]
+        selection_config = processing_config.get("feature_selection", {})
+        return cls(processing_config["no_of_features"],
+                   selection_config.get("method", "random_forest"),
+                   selection_config.get("sample_size", 200000),
+                   selection_config.get("n_jobs", -1),
+                   selection_config.get("random_state", 42),
+                   selection_config.get("n_bins", 32),
+                   cache_dir if selection_config.get("cache", True) else None)
+
+    def _random_forest(self, X, y):
+        from sklearn.ensemble import RandomForestClassifier
+        model = RandomForestClassifier(random_state=self.random_state, n_jobs=self.n_jobs)
+        model.fit(X, y)
+        return model.feature_importances_
+
+    def _lightgbm(self, X, y, n_estimators=100):
+        import lightgbm as lgb
+        model = lgb.LGBMClassifier(n_estimators=n_estimators, importance_type="gain",
+                                   random_state=self.random_state, n_jobs=self.n_jobs, verbose=-1)
+        return model.fit(X, y)
+
+    def _lightgbm_gain(self, X, y):
+        X, y = _subsample(X, y, self.sample_size, self.random_state)
+        return self._lightgbm(X, y).feature_importances_
+
+    def _mutual_info(self, X, y):
+        X, y = _subsample(X, y, self.sample_size, self.random_state)
+        return mutual_info_histogram(X, y, self.n_bins)
+
+    def _permutation(self, X, y):
+        from sklearn.inspection import permutation_importance
+        from sklearn.model_selection import train_test_split
+
+        X, y = _subsample(X, y, self.sample_size, self.random_state)
+        X_fit, X_held, y_fit, y_held = train_test_split(X, y, test_size=0.25, stratify=y,
+                                                        random_state=self.random_state)
+        model = self._lightgbm(X_fit, y_fit)
+        result = permutation_importance(model, X_held, y_held, n_repeats=5, scoring="accuracy",
+                                        n_jobs=self.n_jobs, random_state=self.random_state)
+        return result.importances_mean
+
+    def _cache_path(self, df):
+        settings = json.dumps([self.method, self.sample_size, self.random_state, self.n_bins])
+        key = hashlib.sha256((data_hash(df) + settings).encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def rank(self, df, target="booking_status"):
+        """
+        Returns a DataFrame of features and importances, most important first.
+        """
+        try:
+            cache_path = self._cache_path(df) if self.cache_dir else None
+            if cache_path and os.path.exists(cache_path):
+                with open(cache_path, "r") as cache_file:
+                    cached = json.load(cache_file)
+                logger.info(f"Feature ranking loaded from cache {cache_path}")
+                self.importances_ = pd.DataFrame(cached)
+                return self.importances_
+
+            X = df.drop(columns=target)
+            y = df[target]
+            importance = getattr(self, f"_{self.method}")(X, y)
+
+            # Stable sort keeps column order for ties, so rankings are repeatable
+            self.importances_ = pd.DataFrame({"feature": X.columns, "importance": np.asarray(importance, dtype=float)}) \
+                .sort_values(by="importance", ascending=False, kind="stable").reset_index(drop=True)
+
+            if cache_path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(cache_path, "w") as cache_file:
+                    json.dump(self.importances_.to_dict(orient="list"), cache_file)
+            return self.importances_
+
+        except Exception as e:
+            logger.error(f"Error while ranking features with {self.method} {e}")
+            raise CustomException("Failed to rank features", sys)
+
+    def select(self, df, target="booking_status"):
+        return self.rank(df, target)["feature"].head(self.n_features).tolist()
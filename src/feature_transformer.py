@@ -0,0 +1,297 @@
+import json
+import math
+import os
+import sys
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+ARTIFACT_VERSION = 1
+
+
+def duplicated_rows(block):
+    """
+    Marks rows of a float block that repeat an earlier row, like
+    DataFrame.duplicated. Rows are compared by a 64-bit hash first and
+    hash matches are confirmed against the first occurrence, falling back
+    to an exact comparison in the (unlikely) case of a collision.
+    """
+    import pandas as pd
+    frame = pd.DataFrame(block, copy=False)
+    codes, _ = pd.factorize(pd.util.hash_pandas_object(frame, index=False).to_numpy())
+    _, first = np.unique(codes, return_index=True)
+    duplicated = first[codes] != np.arange(len(codes))
+
+    candidates = block[duplicated]
+    originals = block[first[codes[duplicated]]]
+    same = (candidates == originals) | (np.isnan(candidates) & np.isnan(originals))
+    if not same.all():
+        return frame.duplicated().to_numpy()
+    return duplicated
+
+
+class FeatureTransformer:
+    """
+    Holds the encodings learned by DataProcessor on the training split so the
+    exact same transform can be applied to the test split and at serving time.
+
+    Label codes follow LabelEncoder semantics (position in the sorted list of
+    classes) and log1p is applied to the columns whose skewness crossed the
+    configured threshold on the training data. The fitted state is saved as a
+    small versioned JSON artifact next to the model.
+    """
+
+    def __init__(self, categorical_columns, numerical_columns, skewness_threshold):
+        self.categorical_columns = list(categorical_columns)
+        self.numerical_columns = list(numerical_columns)
+        self.skewness_threshold = skewness_threshold
+
+        self.classes = {}
+        self.log_columns = []
+        self.feature_order = []
+        self._code_maps = {}
+        self._index_lookups = None
+
+    @classmethod
+    def from_config(cls, config):
+        processing_config = config["data_processing"]
+        return cls(processing_config["categorical_columns"],
+                   processing_config["numerical_columns"],
+                   processing_config["skewness_threshold"])
+
+    def fit(self, df):
+        self.fit_encode(df)
+        return self
+
+    def _build_lookups(self):
+        self._code_maps = {column: {label: float(code) for code, label in enumerate(classes)}
+                           for column, classes in self.classes.items()}
+        self._index_lookups = None
+
+    @property
+    def _lookups(self):
+        # pandas indexes for the DataFrame path, built on first use so a server
+        # that only sees dict records never has to import pandas
+        if self._index_lookups is None:
+            import pandas as pd
+            self._index_lookups = {column: pd.Index(classes) for column, classes in self.classes.items()}
+        return self._index_lookups
+
+    @property
+    def mappings(self):
+        return {column: {label: code for code, label in enumerate(classes)}
+                for column, classes in self.classes.items()}
+
+    def _encode_column(self, column, values):
+        """
+        Maps raw categories to their codes through the precomputed index.
+        Numeric input for a string-valued column is taken to be codes already,
+        which keeps older clients that post integer dropdown values working.
+        """
+        import pandas as pd
+        lookup = self._lookups[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Encode the handful of categories once, then gather by category code
+            category_codes = self._encode_column(column, pd.Series(values.cat.categories))
+            return np.append(category_codes, np.nan).take(values.cat.codes.to_numpy())
+
+        if lookup.dtype == object or pd.api.types.is_string_dtype(lookup.dtype):
+            if pd.api.types.is_numeric_dtype(values.dtype):
+                return values.to_numpy(dtype=np.float64)
+
+        codes = lookup.get_indexer(values).astype(np.float64)
+        codes[codes < 0] = np.nan
+        return codes
+
+    def _coerce_numeric(self, column, values, errors):
+        """
+        Converts an object column to floats, recording the values that are
+        present but not numbers in `errors` and leaving NaN in their place.
+        """
+        import pandas as pd
+        numeric = pd.to_numeric(values, errors="coerce")
+        invalid = numeric.isna().to_numpy() & values.notna().to_numpy()
+        if invalid.any():
+            errors.add_rows(np.flatnonzero(invalid), column, "not a number", values.to_numpy()[invalid])
+        return numeric
+
+    def _encode_block(self, df, columns, errors=None):
+        """
+        Fills one float64 block with every requested column: label codes for
+        categoricals (NaN when unknown), raw values otherwise, and log1p over
+        all skewed columns in a single ufunc call. With a RowErrors collector,
+        non-numeric values in numeric columns are recorded and left as NaN
+        instead of failing the whole block.
+        """
+        # Column-major so each column is written contiguously
+        block = np.empty((len(df), len(columns)), dtype=np.float64, order="F")
+        for position, column in enumerate(columns):
+            if column in self._lookups:
+                block[:, position] = self._encode_column(column, df[column])
+            else:
+                values = df[column]
+                if errors is not None and values.dtype.kind not in "biuf":
+                    values = self._coerce_numeric(column, values, errors)
+                block[:, position] = values.to_numpy(dtype=np.float64)
+
+        log_positions = [position for position, column in enumerate(columns) if column in self.log_columns]
+        if log_positions:
+            block[:, log_positions] = np.log1p(block[:, log_positions])
+        return block
+
+    def _to_frame(self, df, columns, block, rows=None):
+        """
+        Builds the encoded DataFrame from a block of `columns`, optionally
+        keeping only `rows`. Categoricals become int64 codes (-1 when unseen),
+        skewed columns stay float64 and other numeric columns get their
+        original dtype back; columns outside the block pass through.
+        """
+        encoded = {}
+        for position, column in enumerate(columns):
+            values = block[:, position]
+            if column in self._lookups:
+                unknown = np.isnan(values)
+                if unknown.any():
+                    logger.warning(f"{int(unknown.sum())} unseen categories in {column} encoded as -1")
+                    values[unknown] = -1
+                values = values.astype(np.int64)
+            elif column not in self.log_columns:
+                values = values.astype(df[column].dtype)
+            encoded[column] = values
+
+        import pandas as pd
+        index = df.index if rows is None else df.index[rows]
+        return pd.DataFrame({column: encoded[column] if column in encoded else
+                             (df[column].to_numpy() if rows is None else df[column].to_numpy()[rows])
+                             for column in df.columns}, index=index)
+
+    def encode(self, df):
+        """
+        Returns a copy of a DataFrame with every configured column encoded.
+        """
+        columns = [column for column in df.columns if column in self._lookups or column in self.log_columns]
+        return self._to_frame(df, columns, self._encode_block(df, columns))
+
+    def fit_encode(self, df):
+        """
+        Fits on a training frame and returns it encoded and deduplicated in a
+        single pass: every column is encoded into one block, duplicates are
+        found on that numeric block, and skewness is measured on the same
+        deduplicated block before log1p is applied to it in place.
+        """
+        import pandas as pd
+        try:
+            df = df[[column for column in df.columns if column not in ('Unnamed: 0', 'Booking_ID')]]
+
+            for column in self.categorical_columns:
+                self.classes[column] = sorted(pd.unique(df[column].dropna()).tolist())
+            self.log_columns = []
+            self._build_lookups()
+
+            columns = list(df.columns)
+            block = self._encode_block(df, columns)
+            rows = np.flatnonzero(~duplicated_rows(block))
+            block = block[rows]
+
+            numeric_positions = [columns.index(column) for column in self.numerical_columns]
+            skewness = pd.DataFrame(block[:, numeric_positions], columns=self.numerical_columns).skew()
+            self.log_columns = skewness[skewness > self.skewness_threshold].index.tolist()
+
+            log_positions = [columns.index(column) for column in self.log_columns]
+            if log_positions:
+                block[:, log_positions] = np.log1p(block[:, log_positions])
+
+            logger.info(f"Feature transformer fitted, log1p columns: {self.log_columns}")
+            return self._to_frame(df, columns, block, rows)
+
+        except Exception as e:
+            logger.error(f"Error while fitting feature transformer {e}")
+            raise CustomException("Failed to fit feature transformer", sys)
+
+    def transform(self, df, feature_names=None, errors=None):
+        """
+        Returns a contiguous float64 matrix with the requested features.
+        Unknown categories become NaN, which LightGBM treats as missing.
+        Invalid values are collected in `errors` (a RowErrors) when given.
+        """
+        return np.ascontiguousarray(self._encode_block(df, feature_names or self.feature_order, errors))
+
+    def transform_records(self, records, feature_names=None, errors=None):
+        """
+        Same result as `transform` for a few dict records, without building a
+        DataFrame; per-request pandas overhead dominates for single rows.
+        Missing or non-numeric values raise, or are recorded in `errors`.
+        """
+        feature_names = feature_names or self.feature_order
+        matrix = np.empty((len(records), len(feature_names)), dtype=np.float64)
+        log_columns = set(self.log_columns)
+
+        for position, column in enumerate(feature_names):
+            code_map = self._code_maps.get(column)
+            # Like `_encode_column`, an all-numeric column of string classes holds codes already
+            if code_map is not None and any(isinstance(label, str) for label in code_map):
+                if all(isinstance(record, dict) and isinstance(record.get(column), (int, float, np.number))
+                       for record in records):
+                    code_map = None
+            for row, record in enumerate(records):
+                try:
+                    value = record[column]
+                    if code_map is not None:
+                        value = code_map.get(value, math.nan)
+                    value = math.nan if value is None else float(value)
+                except (KeyError, TypeError, ValueError):
+                    if errors is None:
+                        raise
+                    missing = not isinstance(record, dict) or column not in record
+                    errors.add(row, column, "missing" if missing else "not a number",
+                               None if missing else record[column])
+                    value = math.nan
+                matrix[row, position] = math.log1p(value) if column in log_columns else value
+        return matrix
+
+    def save(self, path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            artifact = {
+                "version": ARTIFACT_VERSION,
+                "categorical_columns": self.categorical_columns,
+                "numerical_columns": self.numerical_columns,
+                "skewness_threshold": self.skewness_threshold,
+                "classes": self.classes,
+                "log_columns": self.log_columns,
+                "feature_order": self.feature_order
+            }
+            with open(path, "w") as artifact_file:
+                json.dump(artifact, artifact_file, indent=2)
+
+            logger.info(f"Preprocessing artifact saved to {path}")
+
+        except Exception as e:
+            logger.error(f"Error while saving preprocessing artifact {e}")
+            raise CustomException("Failed to save preprocessing artifact", sys)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, "r") as artifact_file:
+                artifact = json.load(artifact_file)
+
+            if artifact.get("version") != ARTIFACT_VERSION:
+                raise ValueError(f"Unsupported preprocessing artifact version {artifact.get('version')}")
+
+            transformer = cls(artifact["categorical_columns"],
+                              artifact["numerical_columns"],
+                              artifact["skewness_threshold"])
+            transformer.classes = artifact["classes"]
+            transformer.log_columns = artifact["log_columns"]
+            transformer.feature_order = artifact["feature_order"]
+            transformer._build_lookups()
+
+            logger.info(f"Preprocessing artifact loaded from {path}")
+            return transformer
+
+        except Exception as e:
+            logger.error(f"Error while loading preprocessing artifact {e}")
+            raise CustomException("Failed to load preprocessing artifact", sys)
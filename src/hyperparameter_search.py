@@ -0,0 +1,149 @@
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import lightgbm as lgb
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterSampler, train_test_split
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+
+def thread_budget(n_jobs, cpu_count=None):
+    """
+    Splits the cores between concurrent fits and LightGBM's own threads so
+    that workers x threads never exceeds the machine. n_jobs=-1 means one
+    worker per core.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    workers = cpu_count if n_jobs is None or n_jobs < 0 else max(1, min(n_jobs, cpu_count))
+    return workers, max(1, cpu_count // workers)
+
+
+class SuccessiveHalvingSearch:
+    """
+    Successive halving over the number of boosting rounds for LGBMClassifier.
+
+    Every sampled candidate is trained with a small round budget; only the best
+    1/factor of them move on to the next rung, where the budget is multiplied
+    by `factor`. Each fit early-stops on a held-out validation fold, and a
+    candidate that already stopped before its budget keeps its score instead
+    of being retrained. Candidates run in a thread pool (LightGBM releases the
+    GIL) with a fixed thread count per fit, so results do not depend on
+    scheduling.
+    """
+
+    def __init__(self, param_distributions, n_candidates=32, factor=3, min_resources=50,
+                 max_resources=1000, early_stopping_rounds=30, validation_fraction=0.2,
+                 scoring="accuracy", n_jobs=-1, random_state=42, fixed_params=None):
+        self.param_distributions = param_distributions
+        self.fixed_params = fixed_params or {}
+        self.n_candidates = n_candidates
+        self.factor = factor
+        self.min_resources = min_resources
+        self.max_resources = max_resources
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+        self.best_params_ = None
+        self.best_score_ = None
+        self.best_estimator_ = None
+        self.history_ = []
+
+    @classmethod
+    def from_params(cls, param_distributions, search_params, fixed_params=None):
+        return cls(param_distributions, fixed_params=fixed_params, **search_params)
+
+    def _estimator(self, params, n_estimators, threads):
+        return lgb.LGBMClassifier(
+            n_estimators=n_estimators, random_state=self.random_state, n_jobs=threads,
+            deterministic=True, verbose=-1, **self.fixed_params, **params
+        )
+
+    def _fit_candidate(self, candidate, budget, threads, X_fit, y_fit, X_val, y_val):
+        start = time.perf_counter()
+        params = candidate["params"]
+        model = self._estimator(params, budget, threads)
+        callbacks = []
+        # LightGBM does not support early stopping for dart boosting
+        if params.get("boosting_type", "gbdt") != "dart":
+            callbacks.append(lgb.early_stopping(self.early_stopping_rounds, verbose=False))
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], callbacks=callbacks)
+
+        best_iteration = model.best_iteration_ or budget
+        return {
+            "score": self._scorer(model, X_val, y_val),
+            "best_iteration": best_iteration,
+            # Stopped before the budget ran out: more rounds would not help
+            "converged": best_iteration + self.early_stopping_rounds <= budget,
+            "budget": budget,
+            "seconds": time.perf_counter() - start
+        }
+
+    def _rungs(self):
+        rungs = []
+        budget = self.min_resources
+        while budget < self.max_resources:
+            rungs.append(budget)
+            budget *= self.factor
+        rungs.append(self.max_resources)
+        return rungs
+
+    def fit(self, X, y):
+        try:
+            start = time.perf_counter()
+            workers, threads = thread_budget(self.n_jobs)
+            self._scorer = get_scorer(self.scoring)
+            X_fit, X_val, y_fit, y_val = train_test_split(
+                X, y, test_size=self.validation_fraction, stratify=y, random_state=self.random_state
+            )
+
+            sampler = ParameterSampler(self.param_distributions, self.n_candidates, random_state=self.random_state)
+            candidates = [{"id": index, "params": params, "result": None} for index, params in enumerate(sampler)]
+            rungs = self._rungs()
+            logger.info(f"Successive halving: {len(candidates)} candidates, round budgets {rungs}, "
+                        f"{workers} workers x {threads} LightGBM threads")
+
+            survivors = candidates
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for rung, budget in enumerate(rungs):
+                    pending = [candidate for candidate in survivors
+                               if candidate["result"] is None or not candidate["result"]["converged"]]
+                    futures = [executor.submit(self._fit_candidate, candidate, budget, threads,
+                                               X_fit, y_fit, X_val, y_val) for candidate in pending]
+                    for candidate, future in zip(pending, futures):
+                        candidate["result"] = future.result()
+
+                    # Ties are broken by candidate id so the ranking is reproducible
+                    survivors = sorted(survivors, key=lambda candidate: (-candidate["result"]["score"], candidate["id"]))
+                    for candidate in survivors:
+                        self.history_.append({"rung": rung, "id": candidate["id"], **candidate["result"]})
+                    logger.info(f"Rung {rung} ({budget} rounds): trained {len(pending)}, "
+                                f"best score {survivors[0]['result']['score']:.4f}")
+
+                    if rung < len(rungs) - 1:
+                        survivors = survivors[:max(1, math.ceil(len(survivors) / self.factor))]
+
+            best = survivors[0]
+            self.best_params_ = dict(best["params"], n_estimators=int(best["result"]["best_iteration"]))
+            self.best_score_ = best["result"]["score"]
+
+            # Refit on the full training data with the early-stopped round count
+            self.best_estimator_ = self._estimator(best["params"], self.best_params_["n_estimators"],
+                                                   workers * threads)
+            self.best_estimator_.fit(X, y)
+            self.best_estimator_.set_params(n_jobs=None)
+
+            logger.info(f"Successive halving finished in {time.perf_counter() - start:.1f}s, "
+                        f"validation {self.scoring} {self.best_score_:.4f}")
+            return self
+
+        except Exception as e:
+            logger.error(f"Error during successive halving search {e}")
+            raise CustomException("Failed on successive halving search", sys)
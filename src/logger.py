@@ -1,21 +1,205 @@
+"""
+Logging for the pipeline and the web apps.
+
+Loggers hand records to an in-memory queue and return; a background thread
+formats them and writes logs/log_<date>.log. Nothing on the calling thread
+waits for the disk, and the file name is re-evaluated as records are
+written, so a server running past midnight starts the next day's file.
+
+Settings come from the environment:
+
+    LOG_LEVEL=INFO        root level; calls below it return before any formatting
+    LOG_FORMAT=text       text, or json for one JSON object per line
+    LOG_QUEUE_SIZE=10000  records buffered for the writer; beyond this new
+                          records are dropped (and counted) instead of blocking
+
+Calls below the level are nearly free, but an f-string argument is still
+built; in hot loops use `logger.debug("... %s", value)` or guard with
+`logger.isEnabledFor(logging.DEBUG)`.
+"""
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import time
 
 from datetime import datetime
 
 LOGS_DIR = "logs"
-os.makedirs(LOGS_DIR, exist_ok=True)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000))
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s '
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def log_file_path(logs_dir=LOGS_DIR, when=None):
+    return os.path.join(logs_dir, f"log_{datetime.fromtimestamp(when or time.time()).strftime('%Y-%m-%d')}.log")
+
+
+LOG_FILE = log_file_path()
+
+
+class DailyFileHandler(logging.StreamHandler):
+    """
+    Appends to logs/log_<date>.log and switches files when a record from a
+    new day arrives. The date check is a single float comparison per record.
+    """
+
+    def __init__(self, logs_dir=LOGS_DIR):
+        super().__init__()
+        # StreamHandler defaults to stderr; the file is opened on the first record
+        self.stream = None
+        self.logs_dir = logs_dir
+        self.path = None
+        self._next_rollover = 0.0
+
+    def _open(self, created):
+        if self.stream is not None:
+            self.stream.close()
+        os.makedirs(self.logs_dir, exist_ok=True)
+        self.path = log_file_path(self.logs_dir, created)
+        self.stream = open(self.path, "a", encoding="utf-8")
+
+        day = datetime.fromtimestamp(created).replace(hour=0, minute=0, second=0, microsecond=0)
+        self._next_rollover = day.timestamp() + 24 * 3600
+
+    def emit(self, record):
+        if record.created >= self._next_rollover:
+            self._open(record.created)
+        super().emit(record)
+
+    def close(self):
+        with self.lock:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+        logging.Handler.close(self)
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line with time, level, logger and message, plus any
+    fields passed as `extra`.
+    """
+
+    def format(self, record):
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info:
+            payload["exception"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class NonBlockingHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that does no formatting on the calling thread and never
+    waits: when the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Arguments may be mutated after the call returns, so merge them now;
+        # the (much larger) formatting work is left to the writer thread
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _LogWriter:
+    """
+    Owns the queue and the writer thread behind the root logger's handler.
+    """
+
+    def __init__(self, handler, queue_size):
+        self.handler = handler
+        self.queue_size = queue_size
+        self.queue_handler = NonBlockingHandler(queue.Queue(queue_size))
+        self.listener = None
+
+    def start(self):
+        self.listener = logging.handlers.QueueListener(self.queue_handler.queue, self.handler,
+                                                       respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        self.handler.flush()
+
+    def after_fork(self):
+        # The writer thread does not survive fork; a pre-forked worker gets
+        # its own queue and thread (the queue's lock may be held mid-fork)
+        self.queue_handler.queue = queue.Queue(self.queue_size)
+        self.start()
+
+
+def configure_logging(level=LOG_LEVEL, log_format=LOG_FORMAT, logs_dir=LOGS_DIR, queue_size=LOG_QUEUE_SIZE):
+    """
+    Installs the non-blocking handler on the root logger. Called once on
+    import; calling it again replaces the previous setup.
+    """
+    global _writer
+
+    file_handler = DailyFileHandler(logs_dir)
+    file_handler.setFormatter(JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    root = logging.getLogger()
+    if _writer is not None:
+        root.removeHandler(_writer.queue_handler)
+        _writer.stop()
+        _writer.handler.close()
+
+    _writer = _LogWriter(file_handler, queue_size)
+    _writer.start()
+    root.addHandler(_writer.queue_handler)
+    root.setLevel(level)
+    return _writer.queue_handler
+
+
+def dropped_records():
+    return _writer.queue_handler.dropped if _writer is not None else 0
+
+
+def _stop_writer():
+    if _writer is not None:
+        _writer.stop()
+
+
+def _restart_writer_after_fork():
+    if _writer is not None:
+        _writer.after_fork()
 
-LOG_FILE = os.path.join(LOGS_DIR,f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
 
-logging.basicConfig(
-    filename= LOG_FILE,
-    format = '%(asctime)s - %(levelname)s - %(message)s ',
-    level = logging.INFO
+_writer = None
+configure_logging()
+atexit.register(_stop_writer)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_writer_after_fork)
 
-)
 
 def get_logger(name):
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    return logging.getLogger(name)
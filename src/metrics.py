@@ -0,0 +1,194 @@
+import bisect
+import threading
+import time
+
+# Prometheus text exposition format served by the /metrics endpoints
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; fine enough at the low end for sub-millisecond stages
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+ROW_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536)
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. `observe` is one bisect and two additions under
+    a lock, so it can sit on every request.
+    """
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        bucket = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bucket] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        for label_values, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, le)} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read from a callback at scrape time, e.g. cache or queue sizes.
+    The callback returns a number, or a dict of {label value: number} for
+    a single label.
+    """
+
+    def __init__(self, name, documentation, read, label_name=None):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.label_name = label_name
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        value = self.read()
+        if isinstance(value, dict):
+            for label_value, item in sorted(value.items()):
+                lines.append(f"{self.name}{_format_labels((self.label_name,), (label_value,))} {_format_value(item)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_format_value(value)}")
+        return lines
+
+
+class RequestTimer:
+    """
+    Times the stages of one request. Each `stage` call records the time
+    since the previous one, so the stage timings add up to the total.
+    """
+
+    __slots__ = ("metrics", "endpoint", "started", "last")
+
+    def __init__(self, metrics, endpoint):
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.started = self.last = time.perf_counter()
+
+    def stage(self, name):
+        now = time.perf_counter()
+        self.metrics.stage_seconds.observe(now - self.last, self.endpoint, name)
+        self.last = now
+
+    def finish(self, status=200, rows=None):
+        self.metrics.request_seconds.observe(time.perf_counter() - self.started, self.endpoint)
+        self.metrics.requests.inc(self.endpoint, str(status))
+        if rows is not None:
+            self.metrics.batch_rows.observe(rows, self.endpoint)
+
+
+class ServingMetrics:
+    """
+    Request metrics shared by the serving apps, rendered in the Prometheus
+    text format for GET /metrics.
+
+    Every request records its total latency, the time spent in each stage
+    (parse, features, predict, render), its status and the number of rows
+    it scored. Metrics are kept per process; behind gunicorn each scrape
+    sees the worker that answered it.
+    """
+
+    def __init__(self, prefix="hotel_reservation"):
+        self.request_seconds = Histogram(f"{prefix}_request_duration_seconds",
+                                         "End-to-end request latency.", ("endpoint",))
+        self.stage_seconds = Histogram(f"{prefix}_stage_duration_seconds",
+                                       "Time spent in each request stage.", ("endpoint", "stage"))
+        self.batch_rows = Histogram(f"{prefix}_batch_rows", "Reservations scored per request.",
+                                    ("endpoint",), buckets=ROW_BUCKETS)
+        self.requests = Counter(f"{prefix}_requests_total", "Requests by endpoint and status.",
+                                ("endpoint", "status"))
+        self.prefix = prefix
+        self.metrics = [self.request_seconds, self.stage_seconds, self.batch_rows, self.requests]
+
+    def timer(self, endpoint):
+        return RequestTimer(self, endpoint)
+
+    def add_gauge(self, name, documentation, read, label_name=None):
+        self.metrics.append(Gauge(f"{self.prefix}_{name}", documentation, read, label_name))
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def watch_service(metrics, prediction_service):
+    """
+    Adds scrape-time gauges for a (Reloading)PredictionService: the model
+    version being served, prediction cache counters and dropped log records.
+    """
+    from src.logger import dropped_records
+
+    if hasattr(prediction_service, "version"):
+        metrics.add_gauge("model_info", "Model version being served (always 1).",
+                          lambda: {prediction_service.version: 1}, label_name="version")
+    if prediction_service.cache is not None:
+        cache = prediction_service.cache
+        metrics.add_gauge("prediction_cache_hits", "Prediction cache hits in this process.", lambda: cache.hits)
+        metrics.add_gauge("prediction_cache_misses", "Prediction cache misses in this process.", lambda: cache.misses)
+        metrics.add_gauge("prediction_cache_entries", "Entries in the prediction cache.", lambda: len(cache))
+    metrics.add_gauge("log_records_dropped", "Log records dropped because the log queue was full.",
+                      dropped_records)
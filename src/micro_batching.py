@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Upper bounds of the batch size histogram exposed in the metrics
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class Overloaded(Exception):
+    """
+    Raised when a request would push the queue past its row limit.
+    """
+
+
+class MicroBatcher:
+    """
+    Groups concurrent prediction requests into a single booster call.
+
+    Requests are queued with their feature rows. The collector takes the
+    first waiting request, then keeps adding requests for up to `max_wait_ms`
+    or until `max_batch_rows` rows are gathered, scores the stacked matrix on
+    a worker thread and hands every caller its own slice of the result.
+
+    Requests may name the `model` they must be scored with (any object
+    `predict` accepts as its second argument); requests for different models
+    are never stacked into one batch.
+
+    Backpressure: `submit` fails fast with Overloaded once `max_queue_rows`
+    rows are waiting, so overload turns into quick rejections instead of
+    ever-growing latency. A single request larger than `max_queue_rows` is
+    admitted when the queue is empty; the caller caps request size.
+    """
+
+    def __init__(self, predict, max_batch_rows=64, max_wait_ms=2.0, max_queue_rows=4096, predict_threads=1):
+        self.predict = predict
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_rows = max_queue_rows
+
+        self._executor = ThreadPoolExecutor(max_workers=predict_threads, thread_name_prefix="predict")
+        self._slots = asyncio.Semaphore(predict_threads)
+        self._pending = deque()
+        self._pending_rows = 0
+        self._wakeup = None
+        self._collector = None
+
+        self.requests = 0
+        self.completed = 0
+        self.rows = 0
+        self.batches = 0
+        self.rejected = 0
+        self.errors = 0
+        self.predict_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.batch_size_counts = [0] * (len(BATCH_SIZE_BUCKETS) + 1)
+
+    async def start(self):
+        self._wakeup = asyncio.Event()
+        self._collector = asyncio.create_task(self._collect())
+
+    async def stop(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    @property
+    def queue_rows(self):
+        return self._pending_rows
+
+    async def submit(self, matrix, model=None):
+        """
+        Queues a feature matrix and waits for its (labels, probabilities).
+        """
+        rows = matrix.shape[0]
+        # A request bigger than the whole queue still gets in when nothing is waiting
+        if self._pending_rows and self._pending_rows + rows > self.max_queue_rows:
+            self.rejected += 1
+            raise Overloaded(f"{self._pending_rows} rows already queued")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((matrix, future, time.perf_counter(), model))
+        self._pending_rows += rows
+        self.requests += 1
+        self._wakeup.set()
+        return await future
+
+    def _take_batch(self):
+        items, rows = [], 0
+        while self._pending:
+            matrix, model = self._pending[0][0], self._pending[0][3]
+            if items and (rows + matrix.shape[0] > self.max_batch_rows or model is not items[0][3]):
+                break
+            items.append(self._pending.popleft())
+            rows += matrix.shape[0]
+            self._pending_rows -= matrix.shape[0]
+        return items, rows
+
+    async def _collect(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            while self._pending:
+                # Give other requests a moment to arrive unless the batch is already full
+                deadline = self._pending[0][2] + self.max_wait
+                while self._pending_rows < self.max_batch_rows and time.perf_counter() < deadline:
+                    await asyncio.sleep(min(deadline - time.perf_counter(), 0.0005))
+
+                await self._slots.acquire()
+                items, rows = self._take_batch()
+                asyncio.create_task(self._score(items, rows))
+
+    async def _score(self, items, rows):
+        try:
+            started = time.perf_counter()
+            matrix = items[0][0] if len(items) == 1 else np.vstack([item[0] for item in items])
+            model = items[0][3]
+            arguments = (matrix,) if model is None else (matrix, model)
+            labels, probabilities = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.predict, *arguments
+            )
+
+            self.batches += 1
+            self.rows += rows
+            self.predict_seconds += time.perf_counter() - started
+            self.batch_size_counts[np.searchsorted(BATCH_SIZE_BUCKETS, rows)] += 1
+
+            offset = 0
+            for item_matrix, future, queued, _ in items:
+                end = offset + item_matrix.shape[0]
+                self.wait_seconds += started - queued
+                self.completed += 1
+                if not future.done():
+                    future.set_result((labels[offset:end], probabilities[offset:end]))
+                offset = end
+
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error while scoring a batch of {rows} rows {e}")
+            for _, future, _, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "batches": self.batches,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "queue_rows": self._pending_rows,
+            "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            "mean_queue_wait_ms": 1000 * self.wait_seconds / self.completed if self.completed else 0.0,
+            "mean_predict_ms": 1000 * self.predict_seconds / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {
+                **{f"le_{bound}": count for bound, count in zip(BATCH_SIZE_BUCKETS, self.batch_size_counts)},
+                "gt_max": self.batch_size_counts[-1]
+            }
+        }
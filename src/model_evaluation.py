@@ -0,0 +1,335 @@
+"""
+Threshold, curve and calibration evaluation of a binary classifier.
+
+    python -m src.model_evaluation [--model artifacts/models/lgbm_model.pkl]
+                                   [--test artifacts/processed/processed_test.parquet]
+                                   [--output artifacts/models/evaluation.json] [--engine compiled]
+
+Re-evaluates a saved model on the processed test split and writes the
+report ModelTraining saves next to the model. The operating threshold is
+kept from the existing report (it was selected on validation data), unless
+--threshold is given.
+"""
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from config.paths_config import *
+
+logger = get_logger(__name__)
+
+THRESHOLD_METRICS = ("f1", "accuracy", "youden")
+DEFAULT_THRESHOLD = 0.5
+# Scores are binned this many rows at a time to bound temporary memory
+EVALUATION_CHUNK_ROWS = 1000000
+# Bootstrap replicates resampled together (and sent to a worker) at once
+BOOTSTRAP_BLOCK = 250
+
+
+def operating_threshold(path, default=DEFAULT_THRESHOLD):
+    """
+    The threshold saved in an evaluation report, or `default` when there
+    is no report (models trained before reports existed).
+    """
+    if path is None or not os.path.exists(path):
+        return default
+    with open(path, "r") as report_file:
+        return float(json.load(report_file).get("operating_threshold", default))
+
+
+def grid_metrics(counts):
+    """
+    Confusion matrix and metrics at every grid threshold from per-bin row
+    counts of shape (..., 2, thresholds), negatives first. Leading axes are
+    kept, so one call handles a whole block of bootstrap replicates. ROC AUC
+    and average precision are NaN (undefined) where only one class is
+    present.
+    """
+    # Rows in bin j are predicted positive at every threshold k <= j
+    fp = np.cumsum(counts[..., 0, ::-1], axis=-1)[..., ::-1]
+    tp = np.cumsum(counts[..., 1, ::-1], axis=-1)[..., ::-1]
+    negatives, positives = fp[..., :1], tp[..., :1]
+    tn, fn = negatives - fp, positives - tp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        predicted = tp + fp
+        precision = np.where(predicted > 0, tp / predicted, 1.0)
+        recall = np.nan_to_num(tp / positives)
+        fpr = np.nan_to_num(fp / negatives)
+        f1 = np.nan_to_num(2 * tp / (positives + predicted))
+        accuracy = np.nan_to_num((tp + tn) / (positives + negatives))
+
+    # Curves run from threshold 0 (everything positive) to (0, 0) past the last bin
+    end = np.zeros(recall.shape[:-1] + (1,))
+    fpr_end, recall_end = np.concatenate([fpr, end], axis=-1), np.concatenate([recall, end], axis=-1)
+    roc_auc = np.sum(-np.diff(fpr_end, axis=-1) * (recall_end[..., :-1] + recall_end[..., 1:]) / 2, axis=-1)
+    average_precision = np.sum(-np.diff(recall_end, axis=-1) * precision, axis=-1)
+    both_classes = (negatives[..., 0] > 0) & (positives[..., 0] > 0)
+    roc_auc = np.where(both_classes, roc_auc, np.nan)
+    average_precision = np.where(both_classes, average_precision, np.nan)
+
+    return {"tp": tp, "fp": fp, "tn": tn, "fn": fn, "precision": precision, "recall": recall, "fpr": fpr,
+            "f1": f1, "accuracy": accuracy, "youden": recall - fpr,
+            "roc_auc": roc_auc, "average_precision": average_precision}
+
+
+def _bootstrap_block(counts, sum_p, sum_p2, calibration_map, threshold_metric, threshold_index, replicates, seed):
+    """
+    Resamples the test rows `replicates` times and returns the metrics of
+    each replicate. Drawing the rows with replacement only changes how many
+    land in each (label, bin) cell, so the cell counts are drawn from the
+    equivalent multinomial directly and the cost does not depend on the
+    number of rows.
+    """
+    rng = np.random.default_rng(seed)
+    total = int(counts.sum())
+    resampled = rng.multinomial(total, counts.ravel() / total, size=replicates).reshape((replicates,) + counts.shape)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_p = np.where(counts > 0, sum_p / counts, 0.0)
+        mean_p2 = np.where(counts > 0, sum_p2 / counts, 0.0)
+    curves = grid_metrics(resampled)
+    brier = (np.sum(resampled * mean_p2, axis=(-2, -1)) - 2 * np.sum(resampled[:, 1] * mean_p[1], axis=-1)
+             + resampled[:, 1].sum(axis=-1)) / total
+    calibration = _calibration_error(resampled @ calibration_map, (resampled * mean_p) @ calibration_map, total)
+
+    sampled = {"roc_auc": curves["roc_auc"], "average_precision": curves["average_precision"],
+               "brier": brier, "calibration_error": calibration,
+               "threshold": np.argmax(curves[threshold_metric], axis=-1) / (counts.shape[-1] - 1)}
+    for name in ("accuracy", "precision", "recall", "f1"):
+        sampled[name] = curves[name][:, threshold_index]
+    return sampled
+
+
+def _calibration_error(counts, sum_p, total):
+    """
+    Expected calibration error from per-bin counts and score sums of shape
+    (..., 2, bins): the row-weighted gap between mean score and positive rate.
+    """
+    rows = counts.sum(axis=-2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gap = np.abs(np.nan_to_num(sum_p.sum(axis=-2) / rows) - np.nan_to_num(counts[..., 1, :] / rows))
+    return np.sum(rows * gap, axis=-1) / total
+
+
+class ThresholdEvaluator:
+    """
+    Evaluates predicted probabilities at a whole grid of thresholds at once.
+
+    `add` bins the scores into `thresholds` equal steps between 0 and 1
+    and keeps, per label and bin, the row count and the sum of the scores
+    and squared scores. Everything in the report is computed from those
+    few thousand numbers: a confusion matrix per threshold from cumulative
+    counts, the ROC and precision-recall curves and their areas on the grid,
+    calibration bins, the Brier score, and bootstrap confidence intervals.
+    Binning is a single vectorized pass, so tens of millions of rows take
+    seconds, and `add` can be called chunk by chunk for data that does not
+    fit in memory.
+    """
+
+    def __init__(self, thresholds=1001, calibration_bins=10, threshold_metric="f1", bootstrap_samples=1000,
+                 confidence=0.95, workers=1, seed=42):
+        if threshold_metric not in THRESHOLD_METRICS:
+            raise ValueError(f"threshold_metric must be one of {THRESHOLD_METRICS}, got {threshold_metric}")
+        self.thresholds = thresholds
+        self.calibration_bins = calibration_bins
+        self.threshold_metric = threshold_metric
+        self.bootstrap_samples = bootstrap_samples
+        self.confidence = confidence
+        self.workers = workers
+        self.seed = seed
+        self.grid = np.linspace(0.0, 1.0, thresholds)
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config):
+        evaluation_config = config.get("evaluation", {})
+        return cls(thresholds=evaluation_config.get("thresholds", 1001),
+                   calibration_bins=evaluation_config.get("calibration_bins", 10),
+                   threshold_metric=evaluation_config.get("threshold_metric", "f1"),
+                   bootstrap_samples=evaluation_config.get("bootstrap_samples", 1000),
+                   confidence=evaluation_config.get("confidence", 0.95),
+                   workers=evaluation_config.get("workers", 1),
+                   seed=evaluation_config.get("seed", 42))
+
+    def reset(self):
+        self.counts = np.zeros((2, self.thresholds), dtype=np.int64)
+        self.sum_p = np.zeros((2, self.thresholds))
+        self.sum_p2 = np.zeros((2, self.thresholds))
+
+    def add(self, y_true, probabilities):
+        """
+        Adds a chunk of labels (1 = positive class) and positive-class
+        probabilities. Returns self.
+        """
+        y_true = np.asarray(y_true).astype(bool, copy=False)
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if y_true.shape != probabilities.shape:
+            raise ValueError(f"Got {len(y_true)} labels for {len(probabilities)} probabilities")
+
+        for start in range(0, len(probabilities), EVALUATION_CHUNK_ROWS):
+            p = probabilities[start:start + EVALUATION_CHUNK_ROWS]
+            # Cell index label * thresholds + bin, with bin j holding scores in [t_j, t_j+1)
+            cells = np.clip((p * (self.thresholds - 1)).astype(np.int64), 0, self.thresholds - 1)
+            cells += y_true[start:start + EVALUATION_CHUNK_ROWS] * self.thresholds
+            size = 2 * self.thresholds
+            self.counts += np.bincount(cells, minlength=size).reshape(2, -1)
+            self.sum_p += np.bincount(cells, weights=p, minlength=size).reshape(2, -1)
+            self.sum_p2 += np.bincount(cells, weights=p * p, minlength=size).reshape(2, -1)
+        return self
+
+    def _calibration_map(self):
+        # One-hot (thresholds, calibration_bins) matrix merging grid bins into calibration bins
+        coarse = np.minimum(np.arange(self.thresholds) * self.calibration_bins // (self.thresholds - 1),
+                            self.calibration_bins - 1)
+        return np.eye(self.calibration_bins)[coarse]
+
+    def _index(self, threshold):
+        return int(np.clip(np.rint(threshold * (self.thresholds - 1)), 0, self.thresholds - 1))
+
+    def select_threshold(self, y_true, probabilities):
+        """
+        The grid threshold that maximizes `threshold_metric` on held-out rows
+        that are not the test set, e.g. a validation slice of the training
+        data. Falls back to 0.5 when those rows have a single class.
+        """
+        counts = ThresholdEvaluator(self.thresholds, threshold_metric=self.threshold_metric).add(
+            y_true, probabilities).counts
+        if not counts.sum(axis=1).all():
+            logger.warning(f"Validation rows have a single class, using threshold {DEFAULT_THRESHOLD}")
+            return DEFAULT_THRESHOLD
+        return float(self.grid[np.argmax(grid_metrics(counts)[self.threshold_metric])])
+
+    def bootstrap(self, threshold_index):
+        """
+        Percentile confidence intervals of the headline metrics over
+        `bootstrap_samples` resamples of the test rows, with the metrics at
+        threshold_index held at that threshold. Blocks of replicates run on
+        `workers` processes; each block has its own seed, so the intervals
+        do not depend on the number of workers.
+        """
+        blocks = [(self.counts, self.sum_p, self.sum_p2, self._calibration_map(), self.threshold_metric,
+                   threshold_index, min(BOOTSTRAP_BLOCK, self.bootstrap_samples - start), [self.seed, index])
+                  for index, start in enumerate(range(0, self.bootstrap_samples, BOOTSTRAP_BLOCK))]
+        if self.workers <= 1 or len(blocks) == 1:
+            results = [_bootstrap_block(*block) for block in blocks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(blocks))) as pool:
+                results = list(pool.map(_bootstrap_block, *zip(*blocks)))
+
+        tail = 100 * (1 - self.confidence) / 2
+        intervals = {}
+        for name in results[0]:
+            # Replicates where the metric is undefined (a single class) are left out
+            values = np.concatenate([result[name] for result in results])
+            values = values[~np.isnan(values)]
+            intervals[name] = np.percentile(values, [tail, 100 - tail]).tolist() if len(values) else None
+        return intervals
+
+    def report(self, threshold=None):
+        """
+        The evaluation report as a JSON-ready dict. "metrics" are taken at
+        `threshold`, normally one from `select_threshold`, and
+        "default_threshold_metrics" at 0.5 for comparison. Without a
+        threshold the one maximizing `threshold_metric` on these rows is
+        used, which flatters the metrics when these rows are the test set.
+        ROC AUC and average precision are None when only one class is
+        present.
+        """
+        total = int(self.counts.sum())
+        if total == 0:
+            raise ValueError("No predictions were added to the evaluator")
+
+        curves = grid_metrics(self.counts)
+        if threshold is None:
+            threshold_index = int(np.argmax(curves[self.threshold_metric]))
+        else:
+            threshold_index = self._index(threshold)
+        default_index = self._index(DEFAULT_THRESHOLD)
+        calibration_map = self._calibration_map()
+        calibration_counts = self.counts @ calibration_map
+        calibration_sums = self.sum_p @ calibration_map
+
+        def at(index):
+            return {name: float(curves[name][index]) for name in ("accuracy", "precision", "recall", "f1")}
+
+        metrics = dict(at(threshold_index),
+                       roc_auc=None if np.isnan(curves["roc_auc"]) else float(curves["roc_auc"]),
+                       average_precision=None if np.isnan(curves["average_precision"])
+                       else float(curves["average_precision"]),
+                       brier=float((self.sum_p2.sum() - 2 * self.sum_p[1].sum() + self.counts[1].sum()) / total),
+                       calibration_error=float(_calibration_error(calibration_counts, calibration_sums, total)))
+
+        calibration = []
+        edges = np.linspace(0.0, 1.0, self.calibration_bins + 1)
+        for position in range(self.calibration_bins):
+            rows = int(calibration_counts[:, position].sum())
+            calibration.append({"bin": [round(float(edges[position]), 6), round(float(edges[position + 1]), 6)],
+                                "count": rows,
+                                "mean_predicted": float(calibration_sums[:, position].sum() / rows) if rows else None,
+                                "observed_rate": float(calibration_counts[1, position] / rows) if rows else None})
+
+        intervals = self.bootstrap(threshold_index) if self.bootstrap_samples else {}
+        if threshold is not None:
+            # The threshold was not chosen on these rows, so it has no sampling interval here
+            intervals.pop("threshold", None)
+
+        report = {
+            "rows": total,
+            "positives": int(self.counts[1].sum()),
+            "threshold_metric": self.threshold_metric,
+            "threshold_selected_on": "test" if threshold is None else "validation",
+            "operating_threshold": float(self.grid[threshold_index]),
+            "metrics": metrics,
+            "default_threshold_metrics": at(default_index),
+            "confidence": self.confidence,
+            "confidence_intervals": intervals,
+            "calibration": calibration,
+            "curves": {"threshold": self.grid.tolist(),
+                       **{name: curves[name].tolist()
+                          for name in ("tp", "fp", "tn", "fn", "precision", "recall", "fpr", "f1")}}
+        }
+        logger.info(f"Operating threshold {report['operating_threshold']:.3f} by {self.threshold_metric} "
+                    f"on {total} rows: {metrics}")
+        return report
+
+    def evaluate(self, y_true, probabilities, threshold=None):
+        """
+        Resets the evaluator, adds all rows and returns the report at
+        `threshold` (see `report`).
+        """
+        try:
+            self.reset()
+            return self.add(y_true, probabilities).report(threshold)
+        except Exception as e:
+            logger.error(f"Error while evaluating predictions {e}")
+            raise CustomException("Failed to evaluate predictions", sys)
+
+
+if __name__ == "__main__":
+    from src.prediction_service import PredictionService
+    from utils.common_functions import load_data, read_yaml, write_json
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=str(MODEL_OUTPUT))
+    parser.add_argument("--test", default=str(PROCESSED_TEST_DATA_PATH))
+    parser.add_argument("--output", default=str(EVALUATION_OUTPUT))
+    parser.add_argument("--engine", default="compiled", choices=["sklearn", "compiled"])
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Operating threshold (default: the one in the existing report)")
+    args = parser.parse_args()
+    threshold = args.threshold if args.threshold is not None else operating_threshold(args.output, None)
+
+    service = PredictionService(args.model, engine=args.engine, compiled_path=COMPILED_MODEL_OUTPUT)
+    test_df = load_data(args.test)
+    test_df.columns = test_df.columns.str.replace('[^A-Za-z0-9_]+', '_', regex=True)
+    probabilities = service.predict_proba(test_df[service.feature_names].to_numpy(dtype=np.float64))
+
+    report = ThresholdEvaluator.from_config(read_yaml(CONFIG_PATH)).evaluate(
+        test_df["booking_status"].to_numpy() == service.classes[1], probabilities, threshold)
+    write_json(args.output, report)
+    print(json.dumps({"operating_threshold": report["operating_threshold"], **report["metrics"]}, indent=2))
@@ -0,0 +1,212 @@
+import argparse
+import hashlib
+import os
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from src.model_evaluation import operating_threshold
+from config.paths_config import *
+from utils.common_functions import read_json, write_json, read_yaml
+
+logger = get_logger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+VERSION_PATTERN = re.compile(r"^v(\d+)$")
+
+# Files a version may hold, stored under fixed names inside the version dir
+ARTIFACT_NAMES = {"model": "model.pkl", "preprocessor": "preprocessor.json", "compiled": "model_compiled.npz",
+                  "evaluation": "evaluation.json"}
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as artifact_file:
+        for block in iter(lambda: artifact_file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    Local versioned model store under artifacts/models/registry.
+
+    Every trained model becomes an immutable directory v0001, v0002, ... with
+    its artifacts and a manifest.json holding the metrics, parameters, feature
+    names, the operating threshold from the evaluation report and a SHA-256
+    checksum of each file. index.json names the active
+    version and the versions it replaced, which is what rollback walks back
+    through. Both the version directories and the index are written to a temp
+    path and renamed into place, so servers polling the index never see a
+    half-written version. Registering artifacts identical to an existing
+    version reuses that version instead of adding a copy.
+    """
+
+    def __init__(self, root=MODEL_REGISTRY_DIR, keep_versions=10):
+        self.root = Path(root)
+        self.keep_versions = keep_versions
+        self.index_path = self.root / "index.json"
+
+    @classmethod
+    def from_config(cls, config, root=MODEL_REGISTRY_DIR):
+        registry_config = config.get("model_registry", {})
+        return cls(root, registry_config.get("keep_versions", 10))
+
+    def index(self):
+        return read_json(self.index_path, default={"current": None, "history": []})
+
+    def current_version(self):
+        return self.index()["current"]
+
+    def versions(self):
+        if not self.root.exists():
+            return []
+        found = [entry.name for entry in self.root.iterdir()
+                 if VERSION_PATTERN.match(entry.name) and (entry / "manifest.json").exists()]
+        return sorted(found, key=lambda name: int(name[1:]))
+
+    def manifest(self, version):
+        manifest = read_json(self.root / version / "manifest.json")
+        if manifest is None:
+            raise ValueError(f"Unknown model version {version}")
+        return manifest
+
+    def paths(self, version):
+        """
+        Absolute paths of the artifacts stored for a version.
+        """
+        return {kind: str(self.root / version / name)
+                for kind, name in ARTIFACT_NAMES.items() if kind in self.manifest(version)["files"]}
+
+    def verify(self, version):
+        manifest = self.manifest(version)
+        for kind, expected in manifest["files"].items():
+            path = self.root / version / ARTIFACT_NAMES[kind]
+            if not path.exists() or file_sha256(path) != expected["sha256"]:
+                raise ValueError(f"Checksum mismatch for {kind} of model version {version}")
+        return manifest
+
+    def find(self, checksums):
+        """
+        The newest version whose files have exactly these SHA-256 checksums.
+        """
+        for version in reversed(self.versions()):
+            files = self.manifest(version)["files"]
+            if {kind: entry["sha256"] for kind, entry in files.items()} == checksums:
+                return version
+        return None
+
+    def _next_version(self):
+        versions = self.versions()
+        number = int(versions[-1][1:]) + 1 if versions else 1
+        return f"v{number:04d}"
+
+    def register(self, model_path, preprocessor_path=None, compiled_path=None, metrics=None, params=None,
+                 feature_names=None, activate=True, evaluation_path=None):
+        try:
+            sources = {"model": model_path, "preprocessor": preprocessor_path, "compiled": compiled_path,
+                       "evaluation": evaluation_path}
+            sources = {kind: source for kind, source in sources.items()
+                       if source is not None and os.path.exists(source)}
+            existing = self.find({kind: file_sha256(source) for kind, source in sources.items()})
+            if existing is not None:
+                logger.info(f"Artifacts are already registered as model version {existing}")
+                if activate:
+                    self.activate(existing)
+                return existing
+
+            version = self._next_version()
+            temp_dir = self.root / f".{version}.tmp"
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            os.makedirs(temp_dir)
+
+            files = {}
+            for kind, source in sources.items():
+                destination = temp_dir / ARTIFACT_NAMES[kind]
+                shutil.copy2(source, destination)
+                files[kind] = {"sha256": file_sha256(destination), "bytes": destination.stat().st_size}
+
+            write_json(temp_dir / "manifest.json", {
+                "version": version,
+                "created": time.time(),
+                "files": files,
+                "metrics": metrics or {},
+                "params": params or {},
+                "feature_names": feature_names or [],
+                "threshold": operating_threshold(temp_dir / ARTIFACT_NAMES["evaluation"])
+            }, default=str)
+            os.replace(temp_dir, self.root / version)
+            logger.info(f"Registered model version {version} with {sorted(files)}")
+
+            if activate:
+                self.activate(version)
+            self.prune()
+            return version
+
+        except Exception as e:
+            logger.error(f"Error while registering model {model_path} {e}")
+            raise CustomException("Failed to register model version", sys)
+
+    def activate(self, version):
+        self.verify(version)
+        index = self.index()
+        if index["current"] == version:
+            return version
+        history = index["history"] + ([index["current"]] if index["current"] else [])
+        write_json(self.index_path, {"current": version, "history": history[-self.keep_versions:],
+                                     "updated": time.time()})
+        logger.info(f"Model version {version} is now active")
+        return version
+
+    def rollback(self, version=None):
+        """
+        Reactivates `version`, or the version that was active before the
+        current one. Returns the version now active.
+        """
+        index = self.index()
+        if version is None:
+            if not index["history"]:
+                raise ValueError("No previous model version to roll back to")
+            version = index["history"][-1]
+            self.verify(version)
+            write_json(self.index_path, {"current": version, "history": index["history"][:-1],
+                                         "updated": time.time()})
+            logger.info(f"Rolled back from model version {index['current']} to {version}")
+            return version
+        return self.activate(version)
+
+    def prune(self):
+        index = self.index()
+        protected = {index["current"], *index["history"]}
+        versions = self.versions()
+        for version in versions[:max(0, len(versions) - self.keep_versions)]:
+            if version not in protected:
+                shutil.rmtree(self.root / version, ignore_errors=True)
+                logger.info(f"Pruned model version {version}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect and manage the local model registry")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list")
+    commands.add_parser("register", help="Register the current artifacts/models files as a new version")
+    commands.add_parser("rollback").add_argument("version", nargs="?")
+    commands.add_parser("activate").add_argument("version")
+    args = parser.parse_args()
+
+    registry = ModelRegistry.from_config(read_yaml(CONFIG_PATH))
+    if args.command == "list":
+        current = registry.current_version()
+        for name in registry.versions():
+            marker = "*" if name == current else " "
+            print(f"{marker} {name}  {registry.manifest(name)['metrics']}")
+    elif args.command == "register":
+        print(registry.register(MODEL_OUTPUT, PREPROCESSOR_OUTPUT, COMPILED_MODEL_OUTPUT,
+                                evaluation_path=EVALUATION_OUTPUT))
+    elif args.command == "rollback":
+        print(registry.rollback(args.version))
+    else:
+        print(registry.activate(args.version))
@@ -0,0 +1,225 @@
+import os
+import sys
+import threading
+import time
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from src.prediction_service import PredictionService
+
+logger = get_logger(__name__)
+
+# Version label used when serving the plain artifacts/models files
+UNVERSIONED = "unversioned"
+
+
+class VersionCounters:
+    """
+    Request, latency and accuracy counters for one model version.
+    Accuracy is only known for predictions whose outcome was reported back.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.rows = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.labelled = 0
+        self.correct = 0
+        self.activated = time.time()
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "rows": self.rows,
+            "errors": self.errors,
+            "mean_latency_ms": 1000 * self.seconds / self.requests if self.requests else 0.0,
+            "labelled": self.labelled,
+            "accuracy": self.correct / self.labelled if self.labelled else None,
+            "activated": self.activated
+        }
+
+
+class ReloadingPredictionService:
+    """
+    Serves the active version of a ModelRegistry and swaps in new versions
+    without a restart.
+
+    A background thread polls the registry index. When the active version
+    changes, the new version's checksums are verified, the model is loaded
+    and warmed up on the side, and only then does one reference assignment
+    make it current; requests in flight keep the (version, service) pair
+    they started with, so nothing pauses or mixes versions. A version that
+    fails to load is logged and skipped, and the old model keeps serving.
+
+    Without any registered version the plain `fallback_model_path` artifacts
+    are served until one appears. The thread is restarted after fork, so it
+    also runs in every pre-forked gunicorn worker.
+    """
+
+    def __init__(self, registry, fallback_model_path, fallback_preprocessor_path=None, engine="sklearn",
+                 fallback_compiled_path=None, cache=None, poll_seconds=2.0, fallback_evaluation_path=None):
+        try:
+            self.registry = registry
+            self.engine = engine
+            self.cache = cache
+            self.poll_seconds = poll_seconds
+            self.fallback_paths = {"model": fallback_model_path, "preprocessor": fallback_preprocessor_path,
+                                   "compiled": fallback_compiled_path, "evaluation": fallback_evaluation_path}
+
+            self._lock = threading.Lock()
+            self._reload_lock = threading.Lock()
+            self._counters = {}
+            self._failed_version = None
+
+            version = registry.current_version()
+            self._active = self._load(version or UNVERSIONED)
+            self._start_watcher()
+            # Threads do not survive fork; each pre-forked worker needs its own watcher
+            if hasattr(os, "register_at_fork"):
+                os.register_at_fork(after_in_child=self._start_watcher)
+
+        except Exception as e:
+            logger.error(f"Error while loading the served model {e}")
+            raise CustomException("Failed to load model for serving", sys)
+
+    def _load(self, version):
+        if version == UNVERSIONED:
+            paths = self.fallback_paths
+        else:
+            self.registry.verify(version)
+            paths = self.registry.paths(version)
+
+        service = PredictionService(paths["model"], paths.get("preprocessor"), engine=self.engine,
+                                    compiled_path=paths.get("compiled"), cache=self.cache,
+                                    evaluation_path=paths.get("evaluation"))
+        # First call pays for lazy initialisation inside LightGBM; do it before going live
+        service.predict(np.zeros((1, len(service.feature_names))))
+        with self._lock:
+            self._counters.setdefault(version, VersionCounters())
+        return version, service
+
+    def _swap(self, version):
+        active = self._load(version)
+        if self.cache is not None:
+            self.cache.switch_model(active[1].model_path)
+        self._active = active
+        with self._lock:
+            self._counters[version].activated = time.time()
+        logger.info(f"Now serving model version {version}")
+
+    def _start_watcher(self):
+        self._reload_lock = threading.Lock()
+        threading.Thread(target=self._watch, name="model-reloader", daemon=True).start()
+
+    def _watch(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error while checking the model registry {e}")
+            time.sleep(self.poll_seconds)
+
+    def refresh(self):
+        """
+        Loads and swaps in the registry's active version if it changed.
+        Returns the version being served.
+        """
+        with self._reload_lock:
+            version = self.registry.current_version()
+            if version is None or version == self._active[0] or version == self._failed_version:
+                return self._active[0]
+            try:
+                self._swap(version)
+                self._failed_version = None
+            except Exception as e:
+                self._failed_version = version
+                logger.error(f"Could not load model version {version}, still serving {self._active[0]} {e}")
+            return self._active[0]
+
+    def current(self):
+        """
+        The (version, PredictionService) pair to use for one whole request.
+        """
+        return self._active
+
+    @property
+    def version(self):
+        return self._active[0]
+
+    @property
+    def feature_names(self):
+        return self._active[1].feature_names
+
+    def matrix_from_records(self, records):
+        return self.current()[1].matrix_from_records(records)
+
+    def matrix_from_csv(self, stream):
+        return self.current()[1].matrix_from_csv(stream)
+
+    def record(self, version, rows, seconds, error=False):
+        with self._lock:
+            counters = self._counters.setdefault(version, VersionCounters())
+            counters.requests += 1
+            counters.rows += rows
+            counters.seconds += seconds
+            counters.errors += int(error)
+
+    def record_outcomes(self, version, predictions, actuals):
+        predictions = np.asarray(predictions)
+        actuals = np.asarray(actuals)
+        if predictions.shape != actuals.shape:
+            raise ValueError("predictions and actuals must have the same length")
+        with self._lock:
+            counters = self._counters.setdefault(version, VersionCounters())
+            counters.labelled += len(actuals)
+            counters.correct += int((predictions == actuals).sum())
+
+    def predict_versioned(self, matrix, active=None):
+        """
+        Scores a matrix and returns (version, labels, probabilities). Pass the
+        `active` pair the request encoded its features with to score on the
+        same version.
+        """
+        version, service = active or self.current()
+        start = time.perf_counter()
+        try:
+            labels, probabilities = service.predict(matrix)
+        except Exception:
+            self.record(version, matrix.shape[0], time.perf_counter() - start, error=True)
+            raise
+        self.record(version, matrix.shape[0], time.perf_counter() - start)
+        return version, labels, probabilities
+
+    def predict(self, matrix, active=None):
+        _, labels, probabilities = self.predict_versioned(matrix, active)
+        return labels, probabilities
+
+    def predict_proba(self, matrix):
+        return self.predict(matrix)[1]
+
+    def predict_one(self, matrix, active=None):
+        version, service = active or self.current()
+        start = time.perf_counter()
+        result = service.predict_one(matrix)
+        self.record(version, 1, time.perf_counter() - start)
+        return result
+
+    def rollback(self, version=None):
+        """
+        Rolls the registry back and swaps this process over right away; other
+        processes follow on their next poll.
+        """
+        self.registry.rollback(version)
+        self._failed_version = None
+        return self.refresh()
+
+    def stats(self):
+        with self._lock:
+            counters = {version: counter.stats() for version, counter in self._counters.items()}
+        return {
+            "serving": self._active[0],
+            "registry_current": self.registry.current_version(),
+            "registry_versions": self.registry.versions(),
+            "versions": counters
+        }
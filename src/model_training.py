@@ -1,15 +1,20 @@
 import os
 import pandas as pd
 import joblib
-from sklearn.model_selection import RandomizedSearchCV
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
 import lightgbm as lgb
 
-from sklearn.metrics import accuracy_score,precision_score, recall_score, f1_score
 from src.logger import get_logger
 from src.custom_exception import CustomException
+from src.tree_predictor import CompiledTreePredictor, verify_parity
+from src.hyperparameter_search import SuccessiveHalvingSearch, thread_budget
+from src.class_balancing import lightgbm_balance_params
+from src.model_registry import ModelRegistry
+from src.model_evaluation import ThresholdEvaluator
+from src.distributed_training import DistributedTrainer
 from config.paths_config import *
 from config.model_params import *
-from utils.common_functions import read_yaml,load_data
+from utils.common_functions import read_yaml,load_data,write_json,read_json
 from scipy.stats import randint
 import sys
 
@@ -19,29 +24,42 @@ import mlflow.sklearn
 logger = get_logger(__name__)
 
 class ModelTraining():
-    def __init__(self,train_path, test_path, model_output_path):
+    def __init__(self,train_path, test_path, model_output_path, compiled_model_output_path=COMPILED_MODEL_OUTPUT,
+                 evaluation_output_path=EVALUATION_OUTPUT):
         self.train_path = train_path
         self.test_path = test_path
         self.model_output_path = model_output_path
+        self.compiled_model_output_path = compiled_model_output_path
+        self.evaluation_output_path = evaluation_output_path
 
         self.params_dist = LIGHTGBM_PARAMS
         self.random_search_params = RANDOM_SEARCH_PARAMS
+        self.search_mode = SEARCH_MODE
 
-    def load_and_split_data(self):
+        # Weighting strategies balance the classes here instead of in DataProcessor
+        config = read_yaml(CONFIG_PATH)
+        balancing_config = config["data_processing"].get("balancing", {})
+        self.balancing_strategy = balancing_config.get("strategy", "smote")
+        self.evaluator = ThresholdEvaluator.from_config(config)
+        self.validation_fraction = config.get("evaluation", {}).get("validation_fraction", 0.0)
+        self.config = config
+
+    def load_and_split_data(self, load_train=True):
         try:
-            logger.info(f"Loading data from {self.train_path}")
-            train_df = load_data(self.train_path)
-            
+            X_train, y_train = None, None
+            if load_train:
+                logger.info(f"Loading data from {self.train_path}")
+                train_df = load_data(self.train_path)
+                X_train = train_df.drop(columns=["booking_status"])
+                y_train = train_df["booking_status"]
+                X_train.columns = X_train.columns.str.replace('[^A-Za-z0-9_]+', '_', regex=True)
+
             logger.info(f"Loading data from {self.test_path}")
             test_df = load_data(self.test_path)
 
-            X_train = train_df.drop(columns=["booking_status"])
-            y_train = train_df["booking_status"]
-
             X_test = test_df.drop(columns=["booking_status"])
             y_test = test_df["booking_status"]
 
-            X_train.columns = X_train.columns.str.replace('[^A-Za-z0-9_]+', '_', regex=True)
             X_test.columns = X_test.columns.str.replace('[^A-Za-z0-9_]+', '_', regex=True)
 
             logger.info("Data Splitted sucessfully for model training")
@@ -51,10 +69,62 @@ class ModelTraining():
             logger.error(f"Error while loading data {e}")
             raise CustomException("Filed on loading data", sys)
         
+    def split_validation(self, X_train, y_train):
+        """
+        Holds out a stratified validation_fraction of the training split for
+        picking the operating threshold, so the test split only measures it.
+        """
+        if not self.validation_fraction:
+            return X_train, y_train, None, None
+        X_train, X_val, y_train, y_val = train_test_split(X_train, y_train, test_size=self.validation_fraction,
+                                                          stratify=y_train,
+                                                          random_state=self.evaluator.seed)
+        logger.info(f"Holding out {len(X_val)} training rows to select the operating threshold")
+        return X_train, y_train, X_val, y_val
+
+    def train_lgbm_halving(self, X_train, y_train):
+        try:
+            logger.info("Starting successive halving hyperparameter search")
+            search = SuccessiveHalvingSearch.from_params(
+                LIGHTGBM_HALVING_PARAMS, HALVING_SEARCH_PARAMS,
+                fixed_params=lightgbm_balance_params(self.balancing_strategy, y_train)
+            )
+            search.fit(X_train, y_train)
+
+            logger.info(f"Best parameters are: {search.best_params_}")
+            return search.best_estimator_
+
+        except Exception as e:
+            logger.error(f"Error while Hyperparameter tunning {e}")
+            raise CustomException("Filed on Hyperparameter tunning", sys)
+
+    def train_lgbm_distributed(self):
+        try:
+            logger.info("Starting data-parallel training")
+            # Workers read their own shards of train_path, never the whole split
+            trainer = DistributedTrainer.from_config(self.config, DISTRIBUTED_LIGHTGBM_PARAMS)
+            model = trainer.train(self.train_path)
+            if trainer.validation_path is None:
+                return model, None, None
+            # The trainer kept these rows out of every shard
+            validation_df = load_data(trainer.validation_path)
+            return model, validation_df.drop(columns=["booking_status"]), validation_df["booking_status"]
+
+        except CustomException:
+            raise
+        except Exception as e:
+            logger.error(f"Error while training on workers {e}")
+            raise CustomException("Filed on distributed training", sys)
+
     def train_lgbm(self,X_train, y_train):
+        if self.search_mode == "halving":
+            return self.train_lgbm_halving(X_train, y_train)
         try:
             logger.info("Initializing model")
-            lgbm_model = lgb.LGBMClassifier(random_state=self.random_search_params["random_state"])
+            # Give each parallel CV fit its share of the cores instead of all of them
+            _, threads = thread_budget(self.random_search_params["n_jobs"])
+            lgbm_model = lgb.LGBMClassifier(random_state=self.random_search_params["random_state"], n_jobs=threads,
+                                            **lightgbm_balance_params(self.balancing_strategy, y_train))
 
             logger.info("Starting our Hyperparameter tunning")
             random_search = RandomizedSearchCV(
@@ -81,28 +151,45 @@ class ModelTraining():
             logger.error(f"Error while Hyperparameter tunning {e}")
             raise CustomException("Filed on Hyperparameter tunning", sys)
         
-    def evaluate_model(self, model, X_test, y_test):
+    @staticmethod
+    def summary_metrics(report):
+        metrics = report["metrics"]
+        return {
+            "accuracy": metrics["accuracy"],
+            "precision" : metrics["precision"],
+            "recall" : metrics["recall"],
+            "f1 score" : metrics["f1"],
+            "roc_auc": metrics["roc_auc"],
+            "average_precision": metrics["average_precision"],
+            "brier": metrics["brier"],
+            "calibration_error": metrics["calibration_error"],
+            "threshold": report["operating_threshold"]
+        }
+
+    def evaluate_model(self, model, X_test, y_test, X_val=None, y_val=None):
         try:
             logger.info("Evaluating our model")
-            y_pred = model.predict(X_test)
-
-            #Metrics
-            accuracy = accuracy_score(y_test,y_pred)
-            precision = precision_score(y_test,y_pred)
-            recall = recall_score(y_test, y_pred)
-            f1 = f1_score(y_test,y_pred)
-
-            logger.info(f"accuracy Score {accuracy}")
-            logger.info(f"Precision Score {precision}")
-            logger.info(f"Recall Score {recall}")
-            logger.info(f"F1 Score {f1}")
-
-            return {
-                "accuracy": accuracy,
-                "precision" : precision,
-                "recall" : recall,
-                "f1 score" : f1
-            }
+            threshold = None
+            if X_val is not None:
+                threshold = self.evaluator.select_threshold(y_val.to_numpy() == model.classes_[1],
+                                                            model.predict_proba(X_val)[:, 1])
+            # One scoring pass; every curve and interval comes from these probabilities
+            probabilities = model.predict_proba(X_test)[:, 1]
+            report = self.evaluator.evaluate(y_test.to_numpy() == model.classes_[1], probabilities, threshold)
+            write_json(self.evaluation_output_path, report)
+            logger.info(f"Evaluation report saved to {self.evaluation_output_path}")
+
+            #Metrics at the operating threshold
+            metrics = report["metrics"]
+            logger.info(f"Operating threshold {report['operating_threshold']}")
+            logger.info(f"accuracy Score {metrics['accuracy']}")
+            logger.info(f"Precision Score {metrics['precision']}")
+            logger.info(f"Recall Score {metrics['recall']}")
+            logger.info(f"F1 Score {metrics['f1']}")
+            logger.info(f"ROC AUC {metrics['roc_auc']}, {report['confidence']:.0%} CI "
+                        f"{report['confidence_intervals'].get('roc_auc')}")
+
+            return self.summary_metrics(report)
 
         except Exception as e:
             logger.error(f"Error while evaluating model {e}")
@@ -120,7 +207,41 @@ class ModelTraining():
             logger.error(f"Error while saving the model {e}")
             raise CustomException("Filed on model saving", sys)
     
-    def run(self):
+    def export_compiled_model(self, model, X_test):
+        try:
+            logger.info("Compiling model for low-latency serving")
+            predictor = CompiledTreePredictor.from_booster(model.booster_, classes=model.classes_)
+            verify_parity(model, predictor, X_test.to_numpy(dtype="float64"))
+            predictor.save(self.compiled_model_output_path)
+
+        except Exception as e:
+            logger.error(f"Error while compiling the model {e}")
+            raise CustomException("Filed on model compilation", sys)
+
+    def register_model(self, model=None, metrics=None):
+        """
+        Registers and activates the saved artifacts. Without arguments the
+        model and its metrics are read back from disk, which is how the
+        pipeline registers after a training cache hit.
+        """
+        try:
+            if model is None:
+                model = joblib.load(self.model_output_path)
+            if metrics is None:
+                metrics = self.summary_metrics(read_json(self.evaluation_output_path))
+            registry = ModelRegistry.from_config(read_yaml(CONFIG_PATH))
+            version = registry.register(self.model_output_path, PREPROCESSOR_OUTPUT, self.compiled_model_output_path,
+                                        metrics=metrics, params=model.get_params(),
+                                        feature_names=list(model.booster_.feature_name()),
+                                        evaluation_path=self.evaluation_output_path)
+            logger.info(f"Model registered as version {version}, running servers will pick it up")
+            return version
+
+        except Exception as e:
+            logger.error(f"Error while registering the model {e}")
+            raise CustomException("Filed on model registration", sys)
+
+    def run(self, register=True):
         try:
             with mlflow.start_run():
                 logger.info("Starting model training pipeline")
@@ -131,20 +252,35 @@ class ModelTraining():
                 mlflow.log_artifact(self.train_path, artifact_path="datasets")
                 mlflow.log_artifact(self.test_path, artifact_path='datasets')
 
-                X_train,y_train,X_test,y_test = self.load_and_split_data()
-                best_lgbm_model = self.train_lgbm(X_train,y_train)
-                metrics = self.evaluate_model(best_lgbm_model,X_test,y_test)
+                if self.config["distributed_training"]["enabled"]:
+                    # The training split is only read shard by shard in the workers
+                    _, _, X_test, y_test = self.load_and_split_data(load_train=False)
+                    best_lgbm_model, X_val, y_val = self.train_lgbm_distributed()
+                else:
+                    X_train,y_train,X_test,y_test = self.load_and_split_data()
+                    X_train, y_train, X_val, y_val = self.split_validation(X_train, y_train)
+                    best_lgbm_model = self.train_lgbm(X_train,y_train)
+                metrics = self.evaluate_model(best_lgbm_model,X_test,y_test,X_val,y_val)
                 self.save_model(best_lgbm_model)
+                self.export_compiled_model(best_lgbm_model, X_test)
+                if register:
+                    version = self.register_model(best_lgbm_model, metrics)
+                    mlflow.set_tag("model_version", version)
 
                 logger.info("Logging the model into MLFow")
                 mlflow.log_artifact(self.model_output_path)
+                mlflow.log_artifact(self.evaluation_output_path)
 
                 logger.info("Logging params and metrics to MLFlow")
                 mlflow.log_params(best_lgbm_model.get_params())
-                mlflow.log_metrics(metrics)
+                # ROC AUC and average precision are None on a single-class test set
+                mlflow.log_metrics({name: value for name, value in metrics.items() if value is not None})
 
                 logger.info("Model Trianing succesfully completed")
 
+        # Stage failures were logged where they happened
+        except CustomException:
+            raise
         except Exception as e:
             logger.error(f"Error in the model training pipeline {e}")
             raise CustomException("Filed during model training pipeline", sys)
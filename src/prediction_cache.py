@@ -0,0 +1,233 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_key(row):
+    """
+    Builds a hashable cache key from one feature row. Values are rounded so
+    that 161 and 161.0000001 share an entry, and NaN becomes None.
+    """
+    return tuple(None if math.isnan(value) else round(float(value), 6) for value in row)
+
+
+def model_fingerprint(model_path):
+    stat = os.stat(model_path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class PredictionCache:
+    """
+    In-process LRU cache of (label, probability) keyed on the feature tuple.
+
+    Entries expire after `ttl_seconds` and the whole cache is dropped when the
+    model artifact changes on disk. The artifact is stat'ed at most once per
+    `check_interval` seconds to keep lookups cheap.
+
+    Callers pass the fingerprint of the model they score with as `model`; a
+    put from a model the cache has already moved past is dropped, so a
+    request still in flight across a hot reload cannot store stale answers.
+    """
+
+    def __init__(self, model_path, max_entries=10000, ttl_seconds=300, check_interval=1.0):
+        self.model_path = model_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.check_interval = check_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = model_fingerprint(model_path)
+        self._next_check = time.monotonic() + check_interval
+
+    def _check_model(self, now):
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        fingerprint = model_fingerprint(self.model_path)
+        if fingerprint != self._fingerprint:
+            logger.info(f"Model artifact {self.model_path} changed, clearing prediction cache")
+            self._fingerprint = fingerprint
+            self.invalidations += 1
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+
+    def switch_model(self, model_path):
+        """
+        Points the cache at another model artifact, e.g. after a hot reload,
+        and drops the entries computed with the previous one.
+        """
+        with self._lock:
+            self.model_path = model_path
+            self._fingerprint = model_fingerprint(model_path)
+            self.invalidations += 1
+            self._clear()
+
+    def reset_after_fork(self):
+        # A lock held by another thread at fork time would never be released
+        self._lock = threading.Lock()
+
+    def get(self, key, model=None):
+        now = time.monotonic()
+        with self._lock:
+            self._check_model(now)
+            if model is not None and model != self._fingerprint:
+                self.misses += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, model=None):
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if model is not None and model != self._fingerprint:
+                return
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
+
+
+class SharedPredictionCache(PredictionCache):
+    """
+    File-backed variant shared by every worker process on the host.
+
+    Entries live in a local SQLite database in WAL mode. Each row records the
+    model fingerprint it was computed with, so a new model artifact makes old
+    rows unreachable even for workers that have not noticed the change yet.
+    Hit and miss counters are per process.
+    """
+
+    EVICTION_BATCH = 64
+
+    def __init__(self, model_path, db_path, max_entries=10000, ttl_seconds=300, check_interval=1.0):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._local = threading.local()
+        self._puts = 0
+        super().__init__(model_path, max_entries, ttl_seconds, check_interval)
+
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            "key TEXT PRIMARY KEY, model TEXT, label INTEGER, probability REAL, "
+            "expires REAL, last_access REAL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS predictions_access ON predictions (last_access)")
+
+    def _connection(self):
+        # sqlite3 connections cannot be shared between threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _clear(self):
+        self._connection().execute("DELETE FROM predictions WHERE model != ?", (self._fingerprint,))
+
+    def reset_after_fork(self):
+        # SQLite connections must not be used across fork
+        super().reset_after_fork()
+        self._local = threading.local()
+
+    def get(self, key, model=None):
+        now = time.monotonic()
+        wall_now = time.time()
+        with self._lock:
+            self._check_model(now)
+            fingerprint = model or self._fingerprint
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT label, probability FROM predictions WHERE key = ? AND model = ? AND expires >= ?",
+            (repr(key), fingerprint, wall_now)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        connection.execute("UPDATE predictions SET last_access = ? WHERE key = ?", (wall_now, repr(key)))
+        self.hits += 1
+        return row[0], row[1]
+
+    def put(self, key, value, model=None):
+        wall_now = time.time()
+        connection = self._connection()
+        # Rows are tagged with the model that computed them, not the one current now
+        connection.execute(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)",
+            (repr(key), model or self._fingerprint, int(value[0]), float(value[1]), wall_now + self.ttl_seconds, wall_now)
+        )
+        # Counting rows is a table scan, so the size bound is enforced in batches
+        self._puts += 1
+        if self._puts % self.EVICTION_BATCH:
+            return
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM predictions WHERE key IN "
+                "(SELECT key FROM predictions ORDER BY last_access LIMIT ?)", (excess,)
+            )
+            self.evictions += excess
+
+    def clear(self):
+        self._connection().execute("DELETE FROM predictions")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def stats(self):
+        stats = super().stats()
+        stats["backend"] = "sqlite"
+        return stats
+
+
+def build_prediction_cache(cache_config, model_path, db_path):
+    if not cache_config.get("enabled", False):
+        return None
+    if cache_config["backend"] == "sqlite":
+        return SharedPredictionCache(model_path, db_path, cache_config["max_entries"], cache_config["ttl_seconds"])
+    return PredictionCache(model_path, cache_config["max_entries"], cache_config["ttl_seconds"])
@@ -0,0 +1,227 @@
+import io
+import os
+import sys
+import weakref
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException, RowErrors
+from src.feature_transformer import FeatureTransformer
+from src.tree_predictor import CompiledTreePredictor
+from src.model_evaluation import operating_threshold
+from src.prediction_cache import normalize_key, model_fingerprint
+
+logger = get_logger(__name__)
+
+# Services alive in this process, reset after a pre-fork server forks.
+# A weak set so services replaced by a model reload can be freed.
+_live_services = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for service in list(_live_services):
+        service._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class PredictionService:
+    """
+    Thin wrapper around the trained LightGBM model used by the web apps.
+
+    Features are always arranged in the order the booster was trained with,
+    so callers can send records as dicts keyed by feature name. When the
+    preprocessing artifact is available, categorical features may be sent as
+    raw labels such as "Online" or "Room_Type 1".
+
+    With engine="compiled" the booster is evaluated by CompiledTreePredictor
+    instead of the sklearn wrapper, which cuts single-row latency from
+    milliseconds to microseconds. When the compiled artifact is up to date
+    the sklearn model is never unpickled, which keeps lightgbm, sklearn and
+    pandas out of startup.
+
+    Labels are assigned at the operating threshold saved in the model's
+    evaluation report, or at 0.5 when there is none.
+    """
+
+    # Up to this many dict records are encoded without building a DataFrame
+    RECORDS_FAST_PATH_ROWS = 32
+
+    def __init__(self, model_path, preprocessor_path=None, engine="sklearn", compiled_path=None, cache=None,
+                 evaluation_path=None):
+        try:
+            self.model_path = model_path
+            self._model = None
+
+            self.transformer = None
+            if preprocessor_path is not None and os.path.exists(preprocessor_path):
+                self.transformer = FeatureTransformer.load(preprocessor_path)
+
+            self.cache = cache
+            # Tags this model's cache entries, see PredictionCache
+            self.fingerprint = model_fingerprint(model_path) if cache is not None else None
+            self.threshold = operating_threshold(evaluation_path)
+            self.engine = engine
+            self.compiled = None
+            if engine == "compiled":
+                self.compiled = self._load_compiled(compiled_path)
+                self.feature_names = self.compiled.feature_names
+                self.classes = self.compiled.classes
+                if self.classes is None:
+                    self.classes = np.asarray(self.model.classes_)
+            elif engine == "sklearn":
+                self.feature_names = list(self.model.booster_.feature_name())
+                self.classes = np.asarray(self.model.classes_)
+            else:
+                raise ValueError(f"Unknown serving engine {engine}")
+
+            # Pre-fork servers load the model once and fork workers from it
+            _live_services.add(self)
+
+            logger.info(f"Model loaded from {model_path} with features {self.feature_names}, threshold {self.threshold}")
+
+        except Exception as e:
+            logger.error(f"Error while loading the model {e}")
+            raise CustomException("Failed to load model for serving", sys)
+
+    @property
+    def model(self):
+        # Unpickling the sklearn wrapper imports lightgbm and sklearn, which
+        # dominates startup; the compiled engine only needs it as a fallback
+        if self._model is None:
+            import joblib
+            self._model = joblib.load(self.model_path)
+        return self._model
+
+    def _after_fork(self):
+        if self.cache is not None:
+            self.cache.reset_after_fork()
+
+    def _load_compiled(self, compiled_path):
+        if compiled_path is not None and os.path.exists(compiled_path):
+            if os.path.getmtime(compiled_path) >= os.path.getmtime(self.model_path):
+                return CompiledTreePredictor.load(compiled_path)
+            logger.warning(f"Compiled model {compiled_path} is older than {self.model_path}, recompiling")
+        return CompiledTreePredictor.from_booster(self.model.booster_, classes=self.model.classes_)
+
+    def matrix_from_records(self, records):
+        """
+        Builds a contiguous float64 matrix from a list of JSON records.
+
+        Records may be objects keyed by feature name or plain lists already
+        in model feature order. Invalid values in any row are collected and
+        reported together in one InvalidRowsError.
+        """
+        if not isinstance(records, list):
+            raise ValueError("Expected a JSON array of reservations")
+        if not records:
+            return np.empty((0, len(self.feature_names)), dtype=np.float64)
+
+        if isinstance(records[0], dict):
+            missing = [name for name in self.feature_names if name not in records[0]]
+            if missing:
+                raise ValueError(f"Missing features: {missing}")
+            errors = RowErrors()
+            if self.transformer is not None and len(records) <= self.RECORDS_FAST_PATH_ROWS:
+                matrix = self.transformer.transform_records(records, self.feature_names, errors)
+            else:
+                import pandas as pd
+                frame = pd.DataFrame.from_records(records, columns=self.feature_names)
+                self._missing_keys(records, frame, errors)
+                matrix = self._frame_to_matrix(frame, errors)
+            errors.raise_if_any("Invalid reservations")
+        else:
+            matrix = np.asarray(records, dtype=np.float64)
+
+        return self._validate(matrix)
+
+    def matrix_from_csv(self, stream):
+        """
+        Builds a contiguous float64 matrix from an uploaded CSV file.
+        Extra columns such as Booking_ID are ignored.
+        """
+        if isinstance(stream, (bytes, bytearray)):
+            stream = io.BytesIO(stream)
+        import pandas as pd
+        frame = pd.read_csv(stream, usecols=self.feature_names)
+        errors = RowErrors()
+        matrix = self._frame_to_matrix(frame, errors)
+        errors.raise_if_any("Invalid reservations")
+        return self._validate(matrix)
+
+    @staticmethod
+    def _missing_keys(records, frame, errors):
+        """
+        Records absent keys as "missing", like the fast path does; from_records
+        would silently fill them with NaN. Only NaN cells are looked up, so
+        complete batches cost one isna pass.
+        """
+        empty = frame.isna().to_numpy()
+        for position in np.flatnonzero(empty.any(axis=0)):
+            column = frame.columns[position]
+            rows = np.flatnonzero(empty[:, position])
+            absent = [row for row in rows if column not in records[row]]
+            errors.add_rows(np.asarray(absent, dtype=np.int64), column, "missing")
+
+    def _frame_to_matrix(self, frame, errors=None):
+        if self.transformer is not None:
+            return self.transformer.transform(frame, self.feature_names, errors)
+        return frame[self.feature_names].to_numpy(dtype=np.float64)
+
+    def _validate(self, matrix):
+        if matrix.ndim != 2 or matrix.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected {len(self.feature_names)} features per reservation, got shape {matrix.shape}"
+            )
+        return np.ascontiguousarray(matrix, dtype=np.float64)
+
+    def predict_proba(self, matrix):
+        """
+        Scores the whole matrix in one booster call.
+
+        Returns the probability of the positive class (1 = not canceled).
+        """
+        if matrix.shape[0] == 0:
+            return np.empty(0, dtype=np.float64)
+        if self.compiled is not None:
+            return self.compiled.predict_proba(matrix)
+        return self.model.predict_proba(matrix)[:, 1]
+
+    def predict(self, matrix):
+        probabilities = self.predict_proba(matrix)
+        labels = self.classes[(probabilities >= self.threshold).astype(np.intp)]
+        return labels, probabilities
+
+    def predict_one(self, matrix):
+        """
+        Scores a single-row matrix, answering from the prediction cache when
+        the same feature vector was scored recently.
+        """
+        key = normalize_key(matrix[0]) if self.cache is not None else None
+        if key is not None:
+            cached = self.cache.get(key, self.fingerprint)
+            if cached is not None:
+                return cached
+
+        labels, probabilities = self.predict(matrix)
+        result = (int(labels[0]), float(probabilities[0]))
+        if key is not None:
+            self.cache.put(key, result, self.fingerprint)
+        return result
+
+
+def iter_predictions_json(labels, probabilities, chunk_size=5000):
+    """
+    Yields a JSON document of predictions in chunks so large batches can be
+    streamed back without building the whole response body in memory.
+    """
+    yield f'{{"count": {len(labels)}, "predictions": ['
+    for start in range(0, len(labels), chunk_size):
+        stop = start + chunk_size
+        rows = ",".join(
+            f'{{"prediction": {int(label)}, "probability": {probability:.6f}}}'
+            for label, probability in zip(labels[start:stop], probabilities[start:stop])
+        )
+        yield rows if start == 0 else "," + rows
+    yield "]}"
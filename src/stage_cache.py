@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+CACHE_VERSION = 1
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class StageCache:
+    """
+    Content-addressed cache for the outputs of training pipeline stages.
+
+    A stage key is the SHA-256 of its input files, its config section and the
+    source files that implement it. When an entry for the key exists, the
+    stage is skipped and its outputs are copied back into place; otherwise the
+    stage runs and its outputs are stored under the key.
+
+    File digests are memoized on (size, mtime) so large unchanged inputs such
+    as raw.csv are hashed once.
+    """
+
+    def __init__(self, cache_dir, enabled=True, max_entries_per_stage=3):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.max_entries_per_stage = max_entries_per_stage
+        self.results = []
+
+        self._digest_index_path = self.cache_dir / "digests.json"
+        self._digests = {}
+        if self._digest_index_path.exists():
+            with open(self._digest_index_path, "r") as index_file:
+                self._digests = json.load(index_file)
+
+    @classmethod
+    def from_config(cls, config, cache_dir):
+        cache_config = config.get("pipeline_cache", {})
+        return cls(cache_dir, cache_config.get("enabled", True), cache_config.get("max_entries_per_stage", 3))
+
+    def file_digest(self, path):
+        path = Path(path)
+        if not path.exists():
+            return "missing"
+
+        stat = path.stat()
+        signature = f"{stat.st_size}-{stat.st_mtime_ns}"
+        cached = self._digests.get(str(path.resolve()))
+        if cached and cached["signature"] == signature:
+            return cached["digest"]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as data_file:
+            for block in iter(lambda: data_file.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+
+        self._digests[str(path.resolve())] = {"signature": signature, "digest": digest.hexdigest()}
+        return digest.hexdigest()
+
+    def _save_digests(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{self._digest_index_path}.tmp"
+        with open(temp_path, "w") as index_file:
+            json.dump(self._digests, index_file)
+        os.replace(temp_path, self._digest_index_path)
+
+    def stage_key(self, name, inputs, config, code_files):
+        description = {
+            "version": CACHE_VERSION,
+            "stage": name,
+            "inputs": {str(path): self.file_digest(path) for path in inputs},
+            "config": config,
+            "code": {Path(path).name: self.file_digest(path) for path in code_files}
+        }
+        payload = json.dumps(description, sort_keys=True, default=str).encode()
+        return hashlib.sha256(payload).hexdigest()
+
+    @staticmethod
+    def _copy(source, destination):
+        # Copy through a temp file so readers never see a partial artifact
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp_path = f"{destination}.tmp"
+        shutil.copy2(source, temp_path)
+        os.replace(temp_path, destination)
+
+    def _restore(self, entry_dir, manifest):
+        for position, output in enumerate(manifest["outputs"]):
+            cached = entry_dir / f"{position}_{Path(output).name}"
+            if not cached.exists():
+                if os.path.exists(output):
+                    os.remove(output)
+                continue
+            if self.file_digest(output) != manifest["digests"][position]:
+                self._copy(cached, output)
+
+    def _store(self, entry_dir, key, outputs, duration):
+        temp_dir = entry_dir.with_name(f"{key}.tmp")
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        os.makedirs(temp_dir)
+
+        digests = []
+        for position, output in enumerate(outputs):
+            digests.append(self.file_digest(output))
+            if os.path.exists(output):
+                shutil.copy2(output, temp_dir / f"{position}_{Path(output).name}")
+
+        manifest = {"key": key, "outputs": [str(path) for path in outputs], "digests": digests,
+                    "duration": duration, "created": time.time()}
+        with open(temp_dir / "manifest.json", "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(temp_dir, entry_dir)
+
+    def _prune(self, stage_dir):
+        entries = sorted((entry for entry in stage_dir.iterdir() if (entry / "manifest.json").exists()),
+                         key=lambda entry: (entry / "manifest.json").stat().st_mtime, reverse=True)
+        for entry in entries[self.max_entries_per_stage:]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def run(self, name, func, inputs=(), outputs=(), config=None, code_files=(), force=False):
+        """
+        Runs `func` unless an entry for the stage key exists, in which case the
+        cached outputs are restored instead. Returns the stage report row.
+        """
+        try:
+            start = time.perf_counter()
+            key = self.stage_key(name, inputs, config, code_files) if self.enabled else None
+            entry_dir = self.cache_dir / name / key if key else None
+            manifest_path = entry_dir / "manifest.json" if entry_dir else None
+
+            if key and not force and manifest_path.exists():
+                with open(manifest_path, "r") as manifest_file:
+                    manifest = json.load(manifest_file)
+                self._restore(entry_dir, manifest)
+                os.utime(manifest_path)
+                status = "hit"
+                logger.info(f"Stage {name} cache hit ({key[:12]}), reusing cached outputs")
+            else:
+                logger.info(f"Stage {name} cache {'disabled' if not key else 'miss'}, running it")
+                func()
+                status = "miss" if key else "disabled"
+                if key:
+                    self._store(entry_dir, key, outputs, time.perf_counter() - start)
+                    self._prune(entry_dir.parent)
+
+            if self.enabled:
+                self._save_digests()
+
+            result = {"stage": name, "status": status, "seconds": time.perf_counter() - start,
+                      "key": key[:12] if key else "-"}
+            self.results.append(result)
+            logger.info(f"Stage {name}: {status} in {result['seconds']:.2f}s")
+            return result
+
+        except CustomException:
+            raise
+        except Exception as e:
+            logger.error(f"Error while running cached stage {name} {e}")
+            raise CustomException(f"Failed to run stage {name}", sys)
+
+    def report(self):
+        lines = [f"{'stage':<16}{'cache':<10}{'seconds':>10}  key"]
+        for result in self.results:
+            lines.append(f"{result['stage']:<16}{result['status']:<10}{result['seconds']:>10.2f}  {result['key']}")
+        return "\n".join(lines)
@@ -0,0 +1,391 @@
+"""
+Synthetic reservation data for scale testing.
+
+    python -m src.synthetic_data --rows 100000000 [--output artifacts/synthetic/reservations.csv]
+                                 [--chunk-rows 1000000] [--workers 4] [--seed 42] [--parts] [--refit]
+
+Writes rows with the columns listed in config/config.yaml, drawn from a
+profile fitted on artifacts/raw/raw.csv. The output format follows the file
+suffix (.csv, .parquet or .feather). With --parts the output is a directory
+of part files written by the workers themselves, which is the fastest way
+to produce hundreds of millions of rows. A CSV can be fed to the training
+pipeline with data_ingestion.source: local and local_path pointing at it.
+"""
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from config.paths_config import *
+from utils.common_functions import read_json, write_json, read_yaml, ChunkWriter
+
+logger = get_logger(__name__)
+
+# Per-process generator for pool workers, set by _init_worker
+_worker_generator = None
+
+# Bumped when the profile layout changes; older profiles are refitted
+PROFILE_VERSION = 2
+# Name of the joint (year, month, day) variable in a fitted profile
+ARRIVAL = "arrival"
+# Redraws per stratum before giving up on rows that break a constraint
+MAX_REDRAWS = 100
+
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _generate_chunk(index, start, rows, seed, output, dtypes):
+    """
+    Samples one chunk in a worker. Depending on `output` the chunk is written
+    to its own part file, rendered as CSV text, or returned as a DataFrame
+    for the parent to append.
+    """
+    df = _worker_generator.sample(rows, seed=[seed, index], start_id=start + 1)
+    if output == "csv":
+        return df.to_csv(index=False, header=index == 0)
+    if output == "frame":
+        return df
+    with ChunkWriter(output, dtypes) as writer:
+        writer.write(df)
+    return rows
+
+
+class SyntheticReservations:
+    """
+    Generates reservation rows with the schema and the joint distribution of
+    artifacts/raw/raw.csv, for tests at sizes the real data cannot reach.
+
+    Rows are split into strata by booking_status and `strata_columns`
+    (market segment by default, which drives both price and cancellations).
+    `fit` stores each stratum's share, every other column's observed values
+    with their frequencies, and the correlation of the columns' normal
+    scores (a Gaussian copula). `sample` draws strata with the fitted shares,
+    draws correlated normals per stratum and maps each through the column's
+    empirical quantiles. Cancellation rates, marginals, category sets and
+    dtypes are reproduced exactly, dependencies between columns
+    approximately.
+
+    Two things an independent draw per column would get wrong are handled
+    explicitly. The arrival `date_columns` form one variable whose values
+    are the observed (year, month, day) combinations in date order, minus
+    any that are not calendar dates, so every row has a real date inside
+    the observed period. Rows where a group of `nonzero_sums` adds up to
+    zero (no guests, no nights) are redrawn. All work is vectorized per
+    chunk, and a chunk depends only on (seed, chunk index), so output does
+    not change with the number of workers.
+    """
+
+    def __init__(self, target="booking_status", id_column="Booking_ID", strata_columns=("market_segment_type",),
+                 date_columns=("arrival_year", "arrival_month", "arrival_date"),
+                 nonzero_sums=(("no_of_adults", "no_of_children"), ("no_of_weekend_nights", "no_of_week_nights"))):
+        self.target = target
+        self.id_column = id_column
+        self.strata_columns = list(strata_columns)
+        self.date_columns = list(date_columns)
+        self.nonzero_sums = [list(group) for group in nonzero_sums]
+        self.columns = []
+        self.dtypes = {}
+        self.strata = []
+        self._prepared = None
+
+    @property
+    def keys(self):
+        return [self.target] + self.strata_columns
+
+    @property
+    def features(self):
+        return [column for column in self.columns if column not in self.keys and column != self.id_column]
+
+    @property
+    def variables(self):
+        """
+        What the copula draws: every feature on its own, except the arrival
+        date columns, which are drawn together as ARRIVAL.
+        """
+        if not self.date_columns or not set(self.date_columns) <= set(self.features):
+            return self.features
+        variables = []
+        for column in self.features:
+            if column not in self.date_columns:
+                variables.append(column)
+            elif ARRIVAL not in variables:
+                variables.append(ARRIVAL)
+        return variables
+
+    def _observed(self, group, variable):
+        """
+        Value frequencies of one variable in a stratum, sorted by value.
+        """
+        if variable != ARRIVAL:
+            return group[variable].value_counts(normalize=True).sort_index()
+        return group.groupby(self.date_columns).size().sort_index() / len(group)
+
+    @staticmethod
+    def _is_date(value):
+        import datetime
+        try:
+            datetime.date(*value)
+            return True
+        except ValueError:
+            return False
+
+    def fit(self, df, columns=None):
+        import pandas as pd
+        from scipy.special import ndtri
+        try:
+            self.columns = list(columns) if columns else [column for column in df.columns if column != "Unnamed: 0"]
+            self.dtypes = {column: str(df[column].dtype) for column in self.columns if column != self.id_column}
+
+            self.strata = []
+            for key, group in df.groupby(self.keys, sort=True):
+                distributions = {}
+                scores = np.empty((len(group), len(self.variables)))
+                for position, variable in enumerate(self.variables):
+                    counts = self._observed(group, variable)
+                    probabilities = counts.to_numpy()
+                    # Mid-point of each value's step in the empirical CDF
+                    mid = np.cumsum(probabilities) - probabilities / 2
+                    observed = pd.MultiIndex.from_frame(group[self.date_columns]) if variable == ARRIVAL \
+                        else group[variable]
+                    scores[:, position] = ndtri(mid[counts.index.get_indexer(observed)])
+
+                    values = counts.index.tolist()
+                    if variable == ARRIVAL:
+                        # raw.csv has bookings for 29 February 2018; those dates are never sampled
+                        values = [[int(part) for part in value] for value in values]
+                        valid = np.array([self._is_date(value) for value in values])
+                        values = [value for value, keep in zip(values, valid) if keep]
+                        probabilities = probabilities[valid] / probabilities[valid].sum()
+                    distributions[variable] = {"values": values, "probabilities": probabilities.tolist()}
+
+                # Columns with a single value in a stratum have no correlation
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    correlation = np.nan_to_num(np.corrcoef(scores, rowvar=False)) if len(group) > 1 \
+                        else np.eye(len(self.variables))
+                np.fill_diagonal(correlation, 1.0)
+                self.strata.append({"key": [value.item() if hasattr(value, "item") else value for value in key],
+                                    "probability": len(group) / len(df),
+                                    "distributions": distributions,
+                                    "correlation": correlation.tolist()})
+
+            self._prepared = None
+            logger.info(f"Synthetic reservation profile fitted on {len(df)} rows, {len(self.strata)} strata")
+            return self
+
+        except Exception as e:
+            logger.error(f"Error while fitting synthetic data profile {e}")
+            raise CustomException("Failed to fit synthetic data profile", sys)
+
+    def _dtype(self, column):
+        return object if self.dtypes[column] in ("object", "str", "string") else self.dtypes[column]
+
+    def _prepare(self):
+        """
+        Correlation factors, value arrays and cumulative probabilities used
+        by `sample`, built once per process.
+        """
+        if self._prepared is None:
+            prepared = []
+            for stratum in self.strata:
+                # Clip tiny negative eigenvalues so the factorization cannot fail
+                eigenvalues, eigenvectors = np.linalg.eigh(np.asarray(stratum["correlation"]))
+                factor = eigenvectors * np.sqrt(np.clip(eigenvalues, 1e-10, None))
+                columns = []
+                for variable in self.variables:
+                    distribution = stratum["distributions"][variable]
+                    cumulative = np.cumsum(distribution["probabilities"])
+                    cumulative[-1] = 1.0
+                    # Arrival values become an (n, 3) array, one column per date column
+                    dtype = np.int64 if variable == ARRIVAL else self._dtype(variable)
+                    columns.append((np.asarray(distribution["values"], dtype=dtype), cumulative))
+                prepared.append((factor, columns))
+            self._prepared = prepared
+        return self._prepared
+
+    def sample(self, rows, seed=42, start_id=1):
+        """
+        Returns `rows` synthetic reservations with Booking_IDs numbered from
+        `start_id`, so chunks sampled with different seeds can be stacked.
+        """
+        import pandas as pd
+        from scipy.special import ndtr
+
+        prepared = self._prepare()
+        rng = np.random.default_rng(seed)
+        probabilities = np.array([stratum["probability"] for stratum in self.strata])
+        drawn = rng.choice(len(self.strata), size=rows, p=probabilities / probabilities.sum())
+
+        data = {column: np.empty(rows, dtype=self._dtype(column)) for column in self.features}
+        for position, (factor, columns) in enumerate(prepared):
+            pending = np.flatnonzero(drawn == position)
+            for _ in range(MAX_REDRAWS):
+                uniforms = ndtr(rng.standard_normal((len(pending), factor.shape[0])) @ factor.T)
+                for index, variable in enumerate(self.variables):
+                    values, cumulative = columns[index]
+                    picks = np.minimum(np.searchsorted(cumulative, uniforms[:, index], side="right"),
+                                       len(values) - 1)
+                    if variable == ARRIVAL:
+                        for part, column in enumerate(self.date_columns):
+                            data[column][pending] = values[picks, part]
+                    else:
+                        data[variable][pending] = values[picks]
+                # Rows without guests or nights are drawn again as a whole
+                pending = pending[self._violations(data, pending)]
+                if len(pending) == 0:
+                    break
+            else:
+                raise ValueError(f"Stratum {self.strata[position]['key']} keeps sampling rows with a zero "
+                                 f"sum of {self.nonzero_sums}")
+
+        for index, column in enumerate(self.keys):
+            values = np.asarray([stratum["key"][index] for stratum in self.strata], dtype=self._dtype(column))
+            data[column] = values[drawn]
+        if self.id_column in self.columns:
+            data[self.id_column] = "INN" + pd.Series(np.arange(start_id, start_id + rows)).astype(str).str.zfill(8)
+        return pd.DataFrame(data, columns=self.columns)
+
+    def _violations(self, data, rows):
+        """
+        Which of `rows` have a nonzero_sums group that adds up to zero.
+        """
+        invalid = np.zeros(len(rows), dtype=bool)
+        for group in self.nonzero_sums:
+            if set(group) <= set(self.features):
+                invalid |= sum(data[column][rows] for column in group) == 0
+        return invalid
+
+    def iter_chunks(self, rows, chunk_rows=1000000, seed=42):
+        """
+        Yields the rows as DataFrames of at most `chunk_rows` in one process.
+        """
+        for index, start in enumerate(range(0, rows, chunk_rows)):
+            yield self.sample(min(chunk_rows, rows - start), seed=[seed, index], start_id=start + 1)
+
+    def write(self, path, rows, chunk_rows=1000000, workers=1, seed=42, parts=False, dtypes=None):
+        """
+        Writes `rows` rows to `path` in chunks. Workers sample (and for CSV
+        also render) chunks in parallel; the parent writes them in order and
+        never holds more than 2 x workers chunks. With `parts` each worker
+        writes its chunks to `path`/part-NNNNN<suffix> instead, where the
+        suffix comes from `path` (a directory name like reservations.parquet).
+        Returns the number of rows written.
+        """
+        try:
+            path = Path(path)
+            suffix = path.suffix or ".csv"
+            chunks = [(index, start, min(chunk_rows, rows - start))
+                      for index, start in enumerate(range(0, rows, chunk_rows))]
+            if parts:
+                os.makedirs(path, exist_ok=True)
+
+            def output(index):
+                if parts:
+                    return str(path / f"part-{index:05d}{suffix}")
+                return "csv" if suffix == ".csv" else "frame"
+
+            logger.info(f"Writing {rows} synthetic rows to {path} in {len(chunks)} chunks with {workers} worker(s)")
+            written = 0
+            writer = None
+            if not parts and suffix != ".csv":
+                writer = ChunkWriter(path, dtypes)
+            elif not parts:
+                os.makedirs(path.parent, exist_ok=True)
+                writer = open(path, "w", newline="")
+
+            try:
+                if workers <= 1:
+                    _init_worker(self)
+                    for index, start, chunk in chunks:
+                        result = _generate_chunk(index, start, chunk, seed, output(index), dtypes)
+                        if writer is not None:
+                            writer.write(result)
+                        written += chunk
+                else:
+                    # Chunks are written in order; at most 2 x workers are in flight
+                    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                             initargs=(self,)) as pool:
+                        pending = deque()
+                        for index, start, chunk in chunks:
+                            pending.append((pool.submit(_generate_chunk, index, start, chunk, seed,
+                                                        output(index), dtypes), chunk))
+                            while pending and (len(pending) >= 2 * workers or index == len(chunks) - 1):
+                                future, done_rows = pending.popleft()
+                                result = future.result()
+                                if writer is not None:
+                                    writer.write(result)
+                                written += done_rows
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            logger.info(f"Wrote {written} synthetic rows to {path}")
+            return written
+
+        except Exception as e:
+            logger.error(f"Error while writing synthetic data to {path} {e}")
+            raise CustomException("Failed to write synthetic data", sys)
+
+    def save(self, path):
+        write_json(path, {"version": PROFILE_VERSION, "target": self.target, "id_column": self.id_column,
+                          "strata_columns": self.strata_columns, "date_columns": self.date_columns,
+                          "nonzero_sums": self.nonzero_sums, "columns": self.columns, "dtypes": self.dtypes,
+                          "strata": self.strata}, default=str)
+
+    @classmethod
+    def load(cls, path):
+        profile = read_json(path)
+        if profile is None:
+            raise FileNotFoundError(f"No synthetic data profile at {path}")
+        if profile.get("version") != PROFILE_VERSION:
+            raise ValueError(f"Synthetic data profile {path} has an old layout, refit it")
+        generator = cls(profile["target"], profile["id_column"], profile["strata_columns"],
+                        profile["date_columns"], profile["nonzero_sums"])
+        generator.columns = profile["columns"]
+        generator.dtypes = profile["dtypes"]
+        generator.strata = profile["strata"]
+        return generator
+
+    @classmethod
+    def from_raw(cls, config, raw_path=RAW_FILE_PATH, profile_path=SYNTHETIC_PROFILE_PATH, refit=False):
+        """
+        Loads the saved profile, or fits one on the raw data with the
+        Booking_ID column plus every column listed under data_processing.
+        """
+        # Profiles saved by an older layout are refitted
+        if not refit and read_json(profile_path, default={}).get("version") == PROFILE_VERSION:
+            return cls.load(profile_path)
+
+        import pandas as pd
+        processing_config = config["data_processing"]
+        wanted = set(processing_config["categorical_columns"]) | set(processing_config["numerical_columns"])
+        raw = pd.read_csv(raw_path)
+        generator = cls(strata_columns=config["synthetic_data"]["strata_columns"])
+        generator.fit(raw, [column for column in raw.columns if column == generator.id_column or column in wanted])
+        generator.save(profile_path)
+        return generator
+
+
+if __name__ == "__main__":
+    config = read_yaml(CONFIG_PATH)
+    synthetic_config = config["synthetic_data"]
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--output", default=str(SYNTHETIC_DATA_PATH))
+    parser.add_argument("--chunk-rows", type=int, default=synthetic_config["chunk_rows"])
+    parser.add_argument("--workers", type=int, default=synthetic_config["workers"])
+    parser.add_argument("--seed", type=int, default=synthetic_config["seed"])
+    parser.add_argument("--parts", action="store_true", help="Write a directory of part files")
+    parser.add_argument("--refit", action="store_true", help="Refit the profile on raw.csv")
+    args = parser.parse_args()
+
+    generator = SyntheticReservations.from_raw(config, refit=args.refit)
+    generator.write(args.output, args.rows, args.chunk_rows, args.workers, args.seed, args.parts,
+                    config["storage"]["dtypes"])
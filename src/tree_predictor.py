@@ -0,0 +1,263 @@
+import os
+import sys
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+logger = get_logger(__name__)
+
+# LightGBM missing value handling per split node
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+ZERO_THRESHOLD = 1e-35
+
+
+def export_booster(booster):
+    """
+    Flattens a binary LightGBM booster into parallel node arrays.
+
+    Every tree is stored in the same arrays; `roots` holds the index of each
+    tree's root node. Leaves have feature -1 and point to themselves so the
+    vectorized walk can keep stepping once a row has reached a leaf.
+    """
+    model = booster.dump_model()
+    objective = model["objective"].split()
+    if objective[0] != "binary" or model["num_tree_per_iteration"] != 1 or model["average_output"]:
+        raise ValueError(f"Only binary gbdt/dart boosters can be compiled, got {model['objective']}")
+    sigmoid = float(objective[1].split(":")[1]) if len(objective) > 1 else 1.0
+
+    feature, threshold, left, right, value, default_left, missing_type = [], [], [], [], [], [], []
+    roots, max_depth = [], 0
+
+    def add_node(node, depth):
+        nonlocal max_depth
+        index = len(feature)
+        feature.append(-1)
+        threshold.append(0.0)
+        left.append(index)
+        right.append(index)
+        value.append(0.0)
+        default_left.append(False)
+        missing_type.append(MISSING_NONE)
+
+        if "leaf_value" in node:
+            value[index] = node["leaf_value"]
+            max_depth = max(max_depth, depth)
+            return index
+
+        if node["decision_type"] != "<=":
+            raise ValueError("Categorical splits are not supported by the compiled predictor")
+
+        feature[index] = node["split_feature"]
+        threshold[index] = node["threshold"]
+        default_left[index] = node["default_left"]
+        missing_type[index] = MISSING_TYPES[node["missing_type"]]
+        left[index] = add_node(node["left_child"], depth + 1)
+        right[index] = add_node(node["right_child"], depth + 1)
+        return index
+
+    for tree in model["tree_info"]:
+        roots.append(add_node(tree["tree_structure"], 0))
+
+    return {
+        "feature": np.asarray(feature, dtype=np.int32),
+        "threshold": np.asarray(threshold, dtype=np.float64),
+        "left": np.asarray(left, dtype=np.int32),
+        "right": np.asarray(right, dtype=np.int32),
+        "value": np.asarray(value, dtype=np.float64),
+        "default_left": np.asarray(default_left, dtype=np.bool_),
+        "missing_type": np.asarray(missing_type, dtype=np.int8),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "max_depth": np.int32(max_depth),
+        "sigmoid": np.float64(sigmoid),
+        "feature_names": np.asarray(model["feature_names"]),
+    }
+
+
+def _predict_raw_numpy(X, arrays):
+    n_rows, n_features = X.shape
+    roots = arrays["roots"]
+    feature = arrays["split_feature"]
+    threshold = arrays["threshold"]
+    children = arrays["children"]
+    default_left = arrays["default_left"]
+    missing_type = arrays["missing_type"]
+
+    # Every (row, tree) pair is walked in lockstep, one tree level per step.
+    # The flat layout keeps each step to a handful of `take` calls.
+    nodes = np.tile(roots, n_rows)
+    row_offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, roots.shape[0])
+    flat_X = X.ravel()
+    check_missing = bool(np.isnan(flat_X).any()) or bool((missing_type == MISSING_ZERO).any())
+
+    for _ in range(int(arrays["max_depth"])):
+        values = flat_X.take(row_offsets + feature.take(nodes))
+
+        if check_missing:
+            node_missing = missing_type.take(nodes)
+            nan_values = np.isnan(values)
+            values = np.where(nan_values & (node_missing != MISSING_NAN), 0.0, values)
+            is_missing = (nan_values & (node_missing == MISSING_NAN)) | (
+                (node_missing == MISSING_ZERO) & (np.abs(values) <= ZERO_THRESHOLD))
+            go_left = np.where(is_missing, default_left.take(nodes), values <= threshold.take(nodes))
+        else:
+            go_left = values <= threshold.take(nodes)
+
+        # children holds (right, left) pairs, so the decision indexes it directly
+        nodes = children.take(2 * nodes + go_left)
+
+    return arrays["value"].take(nodes).reshape(n_rows, roots.shape[0]).sum(axis=1)
+
+
+if numba is not None:
+    def _walk_trees(X, row, feature, threshold, left, right, value, default_left, missing_type, roots):
+        total = 0.0
+        for tree in range(roots.shape[0]):
+            node = roots[tree]
+            while feature[node] >= 0:
+                fval = X[row, feature[node]]
+                if np.isnan(fval) and missing_type[node] != MISSING_NAN:
+                    fval = 0.0
+                if ((missing_type[node] == MISSING_ZERO and abs(fval) <= ZERO_THRESHOLD)
+                        or (missing_type[node] == MISSING_NAN and np.isnan(fval))):
+                    go_left = default_left[node]
+                else:
+                    go_left = fval <= threshold[node]
+                node = left[node] if go_left else right[node]
+            total += value[node]
+        return total
+
+    _walk_trees = numba.njit(cache=True, nogil=True, inline="always")(_walk_trees)
+
+    @numba.njit(cache=True, nogil=True)
+    def _predict_raw_numba(X, feature, threshold, left, right, value, default_left, missing_type, roots):
+        out = np.empty(X.shape[0])
+        for row in range(X.shape[0]):
+            out[row] = _walk_trees(X, row, feature, threshold, left, right, value,
+                                   default_left, missing_type, roots)
+        return out
+
+    @numba.njit(cache=True, nogil=True, parallel=True)
+    def _predict_raw_numba_parallel(X, feature, threshold, left, right, value, default_left, missing_type, roots):
+        out = np.empty(X.shape[0])
+        for row in numba.prange(X.shape[0]):
+            out[row] = _walk_trees(X, row, feature, threshold, left, right, value,
+                                   default_left, missing_type, roots)
+        return out
+
+
+class CompiledTreePredictor:
+    """
+    Evaluates an exported LightGBM booster without the sklearn wrapper.
+
+    Uses a numba kernel when numba is installed and a vectorized NumPy walk
+    otherwise. Both follow LightGBM's numerical split and missing value rules,
+    so probabilities match `LGBMClassifier.predict_proba` to float precision.
+    """
+
+    # Batches at least this large are spread over all cores by the numba kernel
+    PARALLEL_MIN_ROWS = 2048
+
+    def __init__(self, arrays, use_numba=True):
+        self.arrays = dict(arrays)
+        self.feature_names = [str(name) for name in arrays["feature_names"]]
+        self.sigmoid = float(arrays["sigmoid"])
+        # Labels of the negative and positive class; artifacts compiled before
+        # they were stored leave this to the sklearn model
+        self.classes = arrays["classes"] if "classes" in arrays else None
+        self.use_numba = use_numba and numba is not None
+
+        # Derived lookups for the NumPy walk; not persisted
+        self.arrays["split_feature"] = np.maximum(arrays["feature"], 0).astype(np.intp)
+        self.arrays["children"] = np.stack([arrays["right"], arrays["left"]], axis=1).ravel().astype(np.intp)
+
+    @classmethod
+    def from_booster(cls, booster, use_numba=True, classes=None):
+        arrays = export_booster(booster)
+        if classes is not None:
+            arrays["classes"] = np.asarray(classes)
+        return cls(arrays, use_numba=use_numba)
+
+    @classmethod
+    def load(cls, path, use_numba=True):
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            logger.info(f"Compiled model loaded from {path}")
+            return cls(arrays, use_numba=use_numba)
+
+        except Exception as e:
+            logger.error(f"Error while loading compiled model {e}")
+            raise CustomException("Failed to load compiled model", sys)
+
+    def save(self, path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            persisted = {name: array for name, array in self.arrays.items()
+                         if name not in ("split_feature", "children")}
+            np.savez(path, **persisted)
+            logger.info(f"Compiled model saved to {path}")
+
+        except Exception as e:
+            logger.error(f"Error while saving compiled model {e}")
+            raise CustomException("Failed to save compiled model", sys)
+
+    def predict_raw(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if self.use_numba:
+            arrays = self.arrays
+            kernel = _predict_raw_numba_parallel if X.shape[0] >= self.PARALLEL_MIN_ROWS else _predict_raw_numba
+            return kernel(X, arrays["feature"], arrays["threshold"], arrays["left"],
+                          arrays["right"], arrays["value"], arrays["default_left"],
+                          arrays["missing_type"], arrays["roots"])
+        return _predict_raw_numpy(X, self.arrays)
+
+    def predict_proba(self, X):
+        """
+        Returns the probability of the positive class for every row.
+        """
+        return 1.0 / (1.0 + np.exp(-self.sigmoid * self.predict_raw(X)))
+
+    def warm_up(self):
+        """
+        Runs both numba kernels once. With cache=True the first run in a fresh
+        environment compiles them to disk and later processes only load them,
+        so running this at image build time keeps JIT out of cold starts.
+        """
+        for rows in (1, self.PARALLEL_MIN_ROWS):
+            self.predict_raw(np.zeros((rows, len(self.feature_names))))
+
+
+def verify_parity(model, predictor, X, atol=1e-9):
+    """
+    Checks the compiled predictor against the original sklearn model and
+    raises if any probability differs by more than `atol`.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    expected = model.predict_proba(X)[:, 1]
+    actual = predictor.predict_proba(X)
+    max_error = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+
+    if max_error > atol:
+        raise ValueError(f"Compiled predictor differs from model by {max_error}")
+
+    logger.info(f"Compiled predictor parity verified on {len(X)} rows, max error {max_error}")
+    return max_error
+
+
+if __name__ == "__main__":
+    import joblib
+    from config.paths_config import MODEL_OUTPUT, COMPILED_MODEL_OUTPUT, PROCESSED_TEST_DATA_PATH
+    from utils.common_functions import load_data
+
+    model = joblib.load(MODEL_OUTPUT)
+    predictor = CompiledTreePredictor.from_booster(model.booster_, classes=model.classes_)
+    X_test = load_data(PROCESSED_TEST_DATA_PATH)[predictor.feature_names].to_numpy(dtype=np.float64)
+    verify_parity(model, predictor, X_test)
+    predictor.save(COMPILED_MODEL_OUTPUT)
+    predictor.warm_up()
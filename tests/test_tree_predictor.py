@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+import lightgbm as lgb
+
+from src.tree_predictor import CompiledTreePredictor, numba
+
+N_CATEGORIES = 5
+
+BACKENDS = [pytest.param(False, id="numpy"),
+            pytest.param(True, id="numba",
+                         marks=pytest.mark.skipif(numba is None, reason="numba is not installed"))]
+
+
+def make_data(n_rows, seed=0):
+    """
+    Two numerical columns with missing values and one label encoded category,
+    like the processed hotel reservation features.
+    """
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.normal(size=n_rows),
+        rng.uniform(0, 100, size=n_rows),
+        rng.integers(0, N_CATEGORIES, size=n_rows).astype(np.float64),
+    ])
+    X[rng.random(n_rows) < 0.1, 0] = np.nan
+    X[rng.random(n_rows) < 0.1, 1] = np.nan
+    logit = X[:, 0] - 0.03 * X[:, 1] + 0.5 * X[:, 2]
+    y = (np.nan_to_num(logit) + rng.normal(scale=0.5, size=n_rows) > 0).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope="module", params=[False, True], ids=["nan_missing", "zero_missing"])
+def booster(request):
+    X, y = make_data(2000)
+    params = {"objective": "binary", "num_leaves": 15, "learning_rate": 0.1,
+              "min_data_in_leaf": 5, "zero_as_missing": request.param, "verbose": -1}
+    return lgb.train(params, lgb.Dataset(X, label=y), num_boost_round=30)
+
+
+def assert_parity(booster, predictor, X):
+    np.testing.assert_allclose(predictor.predict_proba(X), booster.predict(X), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("use_numba", BACKENDS)
+def test_matches_booster(booster, use_numba):
+    predictor = CompiledTreePredictor.from_booster(booster, use_numba=use_numba)
+    X, _ = make_data(500, seed=1)
+    assert_parity(booster, predictor, X)
+
+
+@pytest.mark.parametrize("use_numba", BACKENDS)
+def test_nan_and_zero_values(booster, use_numba):
+    predictor = CompiledTreePredictor.from_booster(booster, use_numba=use_numba)
+    X, _ = make_data(200, seed=2)
+    X[::3, 0] = np.nan
+    X[1::3, 1] = np.nan
+    X[2::3, :2] = 0.0
+    X[::7, 2] = np.nan
+    assert_parity(booster, predictor, X)
+
+
+@pytest.mark.parametrize("use_numba", BACKENDS)
+def test_unseen_category_codes(booster, use_numba):
+    predictor = CompiledTreePredictor.from_booster(booster, use_numba=use_numba)
+    X, _ = make_data(50, seed=3)
+    X[:, 2] = np.tile([-1.0, N_CATEGORIES, N_CATEGORIES + 10, 1e6, -1e6], 10)
+    assert_parity(booster, predictor, X)
+
+
+@pytest.mark.parametrize("use_numba", BACKENDS)
+def test_single_row(booster, use_numba):
+    predictor = CompiledTreePredictor.from_booster(booster, use_numba=use_numba)
+    X, _ = make_data(1, seed=4)
+    assert predictor.predict_proba(X).shape == (1,)
+    assert_parity(booster, predictor, X)
+    assert_parity(booster, predictor, np.full((1, 3), np.nan))
+
+
+@pytest.mark.parametrize("use_numba", BACKENDS)
+def test_save_and_load(booster, use_numba, tmp_path):
+    path = str(tmp_path / "compiled_model.npz")
+    CompiledTreePredictor.from_booster(booster).save(path)
+    predictor = CompiledTreePredictor.load(path, use_numba=use_numba)
+    X, _ = make_data(100, seed=5)
+    assert_parity(booster, predictor, X)
@@ -1,11 +1,20 @@
 # Create a funtions for reading yaml files
-import pandas as pd
+# pandas is imported inside the data helpers: the serving apps only need the
+# config/JSON helpers and start faster without it
+import numpy as np
 import os
+from pathlib import Path
 from src.logger import get_logger
 from src.custom_exception import CustomException
 import yaml
+import json
 import sys
 
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
 logger = get_logger(__name__)
 
 def read_yaml(file_path):
@@ -16,16 +25,324 @@ def read_yaml(file_path):
             config =yaml.safe_load(yaml_file)
             logger.info("Succesfully read the YAML file")
             return config
-    
+
     except Exception as e:
         logger.error("Error wile reading YAML file")
         raise CustomException("Failed to read YAML file", sys)
-    
 
-def load_data(path):
+
+def read_json(file_path, default=None):
+    if not os.path.exists(file_path):
+        return default
+    with open(file_path, "r") as json_file:
+        return json.load(json_file)
+
+
+def write_json(file_path, data, default=None):
+    """
+    Writes JSON atomically so readers never see a half-written state file.
+    """
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    # Per-process temp name, so concurrent writers cannot clobber each other's temp file
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as json_file:
+        json.dump(data, json_file, indent=2, default=default)
+    os.replace(temp_path, file_path)
+
+
+def schema_from_config(config):
+    """
+    Builds the load schema for raw reservation data from the column lists
+    under `data_processing`. Columns not listed there (such as Booking_ID)
+    are never read.
+    """
+    processing_config = config["data_processing"]
+    dtypes = config.get("storage", {}).get("dtypes", {})
+
+    schema = {column: "category" for column in processing_config["categorical_columns"]}
+    for column in processing_config["numerical_columns"]:
+        schema[column] = dtypes.get(column, "int64")
+    return schema
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _concat_chunks(chunks):
+    """
+    Concatenates chunks while keeping categorical columns categorical, even
+    when each chunk saw a different set of categories.
+    """
+    if len(chunks) == 1:
+        return chunks[0]
+    import pandas as pd
+    from pandas.api.types import union_categoricals
+    columns = {}
+    for column in chunks[0].columns:
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype):
+            columns[column] = pd.Series(union_categoricals([chunk[column] for chunk in chunks]))
+        else:
+            columns[column] = pd.Series(np.concatenate([chunk[column].to_numpy() for chunk in chunks]))
+    return pd.DataFrame(columns)
+
+
+def load_data(path, schema=None, chunksize=100000):
+    """
+    Loads a tabular artifact, picking the reader from the file suffix.
+    Parquet and Feather files are memory-mapped instead of copied into the
+    process, and keep the dtypes they were written with.
+
+    With a schema ({column: dtype}, see `schema_from_config`) only those
+    columns are read. CSV input is parsed in chunks that are narrowed as
+    they arrive, so the full int64/object frame never exists in memory.
+    """
+    import pandas as pd
+    try:
+        logger.info(f"Loading data from {path}")
+        suffix = Path(path).suffix
+        columns = list(schema) if schema else None
+
+        if suffix == ".parquet":
+            if columns:
+                from pyarrow import parquet
+                available = set(parquet.read_schema(path).names)
+                columns = [column for column in columns if column in available]
+            df = pd.read_parquet(path, columns=columns, memory_map=True)
+        elif suffix == ".feather":
+            from pyarrow import feather
+            df = feather.read_table(path, columns=columns, memory_map=True).to_pandas(split_blocks=True)
+        elif schema:
+            available = set(pd.read_csv(path, nrows=0).columns)
+            usecols = [column for column in columns if column in available]
+            chunks = [
+                narrow_dtypes(chunk, schema)
+                for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunksize)
+            ]
+            df = _concat_chunks(chunks)[usecols]
+        else:
+            df = pd.read_csv(path)
+
+        if schema:
+            df = narrow_dtypes(df, schema)
+            logger.info(
+                f"Loaded {len(df)} rows x {df.shape[1]} columns, "
+                f"{df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB in memory, "
+                f"peak RSS {_peak_rss_mb():.1f} MB"
+            )
+        return df
+    except Exception as e:
+        logger.error(f"Error loading the data {e}")
+        raise CustomException("Failed to load data", sys)
+
+
+def narrow_dtypes(df, dtypes):
+    """
+    Casts columns to the narrow dtypes configured under `storage.dtypes`.
+
+    Integer casts only happen when every value is a whole number that fits,
+    so encoded and count columns round-trip exactly. Numeric columns listed
+    as `category` (label codes after preprocessing) are downcast to the
+    smallest integer type instead.
+    """
+    import pandas as pd
+    for column, dtype in dtypes.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        numeric = pd.api.types.is_numeric_dtype(series.dtype)
+
+        if dtype == "category":
+            if not numeric:
+                df[column] = series.astype("category")
+                continue
+            dtype = "int64"
+
+        if not numeric:
+            continue
+        target = np.dtype(dtype)
+        if np.issubdtype(target, np.integer):
+            values = series.to_numpy()
+            if series.isna().any() or not np.array_equal(values, np.round(values)):
+                continue
+            if dtype == "int64":
+                df[column] = pd.to_numeric(series, downcast="integer")
+            # An empty chunk has no range to check and casts safely
+            elif len(values) == 0 or (values.min() >= np.iinfo(target).min
+                                      and values.max() <= np.iinfo(target).max):
+                df[column] = series.astype(target)
+        else:
+            df[column] = series.astype(target)
+    return df
+
+
+def save_data(df, path, dtypes=None):
+    """
+    Writes a tabular artifact in the format given by the file suffix,
+    narrowing dtypes first when a schema is provided.
+    """
     try:
-        logger.info("Logging data")
-        return pd.read_csv(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if dtypes:
+            df = narrow_dtypes(df.copy(deep=False), dtypes)
+
+        suffix = Path(path).suffix
+        if suffix == ".parquet":
+            df.to_parquet(path, index=False)
+        elif suffix == ".feather":
+            df.reset_index(drop=True).to_feather(path)
+        else:
+            df.to_csv(path, index=False)
+
+        logger.info(f"Data saved to {path}")
+    except Exception as e:
+        logger.error(f"Error saving the data {e}")
+        raise CustomException("Failed to save data", sys)
+
+
+class ChunkWriter:
+    """
+    Appends DataFrame chunks to a single csv/parquet/feather file so large
+    outputs can be written without holding them in memory.
+
+    For the columnar formats the Arrow schema is fixed by the first chunk
+    (after dtype narrowing) and later chunks are cast to it; a value that no
+    longer fits raises instead of being silently truncated.
+
+    Empty chunks are skipped, so a split that sends all of a chunk's rows to
+    one side does not fix the schema from a chunk without values. If no rows
+    arrive at all, the file is still written on close, with columns only.
+    """
+
+    def __init__(self, path, dtypes=None):
+        self.path = Path(path)
+        self.dtypes = dtypes
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self._csv_file = None
+        self._empty = None
+        os.makedirs(self.path.parent, exist_ok=True)
+
+    def _to_table(self, df):
+        import pandas as pd
+        import pyarrow as pa
+
+        # Categories differ from chunk to chunk, so they are stored as plain
+        # (dictionary-encoded) strings and restored as categories on load
+        for column in df.columns:
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype(str)
+
+        if self._schema is None:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            self._schema = table.schema
+            return table
+        return pa.Table.from_pandas(df, schema=self._schema, preserve_index=False, safe=True)
+
+    def write(self, df):
+        if len(df) == 0:
+            if self._empty is None:
+                self._empty = df
+            return
+        self._write(df)
+
+    def _write(self, df):
+        if self.dtypes:
+            df = narrow_dtypes(df.copy(deep=False), self.dtypes)
+
+        suffix = self.path.suffix
+        if suffix == ".csv":
+            if self._csv_file is None:
+                self._csv_file = open(self.path, "w", newline="")
+                df.to_csv(self._csv_file, index=False)
+            else:
+                df.to_csv(self._csv_file, index=False, header=False)
+        else:
+            table = self._to_table(df)
+            if self._writer is None:
+                if suffix == ".parquet":
+                    from pyarrow import parquet
+                    self._writer = parquet.ParquetWriter(self.path, table.schema)
+                else:
+                    import pyarrow as pa
+                    self._writer = pa.ipc.new_file(self.path, table.schema)
+            self._writer.write_table(table)
+
+        self.rows += len(df)
+
+    def close(self):
+        if self.rows == 0 and self._empty is not None and self._csv_file is None and self._writer is None:
+            self._write(self._empty)
+        if self._csv_file is not None:
+            self._csv_file.close()
+        if self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_data(path, chunksize=100000):
+    """
+    Yields a tabular artifact as DataFrame chunks without loading it whole.
+    """
+    suffix = Path(path).suffix
+    if suffix == ".parquet":
+        from pyarrow import parquet
+        for batch in parquet.ParquetFile(path).iter_batches(chunksize):
+            yield batch.to_pandas()
+    elif suffix == ".feather":
+        import pyarrow as pa
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield reader.get_batch(index).to_pandas()
+    else:
+        import pandas as pd
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def append_data(chunks, path, dtypes=None):
+    """
+    Appends DataFrame chunks to an existing artifact, or creates it.
+
+    CSV files are appended in place. Columnar files cannot grow in place, so
+    the existing batches are streamed into a new file followed by the new
+    chunks, then swapped in; nothing is re-parsed and memory stays flat.
+    """
+    try:
+        path = Path(path)
+        rows = 0
+        if path.exists() and path.suffix == ".csv":
+            with open(path, "a", newline="") as csv_file:
+                for chunk in chunks:
+                    if dtypes:
+                        chunk = narrow_dtypes(chunk.copy(deep=False), dtypes)
+                    chunk.to_csv(csv_file, header=False, index=False)
+                    rows += len(chunk)
+        elif path.exists():
+            temp_path = path.with_name(f"{path.stem}.tmp{path.suffix}")
+            with ChunkWriter(temp_path, dtypes) as writer:
+                for chunk in iter_data(path):
+                    writer.write(chunk)
+                for chunk in chunks:
+                    writer.write(chunk)
+                    rows += len(chunk)
+            os.replace(temp_path, path)
+        else:
+            with ChunkWriter(path, dtypes) as writer:
+                for chunk in chunks:
+                    writer.write(chunk)
+            rows = writer.rows
+
+        logger.info(f"Appended {rows} rows to {path}")
+        return rows
     except Exception as e:
-        logger.error(f"Error loading the data")
-        raise CustomException("Failed to load data", sys)
\ No newline at end of file
+        logger.error(f"Error appending the data {e}")
+        raise CustomException("Failed to append data", sys)